@@ -11,11 +11,50 @@ class Settings(BaseSettings):
     
     # Banco de dados
     DATABASE_URL: str
+    SQL_ECHO: bool = False
+
+    # Pool de conexões (por worker do uvicorn; ignorado no SQLite)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Tempo máximo de cada statement no PostgreSQL, em ms (0 desativa)
+    DB_STATEMENT_TIMEOUT_MS: int = 0
     
     # Segurança
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+
+    # Pool de processos para hash/verificação de senha (bcrypt)
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # Pool de processos para otimização de imagens (Pillow)
+    IMAGE_PROCESS_WORKERS: int = 2
+    IMAGE_PROCESS_MAX_PENDING: int = 16
+
+    # Coletor de uploads órfãos (intervalo 0 desativa a tarefa periódica;
+    # a linha de comando run_upload_gc.py funciona sempre)
+    UPLOAD_GC_INTERVAL_SECONDS: int = 0
+    UPLOAD_GC_GRACE_SECONDS: int = 24 * 60 * 60
+    UPLOAD_GC_QUARANTINE_SECONDS: int = 7 * 24 * 60 * 60
+
+    # Reservas de estoque dos carrinhos (intervalo 0 desativa a expiração)
+    STOCK_RESERVATION_TTL_SECONDS: int = 15 * 60
+    STOCK_RESERVATION_SWEEP_INTERVAL_SECONDS: int = 30
+
+    # Idempotency-Key em POST /orders, /stock/checkout e /payments
+    # (intervalo 0 desativa a limpeza periódica das chaves vencidas)
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 24 * 60 * 60
+    IDEMPOTENCY_LOCK_SECONDS: int = 60
+    IDEMPOTENCY_CACHE_MAX_SIZE: int = 10000
+    IDEMPOTENCY_SWEEP_INTERVAL_SECONDS: int = 60 * 60
+
+    # Cache do usuário autenticado (0 desativa)
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAX_SIZE: int = 10000
     
     # Email (Gmail SMTP)
     MAIL_USERNAME: str = ""
@@ -27,6 +66,19 @@ class Settings(BaseSettings):
     # URL do frontend (usada nos links do email)
     FRONTEND_URL: str = "http://localhost:5173"
 
+    # Cache de respostas dos endpoints públicos do catálogo (TTL 0 desativa).
+    # Backend "memory" (LRU por processo) ou "redis" (requer o pacote redis)
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    RESPONSE_CACHE_TTL_SECONDS: int = 60
+    RESPONSE_CACHE_MAX_SIZE: int = 5000
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Busca de produtos: "memory" (índice invertido em memória) ou "postgres" (tsvector/GIN)
+    SEARCH_BACKEND: str = "memory"
+    # Backend "memory": intervalo entre as conferências do índice com a tabela
+    # (alterações feitas por outros workers); 0 confere a cada busca
+    SEARCH_INDEX_REFRESH_SECONDS: int = 5
+
     # Debug
     DEBUG: bool = False
     
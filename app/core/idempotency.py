@@ -0,0 +1,411 @@
+"""
+Idempotency-Key para as rotas que criam pedidos e pagamentos.
+
+Um cliente que não recebeu a resposta (timeout, conexão caída) pode repetir
+POST /orders, POST /stock/checkout e POST /payments com o mesmo cabeçalho
+`Idempotency-Key`: a repetição devolve a resposta guardada, com o cabeçalho
+`Idempotent-Replayed: true`, sem rodar a transação de novo.
+
+    1. A dependência `Idempotency(scope)` reserva a chave inserindo uma
+       linha em `idempotency_keys` (índice único por usuário, escopo e
+       chave), com o SHA-256 do corpo da requisição;
+    2. antes do seu commit, a rota chama `idempotency.save(resposta, status)`,
+       que grava o status e o corpo (JSON compacto) na linha: pedido e
+       resposta guardada são confirmados na mesma transação, então não
+       existe pedido criado com a chave ainda "em andamento";
+    3. se a rota falha (ou a requisição é inválida), a reserva é apagada e
+       a chave pode ser usada de novo.
+
+A mesma chave com outro corpo é rejeitada (422) e, enquanto a primeira
+requisição roda, as repetições recebem 409. Respostas concluídas ficam
+também em um LRU em memória (IDEMPOTENCY_CACHE_MAX_SIZE por worker), então
+uma repetição normalmente nem consulta a tabela. Chaves vencidas
+(IDEMPOTENCY_KEY_TTL_SECONDS) são removidas pela tarefa periódica.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.database import SessionLocal
+from app.dependencies import get_current_user, get_db
+from app.models.idempotency_key import IdempotencyKey
+from app.models.user import User
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+SWEEP_BATCH_SIZE = 1000
+
+# (user_id, escopo, chave) -> (fingerprint, status_code, corpo)
+_responses = TTLCache(
+    maxsize=settings.IDEMPOTENCY_CACHE_MAX_SIZE,
+    ttl=settings.IDEMPOTENCY_KEY_TTL_SECONDS,
+)
+_last_report: Optional[dict] = None
+
+
+class IdempotentReplay(Exception):
+    """Resposta já guardada para a chave; vira a resposta da requisição."""
+
+    def __init__(self, status_code: int, body: Any):
+        self.status_code = status_code
+        self.body = body
+
+
+async def idempotent_replay_handler(request: Request, exc: IdempotentReplay):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content=exc.body,
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+def request_fingerprint(body: bytes) -> str:
+    """SHA-256 do corpo; JSON é normalizado (ordem das chaves e espaços não contam)."""
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":")).encode()
+    except ValueError:
+        pass
+    return hashlib.sha256(body).hexdigest()
+
+
+# ============================================================================
+# RESERVA E RESPOSTA DAS CHAVES
+# ============================================================================
+
+def _check_stored(fingerprint: str, stored: Tuple[str, int, Any]) -> None:
+    """Repetir a resposta guardada, se o corpo da requisição for o mesmo."""
+    stored_fingerprint, status_code, body = stored
+    if stored_fingerprint != fingerprint:
+        raise _reused_key()
+    raise IdempotentReplay(status_code, body)
+
+
+def _reused_key() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail=f"{HEADER} já foi usada com outra requisição",
+    )
+
+
+def claim_key(db: Session, user_id: int, scope: str, key: str, fingerprint: str) -> int:
+    """
+    Reservar a chave para esta requisição.
+
+    Args:
+        db: Sessão do banco de dados
+        user_id: ID do usuário
+        scope: Escopo da rota (ex.: "orders.create")
+        key: Valor do cabeçalho Idempotency-Key
+        fingerprint: Hash do corpo da requisição
+
+    Returns:
+        int: ID da linha reservada
+
+    Raises:
+        IdempotentReplay: Se a chave já tem resposta guardada
+        HTTPException: Se a chave foi usada com outro corpo (422) ou se a
+            primeira requisição ainda está em andamento (409)
+    """
+    cached = _responses.get((user_id, scope, key))
+    if cached is not None:
+        _check_stored(fingerprint, cached)
+
+    for _ in range(3):
+        now = datetime.utcnow()
+        try:
+            key_id = db.execute(
+                insert(IdempotencyKey).values(
+                    user_id=user_id,
+                    scope=scope,
+                    key=key,
+                    fingerprint=fingerprint,
+                    created_at=now,
+                    expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+                )
+            ).inserted_primary_key[0]
+            db.commit()
+            return key_id
+        except IntegrityError:
+            db.rollback()
+
+        row = db.execute(
+            select(
+                IdempotencyKey.id,
+                IdempotencyKey.fingerprint,
+                IdempotencyKey.status_code,
+                IdempotencyKey.response_body,
+                IdempotencyKey.expires_at,
+            ).where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.scope == scope,
+                IdempotencyKey.key == key,
+            )
+        ).first()
+        if row is None:
+            continue  # apagada entre o INSERT e o SELECT
+
+        if row.expires_at <= now:
+            # Vencida (resposta antiga ou reserva de uma requisição que caiu):
+            # vale como chave nova
+            db.execute(
+                delete(IdempotencyKey)
+                .where(IdempotencyKey.id == row.id, IdempotencyKey.expires_at <= now)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            continue
+
+        if row.fingerprint != fingerprint:
+            raise _reused_key()
+        if row.status_code is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Uma requisição com esta {HEADER} ainda está em andamento",
+                headers={"Retry-After": "1"},
+            )
+
+        stored = (row.fingerprint, row.status_code, json.loads(row.response_body))
+        _remember(user_id, scope, key, stored, row.expires_at)
+        _check_stored(fingerprint, stored)
+
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Não foi possível reservar a {HEADER}; tente novamente",
+    )
+
+
+def _remember(user_id: int, scope: str, key: str, stored: tuple, expires_at: datetime) -> None:
+    ttl = (expires_at - datetime.utcnow()).total_seconds()
+    if ttl > 0:
+        _responses.set((user_id, scope, key), stored, ttl=ttl)
+
+
+class IdempotencyRecord:
+    """Chave reservada para a requisição atual (inativa sem o cabeçalho)."""
+
+    def __init__(
+        self,
+        db: Session,
+        user_id: Optional[int] = None,
+        scope: Optional[str] = None,
+        key: Optional[str] = None,
+        fingerprint: Optional[str] = None,
+        key_id: Optional[int] = None,
+    ):
+        self.db = db
+        self.user_id = user_id
+        self.scope = scope
+        self.key = key
+        self.fingerprint = fingerprint
+        self.key_id = key_id
+        self.saved = False
+        self._stored: Optional[tuple] = None
+
+    @property
+    def active(self) -> bool:
+        return self.key_id is not None
+
+    def save(self, response: Any, status_code: int) -> None:
+        """
+        Gravar a resposta da rota na linha da chave. Não faz commit.
+
+        Chamar antes do commit da rota, na mesma transação, com o mesmo
+        objeto que ela devolve (modelo Pydantic ou dados já serializáveis).
+
+        Args:
+            response: Resposta da rota
+            status_code: Status HTTP da resposta
+
+        Raises:
+            HTTPException: Se a reserva da chave venceu e foi tomada por
+                outra requisição (409; a rota deve desfazer a transação)
+        """
+        if not self.active:
+            return
+        body = jsonable_encoder(response)
+        expires_at = datetime.utcnow() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+        result = self.db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == self.key_id, IdempotencyKey.status_code.is_(None))
+            .values(
+                status_code=status_code,
+                response_body=json.dumps(body, separators=(",", ":")),
+                expires_at=expires_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"A reserva da {HEADER} expirou durante a requisição; tente novamente",
+            )
+        self.saved = True
+        self._stored = ((self.fingerprint, status_code, body), expires_at)
+
+    def remember(self) -> None:
+        """Colocar a resposta já confirmada no LRU do worker."""
+        if self._stored is not None:
+            stored, expires_at = self._stored
+            _remember(self.user_id, self.scope, self.key, stored, expires_at)
+
+    def release(self) -> None:
+        """Apagar a reserva de uma requisição que não terminou."""
+        self.db.rollback()
+        self.db.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.id == self.key_id, IdempotencyKey.status_code.is_(None))
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+
+
+class Idempotency:
+    """
+    Dependência que aplica o cabeçalho Idempotency-Key a uma rota.
+
+    Uso:
+        idempotency: IdempotencyRecord = Depends(Idempotency("orders.create"))
+        ...
+        db.flush()
+        response = OrderResponse.model_validate(order)
+        idempotency.save(response, status.HTTP_201_CREATED)
+        db.commit()
+    """
+
+    def __init__(self, scope: str):
+        self.scope = scope
+
+    async def __call__(
+        self,
+        request: Request,
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db),
+    ):
+        key = request.headers.get(HEADER)
+        if key is None:
+            yield IdempotencyRecord(db)
+            return
+
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{HEADER} deve ter entre 1 e {MAX_KEY_LENGTH} caracteres",
+            )
+
+        fingerprint = request_fingerprint(await request.body())
+        key_id = await run_in_threadpool(
+            claim_key, db, current_user.id, self.scope, key, fingerprint
+        )
+        record = IdempotencyRecord(db, current_user.id, self.scope, key, fingerprint, key_id)
+        try:
+            yield record
+        except Exception:
+            # Erro na rota: a transação (e a resposta gravada nela) é
+            # desfeita e a chave liberada
+            await self._release(record)
+            raise
+        if record.saved:
+            # A rota confirmou o pedido junto com a resposta
+            record.remember()
+        else:
+            # Sem resposta gravada (ex.: corpo inválido): liberar a chave
+            await self._release(record)
+
+    @staticmethod
+    async def _release(record: IdempotencyRecord) -> None:
+        try:
+            await run_in_threadpool(record.release)
+        except Exception as e:
+            logger.error("Falha ao liberar %s: %s", HEADER, e)
+
+
+# ============================================================================
+# EXPIRAÇÃO DAS CHAVES
+# ============================================================================
+
+def sweep_expired_keys(db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Remover as chaves vencidas, em lotes.
+
+    Args:
+        db: Sessão do banco de dados
+        now: Instante de referência (padrão: agora, em UTC)
+
+    Returns:
+        Dict[str, int]: Chaves removidas
+    """
+    now = now or datetime.utcnow()
+    report = {"expired": 0}
+    while True:
+        batch = (
+            select(IdempotencyKey.id)
+            .where(IdempotencyKey.expires_at <= now)
+            .limit(SWEEP_BATCH_SIZE)
+        )
+        removed = db.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.id.in_(batch.scalar_subquery()), IdempotencyKey.expires_at <= now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+
+        report["expired"] += removed
+        if removed < SWEEP_BATCH_SIZE:
+            return report
+
+
+def run_idempotency_sweep() -> Dict[str, int]:
+    """Executar uma passada com uma sessão própria e guardar o relatório."""
+    global _last_report
+    db = SessionLocal()
+    try:
+        report = sweep_expired_keys(db)
+    finally:
+        db.close()
+    if report["expired"]:
+        logger.info("Chaves de idempotência vencidas removidas: %s", report)
+    _last_report = report
+    return report
+
+
+def idempotency_stats() -> dict:
+    """Configuração, tamanho do LRU e relatório da última passada (GET /health/idempotency)."""
+    return {
+        "ttl_seconds": settings.IDEMPOTENCY_KEY_TTL_SECONDS,
+        "lock_seconds": settings.IDEMPOTENCY_LOCK_SECONDS,
+        "interval_seconds": settings.IDEMPOTENCY_SWEEP_INTERVAL_SECONDS,
+        "cached_responses": len(_responses),
+        "cache_max_size": settings.IDEMPOTENCY_CACHE_MAX_SIZE,
+        "last_run": _last_report,
+    }
+
+
+async def idempotency_sweeper_loop(interval: float) -> None:
+    """
+    Tarefa periódica iniciada no startup da aplicação.
+
+    Cada worker do uvicorn roda a sua; passadas concorrentes são seguras.
+    O LRU de cada worker expira as respostas sozinho (mesmo prazo).
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(run_idempotency_sweep)
+        except Exception as e:
+            logger.error("Falha ao remover chaves de idempotência vencidas: %s", e)
@@ -0,0 +1,54 @@
+"""
+Processamento de imagens (Pillow) fora do event loop.
+
+Decodificar, redimensionar com LANCZOS e recomprimir com `optimize=True`
+leva de dezenas a centenas de ms por imagem, todo em CPU. Rodando inline em
+uma rota `async def`, trava o event loop para todas as requisições do
+worker. Aqui o trabalho vai para um pool de processos dedicado
+(`app.core.process_pool`), com limite de tarefas pendentes: acima dele o
+upload falha com 503 em vez de formar uma fila sem fim.
+
+Métricas (GET /health/image-processor): profundidade da fila e tempos de
+espera e de processamento das imagens mais recentes.
+
+Configuração: IMAGE_PROCESS_WORKERS e IMAGE_PROCESS_MAX_PENDING.
+"""
+
+from app.core.config import settings
+from app.core.process_pool import BoundedProcessPool
+
+pool = BoundedProcessPool(
+    name="imagens",
+    workers=settings.IMAGE_PROCESS_WORKERS,
+    max_pending=settings.IMAGE_PROCESS_MAX_PENDING,
+    busy_detail="Servidor ocupado processando imagens. Tente novamente em instantes.",
+    retry_after=2,
+)
+
+
+async def process_image(func, *args):
+    """
+    Executar uma função de processamento de imagem no pool de processos.
+
+    Args:
+        func: Função de nível de módulo (precisa ser serializável com pickle)
+        *args: Argumentos da função (caminhos de arquivo, não imagens em memória)
+
+    Returns:
+        O retorno de `func`
+
+    Raises:
+        HTTPException: 503 se a fila de processamento estiver cheia ou se o
+            processo que tratava a imagem morreu
+    """
+    return await pool.run(func, *args)
+
+
+def image_processor_stats() -> dict:
+    """Métricas do pool de imagens (fila, contadores e tempos recentes, em ms)."""
+    return pool.stats()
+
+
+def shutdown_image_processor() -> None:
+    """Encerrar o pool de processos (chamado no shutdown da aplicação)."""
+    pool.shutdown()
@@ -0,0 +1,204 @@
+"""
+Contagem de referências das imagens enviadas.
+
+As imagens ficam em uploads/products com nome derivado do conteúdo
+(`content_digest`), então o mesmo arquivo pode ser usado por vários
+registros: produtos (`image_url`), solicitações (`reference_image_url`,
+`found_image_url`) e pagamentos (`receipt_url`). Os arquivos só são
+apagados quando a última referência desaparece.
+
+As referências são contadas no banco, dentro da transação que removeu uma
+delas (listener `after_flush`), em vez de mantidas em um contador que
+poderia se dessincronizar de UPDATEs feitos fora do ORM. As imagens que
+ficaram sem nenhuma referência são apagadas do disco depois do commit; em
+rollback, nada é apagado.
+
+Na hora de apagar, sob `image_store_lock`, as referências são contadas de
+novo (outra transação pode ter gravado uma depois do flush) e as imagens
+reservadas por um reaproveitamento ainda não confirmado
+(`reuse_stored_image`) ficam para o coletor de órfãos.
+"""
+
+import logging
+from itertools import chain
+from typing import Dict, Iterable, Set
+from sqlalchemy import event, inspect, or_, select
+from sqlalchemy.orm import Session
+from app.models.payment import Payment
+from app.models.product import Product
+from app.models.product_request import ProductRequest
+from app.utils.image_handler import (
+    UPLOAD_URL_PREFIX,
+    delete_stored_image,
+    image_is_leased,
+    image_store_lock,
+    release_image_lease,
+    stored_image_key,
+)
+
+logger = logging.getLogger(__name__)
+
+# Colunas que podem apontar para uma imagem enviada
+REFERENCE_COLUMNS = {
+    Product: ("image_url",),
+    ProductRequest: ("reference_image_url", "found_image_url"),
+    Payment: ("receipt_url",),
+}
+
+_ORPHANS = "orphan_image_keys"
+_ASSIGNED = "assigned_image_keys"
+
+
+def count_image_references(connection, keys: Iterable[str]) -> Dict[str, int]:
+    """
+    Contar quantos registros referenciam cada imagem.
+
+    Uma query por coluna para o lote inteiro: busca as URLs que começam com
+    o caminho de alguma das chaves e compara as chaves em Python.
+
+    Args:
+        connection: Session ou Connection (dentro da transação, vê as
+            alterações ainda não confirmadas)
+        keys: Chaves de `stored_image_key`
+
+    Returns:
+        Dict[str, int]: Chave -> número de referências (colunas) que a usam
+    """
+    counts = dict.fromkeys(keys, 0)
+    if not counts:
+        return counts
+    for model, columns in REFERENCE_COLUMNS.items():
+        for column in columns:
+            attribute = getattr(model, column)
+            patterns = [
+                attribute.like(f"{slash}{UPLOAD_URL_PREFIX}{key}%")
+                for key in counts
+                for slash in ("", "/")
+            ]
+            values = connection.execute(select(attribute).where(or_(*patterns))).scalars()
+            for key in map(stored_image_key, values):
+                if key in counts:
+                    counts[key] += 1
+    return counts
+
+
+def delete_unreferenced_images(bind, keys: Iterable[str]) -> int:
+    """
+    Apagar do disco as imagens que continuam sem referência.
+
+    Chamado depois do commit que removeu as referências. Ignora as imagens
+    reservadas por um reaproveitamento em andamento e reconta as referências
+    já confirmadas, tudo sob `image_store_lock`.
+
+    Args:
+        bind: Engine (ou Connection) da sessão que fez o commit
+        keys: Chaves que ficaram sem referência nessa transação
+
+    Returns:
+        int: Bytes liberados
+    """
+    with image_store_lock():
+        candidates = {key for key in keys if not image_is_leased(key)}
+        if not candidates:
+            return 0
+        with bind.engine.connect() as connection:
+            counts = count_image_references(connection, candidates)
+        orphans = [key for key, count in counts.items() if count == 0]
+        reclaimed = sum(delete_stored_image(key) for key in orphans)
+    if orphans:
+        logger.info("Imagens sem referência apagadas: %s (%s bytes)", len(orphans), reclaimed)
+    return reclaimed
+
+
+def referenced_image_keys(db) -> Set[str]:
+    """
+    Todas as imagens locais referenciadas por algum registro.
+
+    Lê só as colunas de URL, em lotes (yield_per), para montar o conjunto
+    usado pelo coletor de órfãos (`app.core.upload_gc`).
+    """
+    keys = set()
+    for model, columns in REFERENCE_COLUMNS.items():
+        for column in columns:
+            attribute = getattr(model, column)
+            rows = db.execute(
+                select(attribute)
+                .where(attribute.like(f"%{UPLOAD_URL_PREFIX}%"))
+                .execution_options(yield_per=1000)
+            ).scalars()
+            keys |= _image_keys(rows)
+    return keys
+
+
+def _image_keys(values) -> Set[str]:
+    return {key for key in map(stored_image_key, values) if key}
+
+
+def _old_and_new_keys(obj, deleted: bool):
+    """Imagens referenciadas pelo registro antes e depois do flush, e as atribuídas nele."""
+    state = inspect(obj)
+    old, new, assigned = [], [], []
+    for column in REFERENCE_COLUMNS[type(obj)]:
+        history = state.attrs[column].history
+        old.extend(history.deleted or history.unchanged)
+        if not deleted:
+            new.extend(history.added or history.unchanged)
+            assigned.extend(history.added)
+    return _image_keys(old), _image_keys(new), _image_keys(assigned)
+
+
+# ============================================================================
+# LISTENERS DA SESSÃO
+# ============================================================================
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    return value
+
+
+# Carregar o valor antigo ao atribuir um novo, mesmo se ele estava expirado,
+# para o histórico do atributo sempre mostrar a imagem que deixou de ser usada
+for _model, _columns in REFERENCE_COLUMNS.items():
+    for _column in _columns:
+        event.listen(getattr(_model, _column), "set", _load_previous_value, active_history=True)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_orphan_images(session, flush_context):
+    removed, added, assigned = set(), set(), set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if type(obj) not in REFERENCE_COLUMNS:
+            continue
+        old, new, new_assigned = _old_and_new_keys(obj, deleted=obj in session.deleted)
+        removed |= old - new
+        added |= new
+        assigned |= new_assigned
+
+    if assigned:
+        session.info.setdefault(_ASSIGNED, set()).update(assigned)
+    pending = session.info.setdefault(_ORPHANS, set())
+    # Uma imagem órfã em um flush anterior pode ter voltado a ser usada neste
+    pending -= added
+    if removed:
+        counts = count_image_references(session.connection(), removed)
+        pending |= {key for key, count in counts.items() if count == 0}
+
+
+@event.listens_for(Session, "after_commit")
+def _delete_orphan_images(session):
+    # A referência às imagens reaproveitadas já está gravada: liberar a reserva
+    for key in session.info.pop(_ASSIGNED, ()):
+        release_image_lease(key)
+
+    keys = session.info.pop(_ORPHANS, None)
+    if not keys:
+        return
+    try:
+        delete_unreferenced_images(session.get_bind(), keys)
+    except Exception as e:
+        logger.error("Falha ao apagar imagens sem referência %s: %s", sorted(keys), e)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_orphan_images(session):
+    session.info.pop(_ORPHANS, None)
+    session.info.pop(_ASSIGNED, None)
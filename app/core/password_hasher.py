@@ -0,0 +1,65 @@
+"""
+Hash e verificação de senhas fora do event loop.
+
+bcrypt é propositalmente lento (centenas de ms por chamada). Rodando direto
+em uma rota `async def` ele trava o event loop inteiro; em uma rota `def`
+ocupa uma das poucas threads do threadpool do Starlette. Aqui o trabalho vai
+para um pool de processos dedicado (`app.core.process_pool`, sem disputa
+pelo GIL), com limite de tarefas pendentes: acima dele a requisição falha
+com 503 em vez de formar uma fila sem fim.
+
+As rotas de autenticação são `async def` (com AsyncSession) e aguardam as
+versões `*_async`: enquanto o bcrypt roda, a requisição não ocupa nem o
+event loop nem uma thread do threadpool.
+
+Configuração: PASSWORD_HASH_WORKERS e PASSWORD_HASH_MAX_PENDING.
+"""
+
+from app.core.config import settings
+from app.core.process_pool import BoundedProcessPool
+from app.core.security import hash_password, verify_password
+
+pool = BoundedProcessPool(
+    name="senhas",
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    busy_detail="Servidor ocupado. Tente novamente em instantes.",
+    retry_after=1,
+)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Versão assíncrona de `hash_password`, executada no pool de processos.
+
+    Args:
+        password: Senha em texto plano
+
+    Returns:
+        Senha hasheada
+    """
+    return await pool.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Versão assíncrona de `verify_password`, executada no pool de processos.
+
+    Args:
+        plain_password: Senha em texto plano
+        hashed_password: Senha hasheada
+
+    Returns:
+        True se a senha está correta, False caso contrário
+    """
+    return await pool.run(verify_password, plain_password, hashed_password)
+
+
+def password_hasher_stats() -> dict:
+    """Métricas do pool de hash de senha (fila, contadores e tempos recentes, em ms)."""
+    return pool.stats()
+
+
+def shutdown_password_hasher() -> None:
+    """Encerrar o pool de processos (chamado no shutdown da aplicação)."""
+    pool.shutdown()
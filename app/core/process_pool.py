@@ -0,0 +1,221 @@
+"""
+Pool de processos com fila limitada, compartilhado pelo hash de senhas
+(`app.core.password_hasher`) e pelo processamento de imagens
+(`app.core.image_processor`).
+
+    - os processos são criados no primeiro uso, com o contexto "spawn"
+      (evita fazer fork de um processo que já tem threads, como o uvicorn);
+    - acima de `max_pending` tarefas pendentes a requisição falha com 503
+      em vez de formar uma fila sem fim;
+    - se um processo do pool morre (ex.: OOM em uma imagem gigante), o
+      executor fica quebrado (`BrokenProcessPool`) para sempre: ele é
+      descartado e recriado no uso seguinte. Uma tarefa enviada a um pool
+      que já estava quebrado é reenviada uma vez ao novo pool; a tarefa que
+      estava rodando quando o processo morreu falha com 503 (pode ter sido
+      ela a causa, então não é repetida);
+    - métricas: fila, contadores e tempos de espera e de processamento das
+      tarefas mais recentes.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Optional
+from fastapi import HTTPException, status
+
+logger = logging.getLogger(__name__)
+
+# Janela das métricas de tempo (últimas N tarefas)
+TIMINGS_WINDOW = 256
+
+
+def _timed(func, *args):
+    """Executar `func` no worker e medir só o tempo de processamento."""
+    started = time.perf_counter()
+    result = func(*args)
+    return (time.perf_counter() - started) * 1000, result
+
+
+def _summary(samples) -> Optional[dict]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return {
+        "avg": round(sum(ordered) / len(ordered), 2),
+        "p50": round(ordered[len(ordered) // 2], 2),
+        "p95": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)], 2),
+        "max": round(ordered[-1], 2),
+    }
+
+
+class BoundedProcessPool:
+    """
+    ProcessPoolExecutor criado sob demanda, com limite de tarefas pendentes.
+
+    Args:
+        name: Nome usado nos logs
+        workers: Número de processos
+        max_pending: Tarefas pendentes (na fila ou rodando) aceitas
+        busy_detail: Mensagem do 503 quando a fila está cheia
+        retry_after: Valor do cabeçalho Retry-After do 503, em segundos
+    """
+
+    def __init__(self, name: str, workers: int, max_pending: int, busy_detail: str, retry_after: int = 1):
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self.busy_detail = busy_detail
+        self.retry_after = retry_after
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._counters = {"processed": 0, "failed": 0, "rejected": 0, "restarts": 0}
+        self._processing_ms: deque = deque(maxlen=TIMINGS_WINDOW)
+        self._wait_ms: deque = deque(maxlen=TIMINGS_WINDOW)
+
+    # ------------------------------------------------------------------
+    # Executor
+    # ------------------------------------------------------------------
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Criar o pool de processos na primeira utilização (ou depois de quebrado)."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        """Descartar um executor quebrado; o próximo uso cria outro."""
+        with self._executor_lock:
+            if self._executor is not executor:
+                return  # outra requisição já trocou o executor
+            self._executor = None
+        with self._stats_lock:
+            self._counters["restarts"] += 1
+        logger.error("Pool de processos '%s' quebrou (processo encerrado); recriando", self.name)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _unavailable(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=self.busy_detail,
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    @contextmanager
+    def _pending_slot(self):
+        """Ocupar uma vaga na fila do pool; sem vaga, falhar com 503."""
+        with self._stats_lock:
+            if self.pending >= self.max_pending:
+                self._counters["rejected"] += 1
+                logger.warning("Fila do pool '%s' cheia (%s pendentes)", self.name, self.pending)
+                raise self._unavailable()
+            self.pending += 1
+
+        try:
+            yield
+        finally:
+            with self._stats_lock:
+                self.pending -= 1
+
+    def _record(self, submitted: float, processing_ms: float) -> None:
+        total_ms = (time.perf_counter() - submitted) * 1000
+        with self._stats_lock:
+            self._counters["processed"] += 1
+            self._processing_ms.append(processing_ms)
+            self._wait_ms.append(max(total_ms - processing_ms, 0.0))
+
+    def _failed(self) -> None:
+        with self._stats_lock:
+            self._counters["failed"] += 1
+
+    # ------------------------------------------------------------------
+    # Execução
+    # ------------------------------------------------------------------
+
+    def _submit(self, func, *args):
+        """
+        Enviar a tarefa ao executor atual.
+
+        Um executor que já estava quebrado é descartado e a tarefa é
+        reenviada (uma vez) ao novo.
+
+        Returns:
+            (executor, future) da tarefa enviada
+        """
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                return executor, executor.submit(_timed, func, *args)
+            except BrokenProcessPool:
+                self._discard(executor)
+        self._failed()
+        raise self._unavailable()
+
+    async def run(self, func, *args):
+        """
+        Executar `func(*args)` no pool sem bloquear o event loop.
+
+        Args:
+            func: Função de nível de módulo (precisa ser serializável com pickle)
+            *args: Argumentos da função
+
+        Returns:
+            O retorno de `func`
+
+        Raises:
+            HTTPException: 503 se a fila está cheia ou se o processo morreu
+        """
+        with self._pending_slot():
+            submitted = time.perf_counter()
+            executor, future = self._submit(func, *args)
+            try:
+                processing_ms, result = await asyncio.wrap_future(future)
+            except BrokenProcessPool:
+                # O processo morreu com esta tarefa: não repetir
+                self._discard(executor)
+                self._failed()
+                raise self._unavailable()
+            except Exception:
+                self._failed()
+                raise
+            self._record(submitted, processing_ms)
+            return result
+
+    # ------------------------------------------------------------------
+    # Métricas e encerramento
+    # ------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        """Fila, contadores e tempos recentes (em ms)."""
+        with self._stats_lock:
+            processing = list(self._processing_ms)
+            wait = list(self._wait_ms)
+            counters = dict(self._counters)
+            pending = self.pending
+        return {
+            "workers": self.workers,
+            "pending": pending,
+            "max_pending": self.max_pending,
+            "started": self._executor is not None,
+            **counters,
+            "processing_ms": _summary(processing),
+            "wait_ms": _summary(wait),
+        }
+
+    def shutdown(self) -> None:
+        """Encerrar o pool de processos (chamado no shutdown da aplicação)."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,58 @@
+"""
+Tarefa periódica que expira as reservas de estoque dos carrinhos.
+
+Remove, a cada STOCK_RESERVATION_SWEEP_INTERVAL_SECONDS, as reservas cujo
+prazo (STOCK_RESERVATION_TTL_SECONDS) venceu e devolve as unidades ao
+estoque livre (`app.crud.reservations.sweep_expired_reservations`). Assim as
+requisições nunca precisam procurar reservas vencidas.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.crud.reservations import sweep_expired_reservations
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+_last_report: Optional[dict] = None
+
+
+def run_reservation_sweep() -> Dict[str, int]:
+    """Executar uma passada com uma sessão própria e guardar o relatório."""
+    global _last_report
+    db = SessionLocal()
+    try:
+        report = sweep_expired_reservations(db)
+    finally:
+        db.close()
+    if report["expired"]:
+        logger.info("Reservas de estoque vencidas removidas: %s", report)
+    _last_report = report
+    return report
+
+
+def reservation_sweeper_stats() -> dict:
+    """Configuração e relatório da última passada (GET /health/stock-reservations)."""
+    return {
+        "ttl_seconds": settings.STOCK_RESERVATION_TTL_SECONDS,
+        "interval_seconds": settings.STOCK_RESERVATION_SWEEP_INTERVAL_SECONDS,
+        "last_run": _last_report,
+    }
+
+
+async def reservation_sweeper_loop(interval: float) -> None:
+    """
+    Tarefa periódica iniciada no startup da aplicação.
+
+    Cada worker do uvicorn roda a sua; passadas concorrentes são seguras
+    (cada reserva só é removida, e devolvida, por quem a apagou).
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(run_reservation_sweep)
+        except Exception as e:
+            logger.error("Falha ao expirar reservas de estoque: %s", e)
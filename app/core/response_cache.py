@@ -0,0 +1,324 @@
+"""
+Cache de respostas dos endpoints públicos do catálogo.
+
+`GET /products`, `GET /products/{id}`, `GET /categories` e
+`GET /stock/products/{id}/available` guardam a resposta já serializada,
+indexada pelos parâmetros normalizados da requisição (`cache_key`). Cada
+entrada recebe tags (`products`, `product:<id>`, `category:<id>`,
+`categories`, `stock`) usadas na invalidação. `stock` marca as listagens
+filtradas por disponibilidade (`in_stock`), que mudam com as reservas dos
+carrinhos mesmo sem alteração nos produtos.
+
+A invalidação acontece no commit: listeners da `Session` coletam as tags
+de todo Product/Category inserido, alterado ou removido em um flush e as
+invalidam quando a transação é confirmada (em rollback, são descartadas).
+UPDATEs em massa, que não passam pelo flush (ex.: baixa de estoque), devem
+chamar `mark_changed`.
+
+Backends:
+    memory  LRU com TTL por processo (com vários workers, a invalidação é local)
+    redis   compartilhado entre workers; aceita qualquer cliente compatível
+            (get/set/delete/sadd/smembers/expire/scan_iter)
+"""
+
+import json
+import logging
+import threading
+from itertools import chain
+from typing import Any, Dict, Iterable, Optional, Set
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.models.category import Category
+from app.models.product import Product
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_PENDING_TAGS = "response_cache_tags"
+
+
+def cache_key(namespace: str, **params: Any) -> str:
+    """
+    Montar a chave de cache a partir dos parâmetros da requisição.
+
+    Parâmetros None são ignorados e a ordem não importa, então requisições
+    equivalentes (ex.: com e sem `sort_order=desc`, que é o padrão) caem na
+    mesma entrada, desde que os parâmetros já tenham sido normalizados.
+
+    Args:
+        namespace: Identificador do endpoint (ex.: "products.list")
+        **params: Parâmetros normalizados da requisição
+
+    Returns:
+        str: Chave no formato "<namespace>:<json ordenado>"
+    """
+    normalized = {key: value for key, value in params.items() if value is not None}
+    return f"{namespace}:{json.dumps(normalized, sort_keys=True, separators=(',', ':'), default=str)}"
+
+
+def product_tags(product_id: int) -> Set[str]:
+    """Tags afetadas por uma mudança no produto."""
+    return {"products", f"product:{product_id}"}
+
+
+def reservation_tags(product_id: int) -> Set[str]:
+    """Tags afetadas por uma mudança nas unidades reservadas do produto."""
+    return {"stock", f"product:{product_id}"}
+
+
+def category_tags(category_id: int) -> Set[str]:
+    """Tags afetadas por uma mudança na categoria (produtos exibem o nome dela)."""
+    return {"categories", "products", f"category:{category_id}"}
+
+
+class MemoryCacheBackend:
+    """Backend em memória: TTLCache para as entradas e um índice tag -> chaves."""
+
+    blocking = False
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._tags: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._entries.get(key)
+
+    def set(self, key: str, value: Any, tags: Iterable[str], ttl: float) -> None:
+        self._entries.set(key, value, ttl=ttl)
+        with self._lock:
+            for tag in tags:
+                keys = self._tags.setdefault(tag, set())
+                keys.add(key)
+                # Chaves descartadas pelo LRU/TTL continuam no índice; limpar
+                # de vez em quando para ele não crescer sem limite
+                if len(keys) > self.maxsize:
+                    keys.intersection_update(k for k in list(keys) if k in self._entries)
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            keys = set(chain.from_iterable(self._tags.pop(tag, ()) for tag in tags))
+        for key in keys:
+            self._entries.delete(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tags.clear()
+        self._entries.clear()
+
+    def size(self) -> Optional[int]:
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """
+    Backend Redis: cada entrada é uma string JSON com TTL e cada tag é um SET
+    com as chaves que a usam.
+
+    Args:
+        client: Cliente compatível com redis-py (decode_responses=True)
+        prefix: Prefixo de todas as chaves criadas pelo cache
+    """
+
+    blocking = True
+
+    def __init__(self, client, prefix: str = "response_cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, tags: Iterable[str], ttl: float) -> None:
+        ttl = int(ttl)
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            self.client.sadd(tag_key, key)
+            # A tag vive pelo menos tanto quanto a entrada mais nova
+            self.client.expire(tag_key, ttl)
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            keys = [self.prefix + key for key in self.client.smembers(tag_key)]
+            self.client.delete(*keys, tag_key)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class ResponseCache:
+    """
+    Fachada do cache de respostas: contadores de acerto/falha e tolerância
+    a falhas do backend (um erro no cache vira um miss, nunca um 500).
+
+    Args:
+        backend: MemoryCacheBackend, RedisCacheBackend ou compatível
+        ttl: Tempo de vida das entradas, em segundos (0 desativa o cache)
+    """
+
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.generation = 0
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Obter uma resposta do cache (None em caso de miss)."""
+        if not self.enabled:
+            return None
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning("Falha ao ler o cache de respostas: %s", e)
+            value = None
+        self._count(key, "hits" if value is not None else "misses")
+        return value
+
+    def set(self, key: str, value: Any, tags: Iterable[str], generation: Optional[int] = None) -> None:
+        """
+        Guardar uma resposta serializável em JSON.
+
+        Args:
+            key: Chave gerada por `cache_key`
+            value: Resposta já serializada (jsonable_encoder)
+            tags: Tags usadas na invalidação
+            generation: Valor de `generation` lido antes de consultar o banco.
+                Se houve invalidação desde então, a resposta pode estar
+                desatualizada e não é guardada.
+        """
+        if not self.enabled:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        try:
+            self.backend.set(key, value, set(tags), self.ttl)
+        except Exception as e:
+            logger.warning("Falha ao gravar no cache de respostas: %s", e)
+
+    def invalidate(self, *tags: str) -> None:
+        """Remover todas as entradas marcadas com alguma das tags."""
+        if not tags:
+            return
+        with self._lock:
+            self.generation += 1
+        try:
+            self.backend.invalidate(tags)
+        except Exception as e:
+            logger.error("Falha ao invalidar o cache de respostas %s: %s", sorted(tags), e)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """Versão de `get` para rotas async (backends com rede rodam no threadpool)."""
+        if self.backend.blocking:
+            return await run_in_threadpool(self.get, key)
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any, tags: Iterable[str], generation: Optional[int] = None) -> None:
+        """Versão de `set` para rotas async."""
+        if self.backend.blocking:
+            await run_in_threadpool(self.set, key, value, tags, generation)
+        else:
+            self.set(key, value, tags, generation)
+
+    def clear(self) -> None:
+        """Remover todas as entradas e zerar os contadores."""
+        with self._lock:
+            self.generation += 1
+            self._stats.clear()
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        """Contadores de acerto/falha, no total e por endpoint."""
+        with self._lock:
+            by_namespace = {namespace: dict(counts) for namespace, counts in self._stats.items()}
+        hits = sum(counts["hits"] for counts in by_namespace.values())
+        misses = sum(counts["misses"] for counts in by_namespace.values())
+        return {
+            "backend": type(self.backend).__name__,
+            "enabled": self.enabled,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+            "entries": self.backend.size(),
+            "by_endpoint": by_namespace,
+        }
+
+    def _count(self, key: str, outcome: str) -> None:
+        namespace = key.split(":", 1)[0]
+        with self._lock:
+            counts = self._stats.setdefault(namespace, {"hits": 0, "misses": 0})
+            counts[outcome] += 1
+
+
+def get_response_cache() -> ResponseCache:
+    """Criar o cache com o backend configurado em RESPONSE_CACHE_BACKEND."""
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        import redis
+
+        client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+        backend = RedisCacheBackend(client)
+    else:
+        backend = MemoryCacheBackend(
+            maxsize=settings.RESPONSE_CACHE_MAX_SIZE,
+            ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+        )
+    return ResponseCache(backend, ttl=settings.RESPONSE_CACHE_TTL_SECONDS)
+
+
+# Instância global do cache de respostas
+response_cache = get_response_cache()
+
+
+# ============================================================================
+# INVALIDAÇÃO NO COMMIT
+# ============================================================================
+
+def mark_changed(db: Session, *tags: str) -> None:
+    """
+    Registrar tags a invalidar quando a transação da sessão for confirmada.
+
+    Use em alterações que não passam pelo flush do ORM (UPDATE em massa).
+    """
+    db.info.setdefault(_PENDING_TAGS, set()).update(tags)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_catalog_tags(session, flush_context):
+    tags = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Product) and obj.id is not None:
+            tags |= product_tags(obj.id)
+        elif isinstance(obj, Category) and obj.id is not None:
+            tags |= category_tags(obj.id)
+    if tags:
+        mark_changed(session, *tags)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_tags(session):
+    tags = session.info.pop(_PENDING_TAGS, None)
+    if tags:
+        response_cache.invalidate(*tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_tags(session):
+    session.info.pop(_PENDING_TAGS, None)
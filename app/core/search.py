@@ -0,0 +1,305 @@
+"""
+Busca textual de produtos.
+
+Substitui o `ILIKE '%termo%'` da listagem (que não usa índice e varre a
+tabela inteira) por um índice invertido: token → IDs dos produtos. Os dois
+backends recebem os filtros da listagem (categoria, preço, estoque) e os
+aplicam antes de cortar em MAX_SEARCH_RESULTS, devolvendo os IDs que passam
+nos filtros ordenados por relevância:
+
+- "memory": índice em memória, construído no startup a partir da tabela de
+  produtos e atualizado incrementalmente pelos routers de produtos. Cada
+  worker mantém seu próprio índice; para ver as alterações feitas por outros
+  workers (ou fora da API), a busca confere a tabela a cada
+  SEARCH_INDEX_REFRESH_SECONDS e reindexa os produtos com `updated_at` mais
+  novo (ou reconstrói tudo, se algum produto foi removido).
+- "postgres": usa `tsvector` com índice GIN direto no banco
+  (migrations/add_product_search_index.sql). Não guarda estado em memória;
+  recomendado com vários workers.
+
+O backend é escolhido por `settings.SEARCH_BACKEND`. As buscas fazem I/O e
+contas em CPU síncronos: nas rotas `async def`, chame-as via
+`run_in_threadpool`.
+"""
+
+import bisect
+import logging
+import re
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional, Sequence, Set
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.product import Product
+
+logger = logging.getLogger(__name__)
+
+# Máximo de IDs devolvidos por busca, já filtrados (evita IN (...) gigantes
+# para termos muito amplos)
+MAX_SEARCH_RESULTS = 1000
+
+# Peso de cada campo no ranking
+NAME_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+
+# Palavras muito comuns em português que não ajudam a busca
+STOPWORDS = {
+    "a", "o", "as", "os", "e", "de", "da", "do", "das", "dos", "em", "na", "no",
+    "nas", "nos", "um", "uma", "com", "para", "por", "que", "ou", "se", "ao",
+}
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def fold(value: str) -> str:
+    """Remover acentos e converter para minúsculas ("Calção" → "calcao")."""
+    decomposed = unicodedata.normalize("NFKD", value.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    """
+    Quebrar um texto em tokens normalizados, sem stopwords.
+
+    Args:
+        value: Texto livre (nome, descrição ou termo de busca)
+
+    Returns:
+        List[str]: Tokens sem acento e em minúsculas
+    """
+    if not value:
+        return []
+    tokens = _TOKEN_RE.findall(fold(value))
+    return [token for token in tokens if token not in STOPWORDS] or tokens
+
+
+class InMemorySearchIndex:
+    """Índice invertido em memória com correspondência por prefixo."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_tokens: Dict[int, Set[str]] = {}
+        self._sorted_tokens: List[str] = []
+        self._watermark = None  # maior updated_at já indexado
+        self._checked_at = 0.0
+        self.ready = False
+
+    def build(self, db: Session) -> None:
+        """Reconstruir o índice a partir de todos os produtos do banco."""
+        rows = db.query(Product.id, Product.name, Product.description, Product.updated_at).all()
+        with self._lock:
+            self._postings = {}
+            self._doc_tokens = {}
+            for product_id, name, description, _ in rows:
+                self._add(product_id, name, description)
+            self._sorted_tokens = sorted(self._postings)
+            self._watermark = max((row.updated_at for row in rows if row.updated_at), default=None)
+            self._checked_at = time.monotonic()
+            self.ready = True
+        logger.info("Índice de busca construído com %s produtos", len(rows))
+
+    def refresh(self, db: Session) -> None:
+        """
+        Alinhar o índice com a tabela de produtos.
+
+        Reindexa os produtos alterados desde o último `updated_at` visto (por
+        este ou por outro worker) e reconstrói o índice se a contagem não
+        bate (produto removido fora deste processo).
+        """
+        with self._lock:
+            if not self.ready:
+                self.build(db)
+                return
+            count, latest = db.query(func.count(Product.id), func.max(Product.updated_at)).one()
+            if latest is not None and (self._watermark is None or latest > self._watermark):
+                changed = db.query(Product.id, Product.name, Product.description, Product.updated_at)
+                if self._watermark is not None:
+                    changed = changed.filter(Product.updated_at >= self._watermark)
+                for product_id, name, description, _ in changed:
+                    self._remove(product_id)
+                    self._add(product_id, name, description, keep_sorted=True)
+                self._watermark = latest
+            if count != len(self._doc_tokens):
+                self.build(db)
+            self._checked_at = time.monotonic()
+
+    def reset(self) -> None:
+        """Descartar o índice; ele será reconstruído na próxima busca."""
+        with self._lock:
+            self._postings = {}
+            self._doc_tokens = {}
+            self._sorted_tokens = []
+            self._watermark = None
+            self.ready = False
+
+    def index_product(self, product: Product) -> None:
+        """Adicionar ou atualizar um produto no índice."""
+        with self._lock:
+            if not self.ready:
+                return
+            self._remove(product.id)
+            self._add(product.id, product.name, product.description, keep_sorted=True)
+
+    def remove_product(self, product_id: int) -> None:
+        """Remover um produto do índice."""
+        with self._lock:
+            if self.ready:
+                self._remove(product_id)
+
+    def search(self, db: Session, query: str, conditions: Sequence = (), limit: int = MAX_SEARCH_RESULTS) -> List[int]:
+        """
+        Buscar produtos cujo nome/descrição contenham todos os termos (por prefixo).
+
+        Args:
+            db: Sessão do banco (construção/atualização do índice e filtros)
+            query: Termo de busca
+            conditions: Filtros SQL sobre Product, aplicados antes do corte em `limit`
+            limit: Máximo de IDs retornados
+
+        Returns:
+            List[int]: IDs dos produtos, do mais relevante para o menos relevante
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            if not self.ready:
+                self.build(db)
+            elif time.monotonic() - self._checked_at >= settings.SEARCH_INDEX_REFRESH_SECONDS:
+                self.refresh(db)
+
+            scores: Optional[Dict[int, int]] = None
+            for term in terms:
+                term_scores = self._match_prefix(term)
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {
+                        product_id: score + term_scores[product_id]
+                        for product_id, score in scores.items()
+                        if product_id in term_scores
+                    }
+                if not scores:
+                    return []
+
+        ranked = [
+            product_id
+            for product_id, _ in sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        ]
+        if conditions:
+            ranked = self._filter(db, ranked, conditions)
+        return ranked[:limit]
+
+    @staticmethod
+    def _filter(db: Session, ranked: List[int], conditions: Sequence) -> List[int]:
+        """Manter, na ordem do ranking, só os IDs que passam nos filtros (uma query)."""
+        query = select(Product.id).where(*conditions)
+        if len(ranked) <= MAX_SEARCH_RESULTS:
+            query = query.where(Product.id.in_(ranked))
+        # Termos amplos: IDs de todos os produtos filtrados, sem um IN gigante
+        allowed = set(db.scalars(query))
+        return [product_id for product_id in ranked if product_id in allowed]
+
+    def _match_prefix(self, term: str) -> Dict[int, int]:
+        """Somar os pesos de todos os tokens que começam com `term`."""
+        scores: Dict[int, int] = {}
+        tokens = self._sorted_tokens
+        position = bisect.bisect_left(tokens, term)
+        while position < len(tokens) and tokens[position].startswith(term):
+            token = tokens[position]
+            position += 1
+            # Palavra exata vale mais que prefixo
+            bonus = 2 if token == term else 1
+            for product_id, weight in self._postings[token].items():
+                scores[product_id] = scores.get(product_id, 0) + weight * bonus
+        return scores
+
+    def _add(self, product_id: int, name: Optional[str], description: Optional[str], keep_sorted: bool = False) -> None:
+        weights: Dict[str, int] = {}
+        for token in tokenize(name):
+            weights[token] = weights.get(token, 0) + NAME_WEIGHT
+        for token in tokenize(description):
+            weights[token] = weights.get(token, 0) + DESCRIPTION_WEIGHT
+
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                if keep_sorted:
+                    bisect.insort(self._sorted_tokens, token)
+            postings[product_id] = weight
+        self._doc_tokens[product_id] = set(weights)
+
+    def _remove(self, product_id: int) -> None:
+        for token in self._doc_tokens.pop(product_id, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[token]
+                position = bisect.bisect_left(self._sorted_tokens, token)
+                if position < len(self._sorted_tokens) and self._sorted_tokens[position] == token:
+                    del self._sorted_tokens[position]
+
+
+class PostgresSearchIndex:
+    """Busca via `tsvector`/GIN no PostgreSQL. O índice é mantido pelo próprio banco."""
+
+    # Mesma expressão do índice GIN em migrations/add_product_search_index.sql
+    VECTOR_SQL = (
+        "setweight(to_tsvector('portuguese', immutable_unaccent(coalesce(name, ''))), 'A') || "
+        "setweight(to_tsvector('portuguese', immutable_unaccent(coalesce(description, ''))), 'B')"
+    )
+
+    ready = True
+
+    def build(self, db: Session) -> None:
+        pass
+
+    def refresh(self, db: Session) -> None:
+        pass
+
+    def reset(self) -> None:
+        pass
+
+    def index_product(self, product: Product) -> None:
+        pass
+
+    def remove_product(self, product_id: int) -> None:
+        pass
+
+    def search(self, db: Session, query: str, conditions: Sequence = (), limit: int = MAX_SEARCH_RESULTS) -> List[int]:
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        # Os tokens só têm caracteres \w, então não há sintaxe de tsquery para escapar
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        # Os filtros entram no WHERE, antes do LIMIT
+        statement = (
+            select(Product.id)
+            .where(text(f"({self.VECTOR_SQL}) @@ to_tsquery('portuguese', :tsquery)"), *conditions)
+            .order_by(
+                text(f"ts_rank({self.VECTOR_SQL}, to_tsquery('portuguese', :tsquery)) DESC"),
+                Product.id.desc(),
+            )
+            .limit(limit)
+        )
+        return list(db.scalars(statement, {"tsquery": tsquery}))
+
+
+def get_search_index():
+    """Criar o backend de busca configurado em SEARCH_BACKEND."""
+    if settings.SEARCH_BACKEND == "postgres":
+        return PostgresSearchIndex()
+    return InMemorySearchIndex()
+
+
+# Instância global do índice de busca
+search_index = get_search_index()
+
@@ -0,0 +1,234 @@
+"""
+Coletor de uploads órfãos.
+
+Arquivos em uploads/products que nenhum registro referencia (produto
+deletado por UPDATE em massa, transação que falhou depois do upload,
+uploads abandonados, temporários de escritas interrompidas...) são
+removidos em duas etapas:
+
+    1. quarentena: arquivos sem referência e mais antigos que
+       UPLOAD_GC_GRACE_SECONDS são movidos para QUARANTINE_DIR
+       (fora de /uploads, então deixam de ser servidos);
+    2. remoção: arquivos em quarentena há mais de
+       UPLOAD_GC_QUARANTINE_SECONDS são apagados, a não ser que tenham
+       voltado a ser referenciados; nesse caso voltam para o lugar.
+
+O diretório é lido com `os.scandir`, em lotes. As referências vêm de um
+retrato das colunas de URL (`referenced_image_keys`) e são confirmadas no
+banco, lote a lote (uma query por coluna), antes de mover qualquer arquivo.
+A confirmação e a movimentação de cada lote rodam sob `image_store_lock`,
+o mesmo lock do reaproveitamento de imagens no upload: uma imagem entregue
+a um upload em andamento fica com o mtime no futuro (reserva) e, depois do
+commit, com o mtime do commit, então conta como recente e não é movida.
+
+Uso:
+    python run_upload_gc.py [--dry-run]        (linha de comando)
+    UPLOAD_GC_INTERVAL_SECONDS > 0             (tarefa periódica da aplicação)
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.image_storage import count_image_references, referenced_image_keys
+from app.database import SessionLocal
+from app.utils import image_handler
+from app.utils.image_handler import image_store_lock, stored_image_key
+
+logger = logging.getLogger(__name__)
+
+QUARANTINE_DIR = Path("uploads_quarantine/products")
+BATCH_SIZE = 500
+
+_last_report: Optional[dict] = None
+
+
+def _scan_batches(directory: Path, batch_size: int) -> Iterator[List[os.DirEntry]]:
+    """Percorrer os arquivos do diretório em lotes, sem listar tudo de uma vez."""
+    if not directory.is_dir():
+        return
+    batch = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            batch.append(entry)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _key(name: str) -> str:
+    return stored_image_key(f"{image_handler.UPLOAD_URL_PREFIX}{name}") or name
+
+
+def _confirmed_orphans(db, keys) -> set:
+    """Das chaves candidatas, as que continuam sem referência no banco (uma query por coluna)."""
+    if not keys:
+        return set()
+    counts = count_image_references(db, keys)
+    return {key for key, count in counts.items() if count == 0}
+
+
+def _move(source: Path, destination_dir: Path) -> Path:
+    destination_dir.mkdir(parents=True, exist_ok=True)
+    destination = destination_dir / source.name
+    shutil.move(str(source), str(destination))
+    return destination
+
+
+def collect_orphan_uploads(
+    db,
+    grace_seconds: Optional[int] = None,
+    quarantine_seconds: Optional[int] = None,
+    dry_run: bool = False,
+    batch_size: int = BATCH_SIZE,
+) -> Dict[str, int]:
+    """
+    Executar uma passada do coletor.
+
+    Args:
+        db: Sessão do banco de dados
+        grace_seconds: Idade mínima de um arquivo sem referência para ir para
+            a quarentena (padrão: UPLOAD_GC_GRACE_SECONDS)
+        quarantine_seconds: Tempo em quarentena antes da remoção
+            (padrão: UPLOAD_GC_QUARANTINE_SECONDS)
+        dry_run: Só contar, sem mover nem apagar nada
+        batch_size: Arquivos por lote
+
+    Returns:
+        Dict[str, int]: Relatório da passada (arquivos analisados, movidos
+            para a quarentena, restaurados, apagados e bytes liberados)
+    """
+    if grace_seconds is None:
+        grace_seconds = settings.UPLOAD_GC_GRACE_SECONDS
+    if quarantine_seconds is None:
+        quarantine_seconds = settings.UPLOAD_GC_QUARANTINE_SECONDS
+
+    started = time.monotonic()
+    now = time.time()
+    report = {
+        "scanned": 0,
+        "referenced": 0,
+        "recent": 0,
+        "quarantined": 0,
+        "bytes_quarantined": 0,
+        "restored": 0,
+        "deleted": 0,
+        "bytes_reclaimed": 0,
+    }
+    referenced = referenced_image_keys(db)
+
+    # 1. Arquivos sem referência -> quarentena
+    for batch in _scan_batches(image_handler.UPLOAD_DIR, batch_size):
+        candidates = []
+        for entry in batch:
+            report["scanned"] += 1
+            key = _key(entry.name)
+            if key in referenced:
+                report["referenced"] += 1
+            elif entry.stat(follow_symlinks=False).st_mtime > now - grace_seconds:
+                report["recent"] += 1
+            else:
+                candidates.append((entry, key))
+
+        if not candidates:
+            continue
+        # Confirmar no banco (a referência pode ter surgido depois do retrato)
+        # e mover sem que um upload reaproveite a imagem no meio do caminho
+        with image_store_lock():
+            orphans = _confirmed_orphans(db, {key for _, key in candidates})
+            for entry, key in candidates:
+                if key not in orphans:
+                    report["referenced"] += 1
+                    continue
+                try:
+                    # stat de novo: reaproveitada (reserva) desde a leitura do lote?
+                    stat = os.stat(entry.path, follow_symlinks=False)
+                    if stat.st_mtime > now - grace_seconds:
+                        report["recent"] += 1
+                        continue
+                    if not dry_run:
+                        moved = _move(Path(entry.path), QUARANTINE_DIR)
+                        # mtime marca a entrada na quarentena
+                        os.utime(moved)
+                except FileNotFoundError:
+                    continue  # apagado por outra passada ou pelo commit de uma alteração
+                report["quarantined"] += 1
+                report["bytes_quarantined"] += stat.st_size
+
+    # 2. Quarentena vencida -> remoção (ou de volta, se voltou a ser usada)
+    for batch in _scan_batches(QUARANTINE_DIR, batch_size):
+        expired = [
+            (entry, _key(entry.name))
+            for entry in batch
+            if entry.stat(follow_symlinks=False).st_mtime <= now - quarantine_seconds
+        ]
+        if not expired:
+            continue
+        with image_store_lock():
+            orphans = _confirmed_orphans(db, {key for _, key in expired})
+            for entry, key in expired:
+                try:
+                    if key not in orphans:
+                        if not dry_run:
+                            _move(Path(entry.path), image_handler.UPLOAD_DIR)
+                        report["restored"] += 1
+                        continue
+                    size = entry.stat(follow_symlinks=False).st_size
+                    if not dry_run:
+                        os.unlink(entry.path)
+                except FileNotFoundError:
+                    continue
+                report["deleted"] += 1
+                report["bytes_reclaimed"] += size
+
+    report["dry_run"] = dry_run
+    report["duration_ms"] = round((time.monotonic() - started) * 1000, 1)
+    logger.info("Coleta de uploads órfãos: %s", report)
+    return report
+
+
+def run_upload_gc(**kwargs) -> Dict[str, int]:
+    """Executar o coletor com uma sessão própria e guardar o relatório."""
+    global _last_report
+    db = SessionLocal()
+    try:
+        report = collect_orphan_uploads(db, **kwargs)
+    finally:
+        db.close()
+    if not kwargs.get("dry_run"):
+        _last_report = report
+    return report
+
+
+def upload_gc_stats() -> dict:
+    """Configuração e relatório da última passada (GET /health/upload-gc)."""
+    return {
+        "interval_seconds": settings.UPLOAD_GC_INTERVAL_SECONDS,
+        "grace_seconds": settings.UPLOAD_GC_GRACE_SECONDS,
+        "quarantine_seconds": settings.UPLOAD_GC_QUARANTINE_SECONDS,
+        "last_run": _last_report,
+    }
+
+
+async def upload_gc_loop(interval: float) -> None:
+    """
+    Tarefa periódica iniciada no startup da aplicação.
+
+    Cada worker do uvicorn roda a sua; passadas concorrentes são seguras
+    (arquivos já movidos ou apagados são ignorados).
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(run_upload_gc)
+        except Exception as e:
+            logger.error("Falha na coleta de uploads órfãos: %s", e)
@@ -0,0 +1,87 @@
+"""
+Cache do usuário autenticado.
+
+`get_current_user` roda em toda requisição autenticada. Para não buscar o
+usuário no banco a cada chamada, guardamos por alguns segundos uma cópia
+das colunas do usuário, indexada pelo `sub` do token (o email).
+
+O cache guarda apenas valores (nunca o objeto ORM, que pertence a uma
+sessão). Em um acerto, a cópia é anexada à sessão da requisição com
+`merge(load=False)`, sem SELECT, então as rotas podem alterar e salvar o
+usuário normalmente.
+
+Toda rota que altera o usuário (ativação, exclusão, perfil, senha) deve
+chamar `invalidate_user`. Com vários workers, a invalidação é local: os
+outros workers enxergam a mudança em até USER_CACHE_TTL_SECONDS.
+"""
+
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+from app.core.config import settings
+from app.models.user import User
+from app.utils.cache import TTLCache
+
+_COLUMNS = [column.key for column in User.__table__.columns]
+
+user_cache = TTLCache(
+    maxsize=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+)
+
+
+def get_cached_user(email: str, db: Session) -> Optional[User]:
+    """
+    Obter o usuário do cache, já anexado à sessão informada.
+
+    Args:
+        email: Email do usuário (sub do token)
+        db: Sessão do banco de dados da requisição
+
+    Returns:
+        Optional[User]: Usuário, ou None se não está no cache
+    """
+    user = _detached_user(email)
+    if user is None:
+        return None
+    return db.merge(user, load=False)
+
+
+async def get_cached_user_async(email: str, db: AsyncSession) -> Optional[User]:
+    """
+    Versão de `get_cached_user` para sessões assíncronas.
+
+    Args:
+        email: Email do usuário (sub do token)
+        db: Sessão assíncrona da requisição
+
+    Returns:
+        Optional[User]: Usuário, ou None se não está no cache
+    """
+    user = _detached_user(email)
+    if user is None:
+        return None
+    return await db.merge(user, load=False)
+
+
+def _detached_user(email: str) -> Optional[User]:
+    """Montar um User desanexado a partir das colunas em cache."""
+    values = user_cache.get(email)
+    if values is None:
+        return None
+
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+def cache_user(user: User) -> None:
+    """Guardar uma cópia das colunas do usuário no cache."""
+    user_cache.set(user.email, {key: getattr(user, key) for key in _COLUMNS})
+
+
+def invalidate_user(*emails: Optional[str]) -> None:
+    """Remover do cache os usuários com os emails informados."""
+    for email in emails:
+        if email:
+            user_cache.delete(email)
@@ -1,3 +1,33 @@
 """
 CRUD - Operações no banco de dados (Create, Read, Update, Delete)
-"""
\ No newline at end of file
+"""
+
+from app.crud.cart_items import add_cart_item
+from app.crud.inventory import (
+    InsufficientStockError,
+    load_products_by_id,
+    load_stock_levels,
+    reserve_stock,
+    release_stock,
+)
+from app.crud.reservations import (
+    held_quantities,
+    hold_stock,
+    hold_stock_many,
+    release_reservations,
+    sweep_expired_reservations,
+)
+
+__all__ = [
+    "add_cart_item",
+    "InsufficientStockError",
+    "load_products_by_id",
+    "load_stock_levels",
+    "reserve_stock",
+    "release_stock",
+    "held_quantities",
+    "hold_stock",
+    "hold_stock_many",
+    "release_reservations",
+    "sweep_expired_reservations",
+]
@@ -0,0 +1,139 @@
+# app/crud/cart_items.py
+
+"""
+Escrita dos itens do carrinho.
+
+Adicionar um produto ao carrinho é um único INSERT ... ON CONFLICT DO UPDATE
+sobre o índice único (cart_id, product_id): se o item já existe, a
+quantidade é somada no próprio banco. Dois "adicionar" simultâneos do mesmo
+produto não criam linhas duplicadas nem perdem uma das somas, e os limites
+(1000 unidades por item, 100 produtos por carrinho) são conferidos no mesmo
+statement.
+
+Postgres e SQLite (3.35+, por causa do RETURNING) usam o upsert nativo;
+outros bancos usam SELECT ... FOR UPDATE seguido de UPDATE ou INSERT.
+"""
+
+import sqlite3
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy import func, literal, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.cart import CartItem
+
+MAX_ITEM_QUANTITY = 1000
+MAX_DISTINCT_ITEMS = 100
+
+_UPSERT_INSERTS = {"postgresql": postgresql.insert}
+if sqlite3.sqlite_version_info >= (3, 35):
+    _UPSERT_INSERTS["sqlite"] = sqlite.insert
+
+
+def dialect_upsert(db: Session):
+    """
+    `insert` do dialeto da sessão, com suporte a ON CONFLICT.
+
+    Args:
+        db: Sessão do banco de dados
+
+    Returns:
+        A função `insert` do dialeto (Postgres ou SQLite 3.35+), ou None se
+        o banco não tem upsert nativo
+    """
+    return _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+
+
+def add_cart_item(
+    db: Session,
+    cart_id: int,
+    product_id: int,
+    quantity: int,
+    price: float,
+) -> Optional[Tuple[int, int]]:
+    """
+    Somar `quantity` ao item do produto no carrinho, criando-o se preciso.
+
+    Não faz commit.
+
+    Args:
+        db: Sessão do banco de dados
+        cart_id: ID do carrinho
+        product_id: ID do produto
+        quantity: Quantidade a somar
+        price: Preço gravado se o item for criado
+
+    Returns:
+        Optional[Tuple[int, int]]: (ID do item, nova quantidade), ou None se
+            a soma passaria de MAX_ITEM_QUANTITY ou se o produto é novo e o
+            carrinho já tem MAX_DISTINCT_ITEMS produtos (nada é alterado)
+    """
+    dialect_insert = dialect_upsert(db)
+    if dialect_insert is None:
+        return _add_cart_item_fallback(db, cart_id, product_id, quantity, price)
+
+    now = datetime.utcnow()
+    in_cart = (
+        select(CartItem.id)
+        .where(CartItem.cart_id == cart_id, CartItem.product_id == product_id)
+        .exists()
+    )
+    distinct_items = (
+        select(func.count())
+        .select_from(CartItem)
+        .where(CartItem.cart_id == cart_id)
+        .scalar_subquery()
+    )
+    # INSERT ... SELECT: a linha só é proposta se o carrinho tem vaga ou se
+    # o produto já está nele (e então cai no ON CONFLICT)
+    source = select(
+        literal(cart_id),
+        literal(product_id),
+        literal(quantity),
+        literal(price),
+        literal(now),
+        literal(now),
+    ).where(or_(distinct_items < MAX_DISTINCT_ITEMS, in_cart))
+
+    statement = dialect_insert(CartItem).from_select(
+        ["cart_id", "product_id", "quantity", "price_at_time", "created_at", "updated_at"],
+        source,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[CartItem.cart_id, CartItem.product_id],
+        set_={
+            "quantity": CartItem.quantity + statement.excluded.quantity,
+            "updated_at": statement.excluded.updated_at,
+        },
+        where=CartItem.quantity + statement.excluded.quantity <= MAX_ITEM_QUANTITY,
+    ).returning(CartItem.id, CartItem.quantity)
+
+    row = db.execute(statement).first()
+    return tuple(row) if row else None
+
+
+def _add_cart_item_fallback(
+    db: Session,
+    cart_id: int,
+    product_id: int,
+    quantity: int,
+    price: float,
+) -> Optional[Tuple[int, int]]:
+    """Mesmo contrato de `add_cart_item` para bancos sem upsert."""
+    item = db.query(CartItem).filter(
+        CartItem.cart_id == cart_id,
+        CartItem.product_id == product_id,
+    ).with_for_update().first()
+
+    if item:
+        if item.quantity + quantity > MAX_ITEM_QUANTITY:
+            return None
+        item.quantity += quantity
+    else:
+        if db.query(CartItem).filter(CartItem.cart_id == cart_id).count() >= MAX_DISTINCT_ITEMS:
+            return None
+        item = CartItem(cart_id=cart_id, product_id=product_id, quantity=quantity, price_at_time=price)
+        db.add(item)
+
+    db.flush()
+    return item.id, item.quantity
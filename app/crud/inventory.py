@@ -0,0 +1,149 @@
+# app/crud/inventory.py
+
+"""
+Operações de estoque.
+
+A baixa de estoque é feita direto no banco com um UPDATE condicional
+(`stock = stock - q WHERE stock >= q`), em vez de ler o produto, subtrair
+em Python e salvar. Assim dois checkouts simultâneos nunca vendem a mesma
+unidade, sem precisar segurar locks de linha enquanto o código Python roda.
+"""
+
+from typing import Dict, Iterable
+from sqlalchemy import case, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+from app.core.response_cache import mark_changed, product_tags
+from app.models.product import Product
+
+
+class InsufficientStockError(Exception):
+    """Levantada quando um ou mais produtos não têm estoque para a baixa."""
+
+    def __init__(self, product_ids: Iterable[int]):
+        self.product_ids = sorted(product_ids)
+        super().__init__(f"Estoque insuficiente para os produtos: {self.product_ids}")
+
+
+def load_products_by_id(db: Session, product_ids: Iterable[int]) -> Dict[int, Product]:
+    """
+    Buscar vários produtos em uma única query e indexá-los por ID.
+
+    Args:
+        db: Sessão do banco de dados
+        product_ids: IDs dos produtos
+
+    Returns:
+        Dict[int, Product]: Produtos encontrados, indexados por ID
+    """
+    product_ids = list(product_ids)
+    if not product_ids:
+        return {}
+
+    products = db.query(Product).filter(Product.id.in_(product_ids)).all()
+    return {product.id: product for product in products}
+
+
+def load_stock_levels(db: Session, product_ids: Iterable[int]) -> Dict[int, Row]:
+    """
+    Buscar só os dados de estoque de vários produtos em uma única query.
+
+    Seleciona as colunas `(id, name, stock, is_active)` em vez de entidades
+    completas: nada vai para o identity map e não há colunas grandes
+    (descrição, variantes de imagem) para transferir e converter.
+
+    Args:
+        db: Sessão do banco de dados
+        product_ids: IDs dos produtos
+
+    Returns:
+        Dict[int, Row]: Linhas `(id, name, stock, is_active)` indexadas por ID
+    """
+    product_ids = list(product_ids)
+    if not product_ids:
+        return {}
+
+    rows = db.execute(
+        select(Product.id, Product.name, Product.stock, Product.is_active)
+        .where(Product.id.in_(product_ids))
+    )
+    return {row.id: row for row in rows}
+
+
+def reserve_stock(db: Session, quantities: Dict[int, int]) -> None:
+    """
+    Dar baixa no estoque de vários produtos em um único UPDATE atômico.
+
+    Executa `UPDATE products SET stock = stock - CASE id ... END
+    WHERE id IN (...) AND stock - reserved_stock >= CASE id ... END` e
+    confere o rowcount. Unidades reservadas por carrinhos não são vendidas:
+    o chamador libera antes as reservas do próprio comprador
+    (`app.crud.reservations.release_reservations`).
+    Se alguma linha não foi atualizada, nenhum estoque deve ser baixado:
+    o chamador precisa fazer rollback da transação.
+
+    Args:
+        db: Sessão do banco de dados
+        quantities: Quantidade a baixar, indexada por ID do produto
+
+    Raises:
+        InsufficientStockError: Se algum produto não tem estoque suficiente
+    """
+    if not quantities:
+        return
+
+    requested = case(quantities, value=Product.id)
+    result = db.execute(
+        update(Product)
+        .where(Product.id.in_(list(quantities)), Product.stock - Product.reserved_stock >= requested)
+        .values(stock=Product.stock - requested)
+        .execution_options(synchronize_session=False)
+    )
+
+    if result.rowcount != len(quantities):
+        # Descobrir quais produtos falharam para a mensagem de erro
+        rows = db.query(Product.id, Product.stock - Product.reserved_stock).filter(
+            Product.id.in_(list(quantities))
+        ).all()
+        stock_by_id = dict(rows)
+        failed = [
+            product_id for product_id, quantity in quantities.items()
+            if stock_by_id.get(product_id, 0) < quantity
+        ]
+        raise InsufficientStockError(failed or quantities.keys())
+
+    _expire_stock(db, quantities)
+
+
+def release_stock(db: Session, quantities: Dict[int, int]) -> None:
+    """
+    Devolver ao estoque as quantidades informadas em um único UPDATE atômico.
+
+    Args:
+        db: Sessão do banco de dados
+        quantities: Quantidade a devolver, indexada por ID do produto
+    """
+    if not quantities:
+        return
+
+    returned = case(quantities, value=Product.id)
+    db.execute(
+        update(Product)
+        .where(Product.id.in_(list(quantities)))
+        .values(stock=Product.stock + returned)
+        .execution_options(synchronize_session=False)
+    )
+    _expire_stock(db, quantities)
+
+
+def _expire_stock(db: Session, quantities: Dict[int, int]) -> None:
+    """
+    Expirar `stock` dos produtos já carregados na sessão (o UPDATE foi direto
+    no banco) e marcar as respostas em cache desses produtos para invalidação.
+    """
+    for product_id in quantities:
+        mark_changed(db, *product_tags(product_id))
+        product = db.identity_map.get(identity_key(Product, product_id))
+        if product is not None:
+            db.expire(product, ["stock", "reserved_stock", "updated_at"])
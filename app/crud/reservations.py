@@ -0,0 +1,308 @@
+# app/crud/reservations.py
+
+"""
+Reservas de estoque dos carrinhos.
+
+Ao colocar um produto no carrinho, as unidades ficam reservadas por
+STOCK_RESERVATION_TTL_SECONDS: outros carrinhos e checkouts só enxergam
+`stock - reserved_stock`. Cada reserva é uma linha de `stock_reservations`
+(uma por carrinho e produto) e o total reservado fica desnormalizado em
+`Product.reserved_stock`, para que disponibilidade e listagens não precisem
+somar reservas a cada requisição.
+
+As duas coisas mudam sempre na mesma transação e a reserva de novas
+unidades usa o mesmo UPDATE condicional da baixa de estoque
+(`reserved_stock = reserved_stock + q WHERE stock - reserved_stock >= q`).
+Reservas vencidas não são checadas por requisição: a tarefa periódica
+(`sweep_expired_reservations`) as remove e devolve as unidades.
+
+Reservar não é editar o produto: os UPDATEs mantêm `updated_at` (base do
+ETag/Last-Modified do catálogo) e invalidam só o cache do próprio produto
+(`product:<id>`, usado pela disponibilidade) e as listagens filtradas por
+disponibilidade (`stock`), não as demais listagens.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Set, Tuple
+from sqlalchemy import case, delete, event, insert, or_, select, update
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.util import identity_key
+from app.core.config import settings
+from app.core.response_cache import mark_changed, reservation_tags
+from app.crud.cart_items import dialect_upsert
+from app.crud.inventory import InsufficientStockError
+from app.models.product import Product
+from app.models.stock_reservation import StockReservation
+
+SWEEP_BATCH_SIZE = 1000
+
+# Reservas que vencem antes disso passam por `hold_stock` (com trava) em
+# `hold_stock_many`: a tarefa de expiração poderia removê-las entre a
+# leitura e a escrita
+EXPIRY_MARGIN_SECONDS = 60
+
+
+def held_quantities(
+    db: Session,
+    cart_id: int,
+    product_ids: Optional[Iterable[int]] = None,
+) -> Dict[int, int]:
+    """
+    Unidades reservadas pelo carrinho, indexadas por ID do produto.
+
+    Args:
+        db: Sessão do banco de dados
+        cart_id: ID do carrinho
+        product_ids: Limitar a estes produtos (padrão: todos)
+
+    Returns:
+        Dict[int, int]: Quantidade reservada por produto
+    """
+    query = select(StockReservation.product_id, StockReservation.quantity).where(
+        StockReservation.cart_id == cart_id
+    )
+    if product_ids is not None:
+        query = query.where(StockReservation.product_id.in_(list(product_ids)))
+    return dict(db.execute(query).all())
+
+
+def hold_stock(db: Session, cart_id: int, product_id: int, quantity: int) -> None:
+    """
+    Reservar `quantity` unidades do produto para o carrinho e renovar o prazo.
+
+    Substitui a reserva anterior do carrinho para o produto: só a diferença
+    é reservada (ou devolvida). Não faz commit.
+
+    Args:
+        db: Sessão do banco de dados
+        cart_id: ID do carrinho
+        product_id: ID do produto
+        quantity: Quantidade total que o carrinho deve segurar
+
+    Raises:
+        InsufficientStockError: Se não há unidades livres para a diferença
+    """
+    expires_at = datetime.utcnow() + timedelta(seconds=settings.STOCK_RESERVATION_TTL_SECONDS)
+    # Travar a reserva atual (Postgres) para a diferença ser calculada sobre
+    # o valor que vai ser substituído, mesmo com a tarefa de expiração rodando
+    current = db.execute(
+        select(StockReservation.id, StockReservation.quantity)
+        .where(StockReservation.cart_id == cart_id, StockReservation.product_id == product_id)
+        .with_for_update()
+    ).first()
+    held = current.quantity if current else 0
+
+    delta = quantity - held
+    if delta > 0:
+        result = db.execute(
+            update(Product)
+            .where(Product.id == product_id, Product.stock - Product.reserved_stock >= delta)
+            .values(reserved_stock=Product.reserved_stock + delta, updated_at=Product.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            raise InsufficientStockError([product_id])
+    elif delta < 0:
+        _adjust_reserved(db, {product_id: delta})
+
+    if current:
+        db.execute(
+            update(StockReservation)
+            .where(StockReservation.id == current.id)
+            .values(quantity=quantity, expires_at=expires_at)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        db.execute(insert(StockReservation).values(
+            cart_id=cart_id,
+            product_id=product_id,
+            quantity=quantity,
+            expires_at=expires_at,
+        ))
+    _expire_reserved(db, [product_id])
+
+
+def hold_stock_many(
+    db: Session,
+    cart_id: int,
+    quantities: Dict[int, int],
+    reservations: Dict[int, Tuple[int, datetime]],
+) -> Set[int]:
+    """
+    Reservar as quantidades de vários produtos para o carrinho de uma vez.
+
+    Mesmo efeito de `hold_stock` para cada produto, sem ler as reservas de
+    novo: as diferenças saem de `reservations` (lidas junto com os itens do
+    carrinho) e viram um único UPDATE nos produtos (CASE por ID, com a
+    disponibilidade conferida produto a produto) e um único upsert das
+    reservas. Reservas prestes a vencer e bancos sem upsert usam
+    `hold_stock`. Não faz commit.
+
+    Args:
+        db: Sessão do banco de dados
+        cart_id: ID do carrinho
+        quantities: Quantidade total que o carrinho deve segurar, por produto
+        reservations: (quantidade, expires_at) das reservas atuais do carrinho
+
+    Returns:
+        Set[int]: Produtos sem unidades livres para a diferença (nada é
+            gravado para eles)
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=settings.STOCK_RESERVATION_TTL_SECONDS)
+    dialect_insert = dialect_upsert(db)
+
+    failed = set()
+    deltas = {}
+    for product_id, quantity in quantities.items():
+        held, held_until = reservations.get(product_id, (0, None))
+        expiring = held_until is not None and held_until <= now + timedelta(seconds=EXPIRY_MARGIN_SECONDS)
+        if dialect_insert is None or expiring:
+            try:
+                hold_stock(db, cart_id, product_id, quantity)
+            except InsufficientStockError:
+                failed.add(product_id)
+            continue
+        deltas[product_id] = quantity - held
+
+    changes = {product_id: delta for product_id, delta in deltas.items() if delta}
+    if changes:
+        delta = case(changes, value=Product.id)
+        updated = db.execute(
+            update(Product)
+            .where(
+                Product.id.in_(list(changes)),
+                or_(delta <= 0, Product.stock - Product.reserved_stock >= delta),
+            )
+            .values(reserved_stock=Product.reserved_stock + delta, updated_at=Product.updated_at)
+            .returning(Product.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        failed |= set(changes) - set(updated)
+        _expire_reserved(db, updated)
+
+    rows = [
+        {"cart_id": cart_id, "product_id": product_id, "quantity": quantities[product_id], "expires_at": expires_at}
+        for product_id in deltas
+        if product_id not in failed
+    ]
+    if rows:
+        statement = dialect_insert(StockReservation).values(rows)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[StockReservation.cart_id, StockReservation.product_id],
+            set_={"quantity": statement.excluded.quantity, "expires_at": statement.excluded.expires_at},
+        ))
+    return failed
+
+
+def release_reservations(
+    db: Session,
+    cart_id: int,
+    product_ids: Optional[Iterable[int]] = None,
+) -> Dict[int, int]:
+    """
+    Remover reservas do carrinho e devolver as unidades. Não faz commit.
+
+    Args:
+        db: Sessão do banco de dados
+        cart_id: ID do carrinho
+        product_ids: Limitar a estes produtos (padrão: todas as reservas)
+
+    Returns:
+        Dict[int, int]: Quantidade devolvida por produto
+    """
+    statement = delete(StockReservation).where(StockReservation.cart_id == cart_id)
+    if product_ids is not None:
+        statement = statement.where(StockReservation.product_id.in_(list(product_ids)))
+    rows = db.execute(
+        statement
+        .returning(StockReservation.product_id, StockReservation.quantity)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    released = {}
+    for product_id, quantity in rows:
+        released[product_id] = released.get(product_id, 0) + quantity
+    _adjust_reserved(db, {product_id: -quantity for product_id, quantity in released.items()})
+    return released
+
+
+def sweep_expired_reservations(db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Remover as reservas vencidas e devolver as unidades, em lotes.
+
+    Cada lote é um DELETE ... RETURNING seguido de um único UPDATE nos
+    produtos, confirmados juntos. Uma reserva renovada enquanto o lote roda
+    não é removida (o prazo é conferido de novo no DELETE).
+
+    Args:
+        db: Sessão do banco de dados
+        now: Instante de referência (padrão: agora, em UTC)
+
+    Returns:
+        Dict[str, int]: Reservas removidas e unidades devolvidas
+    """
+    now = now or datetime.utcnow()
+    report = {"expired": 0, "units_released": 0}
+    while True:
+        batch = (
+            select(StockReservation.id)
+            .where(StockReservation.expires_at <= now)
+            .limit(SWEEP_BATCH_SIZE)
+        )
+        rows = db.execute(
+            delete(StockReservation)
+            .where(StockReservation.id.in_(batch.scalar_subquery()), StockReservation.expires_at <= now)
+            .returning(StockReservation.product_id, StockReservation.quantity)
+            .execution_options(synchronize_session=False)
+        ).all()
+
+        released = {}
+        for product_id, quantity in rows:
+            released[product_id] = released.get(product_id, 0) + quantity
+        _adjust_reserved(db, {product_id: -quantity for product_id, quantity in released.items()})
+        db.commit()
+
+        report["expired"] += len(rows)
+        report["units_released"] += sum(released.values())
+        if len(rows) < SWEEP_BATCH_SIZE:
+            return report
+
+
+def _adjust_reserved(db: Session, deltas: Dict[int, int]) -> None:
+    """Somar `deltas` ao reserved_stock dos produtos em um único UPDATE."""
+    deltas = {product_id: delta for product_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    db.execute(
+        update(Product)
+        .where(Product.id.in_(list(deltas)))
+        .values(
+            reserved_stock=Product.reserved_stock + case(deltas, value=Product.id),
+            updated_at=Product.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    _expire_reserved(db, deltas)
+
+
+def _expire_reserved(db: Session, product_ids: Iterable[int]) -> None:
+    """Expirar reserved_stock dos produtos carregados e invalidar o cache de cada um."""
+    for product_id in product_ids:
+        mark_changed(db, *reservation_tags(product_id))
+        product = db.identity_map.get(identity_key(Product, product_id))
+        if product is not None:
+            db.expire(product, ["reserved_stock"])
+
+
+@event.listens_for(StockReservation, "after_delete")
+def _release_deleted_reservation(mapper, connection, target):
+    # Reservas apagadas pelo ORM (cascade ao excluir o carrinho/usuário)
+    connection.execute(
+        update(Product)
+        .where(Product.id == target.product_id)
+        .values(reserved_stock=Product.reserved_stock - target.quantity, updated_at=Product.updated_at)
+    )
+    session = object_session(target)
+    if session is not None:
+        mark_changed(session, *reservation_tags(target.product_id))
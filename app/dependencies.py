@@ -2,9 +2,12 @@
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from app.database import SessionLocal, get_async_db
 from app.core.security import decode_token
+from app.core.user_cache import get_cached_user, get_cached_user_async, cache_user
 from app.models.user import User
 
 # Configurar esquema de segurança HTTP Bearer
@@ -30,7 +33,7 @@ def get_current_user(
 ) -> User:
     """
     Dependency para obter o usuário autenticado.
-    Valida o token JWT e retorna o usuário.
+    Valida o token JWT e retorna o usuário (do cache, quando possível).
     
     Args:
         credentials: Credenciais HTTP Bearer
@@ -42,6 +45,49 @@ def get_current_user(
     Raises:
         HTTPException: Se o token for inválido ou expirado
     """
+    email = _email_from_token(credentials)
+    
+    # Buscar o usuário no cache e, se não estiver lá, no banco de dados
+    user = get_cached_user(email, db)
+    
+    if user is None:
+        user = _require_user(db.query(User).filter(User.email == email).first())
+        cache_user(user)
+    
+    return _require_active(user)
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db),
+) -> User:
+    """
+    Versão assíncrona de `get_current_user`, para rotas que usam AsyncSession.
+    
+    Args:
+        credentials: Credenciais HTTP Bearer
+        db: Sessão assíncrona do banco de dados
+        
+    Returns:
+        User: Usuário autenticado
+        
+    Raises:
+        HTTPException: Se o token for inválido ou expirado
+    """
+    email = _email_from_token(credentials)
+    
+    user = await get_cached_user_async(email, db)
+    
+    if user is None:
+        result = await db.execute(select(User).where(User.email == email))
+        user = _require_user(result.scalars().first())
+        cache_user(user)
+    
+    return _require_active(user)
+
+
+def _email_from_token(credentials: HTTPAuthorizationCredentials) -> str:
+    """Validar o token JWT e extrair o email (sub)."""
     token = credentials.credentials
     
     # Decodificar o token
@@ -64,22 +110,27 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Buscar o usuário no banco de dados
-    user = db.query(User).filter(User.email == email).first()
-    
+    return email
+
+
+def _require_user(user: User) -> User:
+    """Garantir que o usuário do token existe."""
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuário não encontrado",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+    return user
+
+
+def _require_active(user: User) -> User:
+    """Garantir que o usuário está ativo."""
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Usuário inativo",
         )
-    
     return user
 
 
@@ -1,14 +1,33 @@
-from fastapi import FastAPI, Request
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, status
 from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi.errors import RateLimitExceeded
+from starlette.concurrency import run_in_threadpool
 from pathlib import Path
 import os
 
-from app.database import Base, engine
+from sqlalchemy import text
+
+from app.database import Base, engine, async_engine, SessionLocal, pool_stats
 from app.core.config import settings
 from app.core.limiter import limiter
+from app.core.search import search_index
+from app.core.password_hasher import password_hasher_stats, shutdown_password_hasher
+from app.core.image_processor import image_processor_stats, shutdown_image_processor
+from app.core import image_storage  # noqa: F401  (listeners de referência das imagens)
+from app.core.upload_gc import upload_gc_loop, upload_gc_stats
+from app.core.reservation_sweeper import reservation_sweeper_loop, reservation_sweeper_stats
+from app.core.idempotency import (
+    IdempotentReplay,
+    idempotency_stats,
+    idempotency_sweeper_loop,
+    idempotent_replay_handler,
+)
+from app.core.response_cache import response_cache
+from app.utils.static_files import UploadFiles
 from app.routers import (
     auth_router,
     categories_router,
@@ -23,12 +42,62 @@ from app.routers import (
     admin_requests_router,
 )
 
+logger = logging.getLogger(__name__)
+
 # ============================================================================
 # CRIAR AS TABELAS NO BANCO DE DADOS
 # ============================================================================
 
 Base.metadata.create_all(bind=engine)
 
+# ============================================================================
+# STARTUP / SHUTDOWN
+# ============================================================================
+
+def _build_search_index() -> None:
+    db = SessionLocal()
+    try:
+        search_index.build(db)
+    except Exception as e:
+        logger.warning("Não foi possível construir o índice de busca no startup: %s", e)
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Tarefas executadas ao iniciar e ao encerrar a aplicação."""
+    # Construir o índice de busca de produtos (no threadpool: leitura da
+    # tabela e tokenização síncronas). Se falhar, ele é construído na
+    # primeira busca (e, se ainda assim falhar, a busca usa ILIKE).
+    await run_in_threadpool(_build_search_index)
+
+    # Coleta periódica de uploads órfãos (desativada com intervalo 0)
+    tasks = []
+    if settings.UPLOAD_GC_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(upload_gc_loop(settings.UPLOAD_GC_INTERVAL_SECONDS)))
+
+    # Expiração das reservas de estoque dos carrinhos
+    if settings.STOCK_RESERVATION_SWEEP_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(
+            reservation_sweeper_loop(settings.STOCK_RESERVATION_SWEEP_INTERVAL_SECONDS)
+        ))
+
+    # Remoção das chaves de idempotência vencidas
+    if settings.IDEMPOTENCY_SWEEP_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(
+            idempotency_sweeper_loop(settings.IDEMPOTENCY_SWEEP_INTERVAL_SECONDS)
+        ))
+
+    yield
+
+    for task in tasks:
+        task.cancel()
+    shutdown_password_hasher()
+    shutdown_image_processor()
+    await async_engine.dispose()
+
+
 # ============================================================================
 # CRIAR A APLICAÇÃO FASTAPI
 # ============================================================================
@@ -37,6 +106,7 @@ app = FastAPI(
     title="Personal Shopper API",
     description="API para e-commerce de personal shopper",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Registra o rate limiter na aplicação e define o handler de erro 429
@@ -50,6 +120,9 @@ async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
 
 app.add_exception_handler(RateLimitExceeded, rate_limit_handler)
 
+# Repetição com Idempotency-Key: devolve a resposta guardada
+app.add_exception_handler(IdempotentReplay, idempotent_replay_handler)
+
 # ============================================================================
 # CONFIGURAR CORS
 # ============================================================================
@@ -65,6 +138,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cursor da próxima página do histórico de pedidos (GET /orders)
+    expose_headers=["X-Next-Cursor"],
 )
 
 # ============================================================================
@@ -79,8 +154,9 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 (UPLOAD_DIR / "products").mkdir(exist_ok=True)
 (UPLOAD_DIR / "users").mkdir(exist_ok=True)
 
-# Servir arquivos estáticos (imagens)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# Servir arquivos estáticos (imagens). Os nomes são únicos e nunca
+# sobrescritos, então as respostas são cacheáveis por um ano (immutable)
+app.mount("/uploads", UploadFiles(directory="uploads"), name="uploads")
 
 # ============================================================================
 # INCLUIR ROUTERS
@@ -125,4 +201,86 @@ def health_check():
     return {
         "status": "ok",
         "message": "API está funcionando corretamente",
-    }
\ No newline at end of file
+    }
+
+
+@app.get("/health/password-hasher", tags=["Health"])
+def password_hasher_health():
+    """
+    Métricas do pool de hash de senha.
+    `pending` é a profundidade da fila (tarefas enviadas e ainda não concluídas).
+    """
+    return password_hasher_stats()
+
+
+@app.get("/health/image-processor", tags=["Health"])
+def image_processor_health():
+    """
+    Métricas do pool de processamento de imagens.
+    `pending` é a profundidade da fila; `processing_ms` e `wait_ms` resumem
+    o tempo de processamento e de espera na fila das imagens mais recentes.
+    """
+    return image_processor_stats()
+
+
+@app.get("/health/upload-gc", tags=["Health"])
+def upload_gc_health():
+    """
+    Configuração do coletor de uploads órfãos e relatório da última passada
+    (arquivos em quarentena, apagados e bytes liberados).
+    """
+    return upload_gc_stats()
+
+
+@app.get("/health/stock-reservations", tags=["Health"])
+def stock_reservations_health():
+    """
+    Configuração das reservas de estoque e relatório da última expiração
+    (reservas removidas e unidades devolvidas).
+    """
+    return reservation_sweeper_stats()
+
+
+@app.get("/health/idempotency", tags=["Health"])
+def idempotency_health():
+    """
+    Configuração das chaves de idempotência, respostas no LRU e relatório
+    da última limpeza (chaves vencidas removidas).
+    """
+    return idempotency_stats()
+
+
+@app.get("/health/cache", tags=["Health"])
+def response_cache_health():
+    """
+    Métricas do cache de respostas do catálogo.
+    Acertos (hits) e falhas (misses) no total e por endpoint.
+    """
+    return response_cache.stats()
+
+
+@app.get("/health/db", tags=["Health"])
+def database_health():
+    """
+    Verificar a conexão com o banco e reportar o pool de conexões.
+    `checked_out` são conexões em uso; `overflow` negativo indica vagas do
+    pool base ainda não abertas. `async_pool` traz os mesmos contadores do
+    engine assíncrono. Retorna 503 se o banco não responde.
+    """
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        database_status = "ok"
+    except Exception as e:
+        logger.error("Health check do banco falhou: %s", e)
+        database_status = "error"
+
+    # Contadores lidos depois do teste, com a conexão já devolvida ao pool
+    content = {
+        "status": database_status,
+        **pool_stats(engine),
+        "async_pool": pool_stats(async_engine.sync_engine),
+    }
+    if database_status != "ok":
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=content)
+    return content
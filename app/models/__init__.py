@@ -11,6 +11,8 @@ from app.models.cart import Cart, CartItem
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.product_request import ProductRequest, RequestStatus
 from app.models.payment import Payment, PaymentType, PaymentStatus
+from app.models.stock_reservation import StockReservation
+from app.models.idempotency_key import IdempotencyKey
 
 __all__ = [
     "User",
@@ -26,4 +28,6 @@ __all__ = [
     "Payment",
     "PaymentType",
     "PaymentStatus",
+    "StockReservation",
+    "IdempotencyKey",
 ]
\ No newline at end of file
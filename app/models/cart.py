@@ -1,5 +1,5 @@
-﻿from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+﻿from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
+from sqlalchemy.orm import column_property, relationship
 from datetime import datetime
 from app.database import Base
 
@@ -16,17 +16,19 @@ class Cart(Base):
     # Relacionamentos
     user = relationship("User", back_populates="cart")
     items = relationship("CartItem", back_populates="cart", cascade="all, delete-orphan")
-    
-    @property
-    def total_price(self) -> float:
-        """Calcular preço total do carrinho."""
-        return sum(item.price_at_time * item.quantity for item in self.items)
+    reservations = relationship("StockReservation", back_populates="cart", cascade="all, delete-orphan")
 
 
 class CartItem(Base):
     """Modelo para itens do carrinho."""
     __tablename__ = "cart_items"
     
+    # Um item por produto em cada carrinho: alvo do upsert de add_cart_item.
+    # Manter em sincronia com migrations/add_cart_items_unique_index.sql
+    __table_args__ = (
+        Index("uq_cart_items_cart_product", "cart_id", "product_id", unique=True),
+    )
+    
     id = Column(Integer, primary_key=True, index=True)
     cart_id = Column(Integer, ForeignKey("carts.id"), nullable=False, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
@@ -35,6 +37,9 @@ class CartItem(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Subtotal da linha, calculado no próprio SELECT dos itens
+    subtotal = column_property(price_at_time * quantity)
+    
     # Relacionamentos
     cart = relationship("Cart", back_populates="items")
     product = relationship("Product", back_populates="cart_items")
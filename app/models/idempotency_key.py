@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, UniqueConstraint
+from app.database import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Resultado de uma requisição enviada com o cabeçalho Idempotency-Key.
+
+    Enquanto a requisição roda, a linha existe sem `status_code` (a chave
+    está reservada). Ao terminar, guarda o status e o corpo da resposta,
+    devolvidos sem reexecutar nada quando a mesma chave chega de novo.
+    Linhas com `expires_at` vencido são ignoradas e removidas pela tarefa
+    periódica (`app.core.idempotency`).
+    """
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "scope", "key", name="uq_idempotency_keys_user_scope_key"),
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    scope = Column(String(50), nullable=False)
+    key = Column(String(255), nullable=False)
+    # SHA-256 do corpo da requisição: a mesma chave com outro corpo é rejeitada
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<IdempotencyKey(user_id={self.user_id}, scope={self.scope}, key={self.key})>"
@@ -1,4 +1,4 @@
-﻿from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String, Enum
+﻿from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -17,6 +17,14 @@ class OrderStatus(str, enum.Enum):
 class Order(Base):
     """Modelo para pedidos."""
     __tablename__ = "orders"
+    # Histórico do usuário (GET /orders): um índice por filtro/ordenação, com
+    # o ID no fim para a paginação por cursor. Ver
+    # migrations/add_order_history_indexes.sql
+    __table_args__ = (
+        Index("ix_orders_user_created", "user_id", "created_at", "id"),
+        Index("ix_orders_user_status_created", "user_id", "status", "created_at", "id"),
+        Index("ix_orders_user_price", "user_id", "total_price", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, ForeignKey, Index, JSON
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -12,6 +12,20 @@ class Product(Base):
     
     __tablename__ = "products"
     
+    # Índices compostos para as combinações de filtro/ordenação da listagem
+    # (GET /products sempre filtra is_active e ordena por created_at, price ou name,
+    # com o id como desempate da paginação por cursor).
+    # Manter em sincronia com migrations/add_product_listing_indexes.sql
+    __table_args__ = (
+        Index("ix_products_category_id", "category_id"),
+        Index("ix_products_active_created", "is_active", "created_at", "id"),
+        Index("ix_products_active_price", "is_active", "price", "id"),
+        Index("ix_products_active_name", "is_active", "name", "id"),
+        Index("ix_products_active_category_created", "is_active", "category_id", "created_at", "id"),
+        Index("ix_products_active_category_price", "is_active", "category_id", "price", "id"),
+        Index("ix_products_active_category_name", "is_active", "category_id", "name", "id"),
+    )
+    
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False, index=True)
     description = Column(String(500), nullable=True)
@@ -20,7 +34,12 @@ class Product(Base):
     color = Column(String(50), nullable=True)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
     image_url = Column(String(500), nullable=True)
+    # Variantes responsivas geradas no upload: {tipo MIME: {largura: URL}}
+    image_variants = Column(JSON, nullable=True)
     stock = Column(Integer, default=0, nullable=False)
+    # Unidades seguradas por carrinhos (soma de stock_reservations);
+    # disponível para venda = stock - reserved_stock
+    reserved_stock = Column(Integer, default=0, server_default="0", nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -30,5 +49,10 @@ class Product(Base):
     cart_items = relationship("CartItem", back_populates="product")
     order_items = relationship("OrderItem", back_populates="product")
     
+    @property
+    def available_stock(self) -> int:
+        """Unidades livres para novos carrinhos e pedidos."""
+        return max(self.stock - (self.reserved_stock or 0), 0)
+    
     def __repr__(self):
         return f"<Product(id={self.id}, name={self.name}, is_active={self.is_active})>"
\ No newline at end of file
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+
+class StockReservation(Base):
+    """
+    Reserva de estoque de um item do carrinho.
+
+    Segura `quantity` unidades do produto para o carrinho até `expires_at`.
+    O total reservado de cada produto fica também em `Product.reserved_stock`,
+    mantido pelas operações de `app.crud.reservations`; reservas vencidas são
+    removidas pela tarefa periódica (`app.core.reservation_sweeper`).
+    """
+
+    __tablename__ = "stock_reservations"
+    __table_args__ = (
+        UniqueConstraint("cart_id", "product_id", name="uq_stock_reservations_cart_product"),
+        Index("ix_stock_reservations_expires_at", "expires_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    cart_id = Column(Integer, ForeignKey("carts.id", ondelete="CASCADE"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
+    cart = relationship("Cart", back_populates="reservations")
+
+    def __repr__(self):
+        return f"<StockReservation(cart_id={self.cart_id}, product_id={self.product_id}, quantity={self.quantity})>"
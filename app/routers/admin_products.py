@@ -1,4 +1,5 @@
 import logging
+from anyio import from_thread
 from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form, Query
 from sqlalchemy.orm import Session
 from app.database import get_db
@@ -6,9 +7,9 @@ from app.models.user import User
 from app.models.product import Product
 from app.schemas.product import ProductCreate, ProductResponse, ProductUpdate
 from app.core.admin_security import get_current_admin
+from app.core.search import search_index
+from app.utils.image_handler import save_and_optimize_image
 from pathlib import Path
-import shutil
-import uuid
 
 logger = logging.getLogger(__name__)
 
@@ -61,21 +62,16 @@ def create_product(
     
     # ✅ NOVO: Validar se tem imagem (URL ou arquivo)
     final_image_url = None
+    image_variants = None
     
     if image_url:
         # Se tem URL, usar a URL diretamente
         final_image_url = image_url
     elif image:
-        # Se tem arquivo, fazer upload
-        file_extension = image.filename.split(".")[-1]
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
-        file_path = UPLOAD_DIR / unique_filename
-        
-        # Salvar arquivo
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        
-        final_image_url = f"/uploads/products/{unique_filename}"
+        # Se tem arquivo, fazer upload e otimizar no pool de imagens (a rota é
+        # síncrona e roda no threadpool, então a corrotina vai para o event loop)
+        image_path, image_variants = from_thread.run(save_and_optimize_image, image)
+        final_image_url = "/" + image_path
     else:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -89,11 +85,13 @@ def create_product(
         price=price,
         category_id=category_id,
         image_url=final_image_url,
+        image_variants=image_variants,
     )
     
     db.add(new_product)
     db.commit()
     db.refresh(new_product)
+    search_index.index_product(new_product)
     
     return new_product
 
@@ -152,18 +150,14 @@ def update_product(
     # ✅ NOVO: Processar nova imagem (URL ou arquivo)
     if image_url:
         product.image_url = image_url
+        product.image_variants = None  # URL externa: sem variantes
     elif image:
-        file_extension = image.filename.split(".")[-1]
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
-        file_path = UPLOAD_DIR / unique_filename
-        
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        
-        product.image_url = f"/uploads/products/{unique_filename}"
+        image_path, product.image_variants = from_thread.run(save_and_optimize_image, image)
+        product.image_url = "/" + image_path
 
     db.commit()
     db.refresh(product)
+    search_index.index_product(product)
     
     return product
 
@@ -196,5 +190,6 @@ def delete_product(
     
     db.delete(product)
     db.commit()
+    search_index.remove_product(product_id)
     
-    return None
\ No newline at end of file
+    return None
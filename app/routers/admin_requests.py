@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, selectinload
 from typing import Optional, List
 
 from app.dependencies import get_db, get_current_admin_user
@@ -36,7 +36,14 @@ def list_all_requests(
         query = query.filter(ProductRequest.user_id == user_id)
 
     total = query.count()
-    items = query.order_by(ProductRequest.created_at.desc()).offset(skip).limit(limit).all()
+    # Usuário (muitos-para-um) no mesmo SELECT; pagamentos em uma query extra
+    items = (
+        query.options(joinedload(ProductRequest.user), selectinload(ProductRequest.payments))
+        .order_by(ProductRequest.created_at.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
     page = (skip // limit) + 1 if limit > 0 else 1
     pages = (total + limit - 1) // limit if limit > 0 else 1
 
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from app.database import get_db
 from app.models.user import User
 from app.models.order import Order
 from app.schemas.user import UserResponse
+from app.schemas.order import OrderListResponse, OrderResponse
 from app.core.admin_security import get_current_admin
+from app.core.user_cache import invalidate_user
 
 router = APIRouter(prefix="/admin/users", tags=["Admin - Users"])
 
@@ -65,7 +67,7 @@ def get_user_detail(
     return user
 
 
-@router.get("/{user_id}/orders")
+@router.get("/{user_id}/orders", response_model=list[OrderResponse])
 def get_user_orders(
     user_id: int,
     current_admin: User = Depends(get_current_admin),
@@ -81,7 +83,7 @@ def get_user_orders(
         db: Sessão do banco de dados
     
     Returns:
-        list: Lista de pedidos do usuário
+        list[OrderResponse]: Lista de pedidos do usuário (com itens)
     
     Raises:
         HTTPException: Se usuário não encontrado
@@ -94,7 +96,15 @@ def get_user_orders(
             detail="Usuário não encontrado",
         )
     
-    return user.orders
+    # Itens em uma única query extra (selectinload), não uma por pedido
+    orders = (
+        db.query(Order)
+        .filter(Order.user_id == user_id)
+        .options(selectinload(Order.items))
+        .order_by(Order.created_at.desc())
+        .all()
+    )
+    return orders
 
 
 @router.put("/{user_id}/toggle-active", response_model=UserResponse)
@@ -112,10 +122,11 @@ def toggle_user_active(
     user.is_active = not user.is_active
     db.commit()
     db.refresh(user)
+    invalidate_user(user.email)
     return user
 
 
-@router.get("/orders/all")
+@router.get("/orders/all", response_model=OrderListResponse)
 def list_all_orders(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200),
@@ -123,7 +134,14 @@ def list_all_orders(
     db: Session = Depends(get_db),
 ):
     """Listar todos os pedidos de todos os usuários. Apenas administradores."""
-    orders = db.query(Order).order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
+    orders = (
+        db.query(Order)
+        .options(selectinload(Order.items))
+        .order_by(Order.created_at.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
     total = db.query(Order).count()
     return {"items": orders, "total": total}
 
@@ -154,7 +172,9 @@ def delete_user(
             detail="Usuário não encontrado",
         )
     
+    email = user.email
     db.delete(user)
     db.commit()
+    invalidate_user(email)
     
     return None
\ No newline at end of file
@@ -3,16 +3,20 @@
 import logging
 import secrets
 from fastapi import APIRouter, Depends, HTTPException, Request, status, BackgroundTasks
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import timedelta, datetime
 from app.database import SessionLocal
 from app.schemas.user import UserCreate, UserLogin, UserResponse, UserUpdate
 from app.models.user import User
 from app.models.password_reset_token import PasswordResetToken
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import create_access_token
+from app.core.password_hasher import hash_password_async, verify_password_async
+from app.core.user_cache import invalidate_user
 from app.core.email import send_reset_email
 from app.core.limiter import limiter
-from app.dependencies import get_db, get_current_user
+from app.dependencies import get_db, get_async_db, get_current_user, get_current_user_async
 
 logger = logging.getLogger(__name__)
 
@@ -21,13 +25,13 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 @limiter.limit("3/minute")
-def register(request: Request, user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(request: Request, user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Registrar um novo usuário.
 
     Args:
         user_data: Dados do usuário (email, password, full_name)
-        db: Sessão do banco de dados
+        db: Sessão assíncrona do banco de dados
 
     Returns:
         UserResponse: Dados do usuário criado
@@ -36,7 +40,7 @@ def register(request: Request, user_data: UserCreate, db: Session = Depends(get_
         HTTPException: Se email já existe
     """
     # Verificar se o email já existe
-    existing_email = db.query(User).filter(User.email == user_data.email).first()
+    existing_email = await db.scalar(select(User.id).where(User.email == user_data.email))
     if existing_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -47,16 +51,20 @@ def register(request: Request, user_data: UserCreate, db: Session = Depends(get_
     username = user_data.email.split("@")[0]
     
     # Verificar se o username já existe
-    existing_username = db.query(User).filter(User.username == username).first()
+    existing_username = await db.scalar(select(User.id).where(User.username == username))
     if existing_username:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username já cadastrado",
         )
 
-    # Criar novo usuário
-    hashed_password = hash_password(user_data.password)
+    # Só gerar o hash de cadastros válidos. A transação de leitura é
+    # encerrada antes, para não segurar uma conexão do pool do SQLAlchemy
+    # enquanto aguarda o pool de processos
+    await db.rollback()
+    hashed_password = await hash_password_async(user_data.password)
 
+    # Criar novo usuário
     new_user = User(
         email=user_data.email,
         username=username,
@@ -67,20 +75,21 @@ def register(request: Request, user_data: UserCreate, db: Session = Depends(get_
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
     return new_user
 
 
 @router.post("/login")
 @limiter.limit("5/minute")
-def login(request: Request, credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(request: Request, credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """
     Fazer login e receber um token JWT.
     """
     # Buscar usuário pelo email
-    user = db.query(User).filter(User.email == credentials.email).first()
+    result = await db.execute(select(User).where(User.email == credentials.email))
+    user = result.scalars().first()
 
     if not user:
         raise HTTPException(
@@ -88,8 +97,12 @@ def login(request: Request, credentials: UserLogin, db: Session = Depends(get_db
             detail="Email ou senha incorretos",
         )
 
+    # Devolver a conexão ao pool antes de aguardar o bcrypt. O usuário fica
+    # desanexado da sessão, mas com as colunas já carregadas
+    await db.close()
+
     # Verificar a senha
-    if not verify_password(credentials.password, user.hashed_password):
+    if not await verify_password_async(credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
@@ -140,10 +153,10 @@ def get_current_user_info(current_user: User = Depends(get_current_user)):
 
 
 @router.put("/me", response_model=UserResponse)
-def update_current_user(
+async def update_current_user(
     user_update: UserUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Atualizar dados do usuário autenticado.
@@ -152,7 +165,7 @@ def update_current_user(
     Args:
         user_update: Dados a serem atualizados
         current_user: Usuário autenticado (injetado automaticamente)
-        db: Sessão do banco de dados
+        db: Sessão assíncrona do banco de dados
 
     Returns:
         UserResponse: Dados atualizados do usuário
@@ -160,9 +173,20 @@ def update_current_user(
     Raises:
         HTTPException: Se email ou username já existem
     """
+    previous_email = current_user.email
+
+    # Gerar o hash da nova senha antes das consultas ao banco, para não
+    # segurar uma conexão do pool enquanto aguarda o bcrypt. A transação
+    # aberta ao carregar o usuário é encerrada antes (commit, que com
+    # expire_on_commit=False não expira o usuário)
+    new_hashed_password = None
+    if user_update.password:
+        await db.commit()
+        new_hashed_password = await hash_password_async(user_update.password)
+
     # Verificar se o novo email já existe (se foi fornecido)
     if user_update.email and user_update.email != current_user.email:
-        existing_email = db.query(User).filter(User.email == user_update.email).first()
+        existing_email = await db.scalar(select(User.id).where(User.email == user_update.email))
         if existing_email:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -175,8 +199,8 @@ def update_current_user(
         current_user.full_name = user_update.full_name
 
     # Atualizar password (se foi fornecida)
-    if user_update.password:
-        current_user.hashed_password = hash_password(user_update.password)
+    if new_hashed_password:
+        current_user.hashed_password = new_hashed_password
 
     # Atualizar campos de endereço (se foram fornecidos)
     address_fields = ['cep', 'logradouro', 'numero', 'complemento', 'bairro', 'cidade', 'estado']
@@ -188,8 +212,9 @@ def update_current_user(
     if user_update.retirar_na_loja is not None:
         current_user.retirar_na_loja = user_update.retirar_na_loja
 
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    invalidate_user(previous_email, current_user.email)
 
     return current_user
 
@@ -238,16 +263,17 @@ async def forgot_password(
 async def reset_password(
     token: str,
     new_password: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Redefinir senha usando o token recebido por email.
     Valida o token (existe, não expirou, não foi usado) e atualiza a senha.
     """
-    reset_token = db.query(PasswordResetToken).filter(
+    result = await db.execute(select(PasswordResetToken).where(
         PasswordResetToken.token == token,
         PasswordResetToken.used == False,
-    ).first()
+    ))
+    reset_token = result.scalars().first()
 
     if not reset_token:
         raise HTTPException(
@@ -271,12 +297,32 @@ async def reset_password(
     if not any(c in '!@#$%^&*()_+-=[]{}|;:,.<>?' for c in new_password):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Senha deve conter pelo menos um caractere especial.")
 
-    # Atualizar senha e invalidar token
-    user = db.query(User).filter(User.id == reset_token.user_id).first()
-    user.hashed_password = hash_password(new_password)
-    reset_token.used = True
+    # Encerrar a sessão de leitura (devolvendo a conexão ao pool) antes de
+    # aguardar o bcrypt
+    token_id, user_id = reset_token.id, reset_token.user_id
+    await db.close()
+    hashed_password = await hash_password_async(new_password)
+
+    # Invalidar o token só se ninguém o usou enquanto o hash era gerado
+    result = await db.execute(
+        update(PasswordResetToken)
+        .where(PasswordResetToken.id == token_id, PasswordResetToken.used == False)
+        .values(used=True)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token inválido ou já utilizado.",
+        )
+
+    # Atualizar senha
+    user = await db.get(User, user_id)
+    user.hashed_password = hashed_password
 
-    db.commit()
+    await db.commit()
+    invalidate_user(user.email)
 
     logger.info("Senha redefinida com sucesso para user_id=%s", user.id)
     return {"message": "Senha redefinida com sucesso. Você já pode fazer login."}
\ No newline at end of file
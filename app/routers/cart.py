@@ -1,42 +1,125 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.schemas.cart import CartItemCreate, CartItemResponse, CartResponse
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from app.schemas.cart import (
+    CartItemCreate,
+    CartItemResponse,
+    CartResponse,
+    CartSummaryResponse,
+    CartBatchOperation,
+    CartBatchRequest,
+    CartBatchResponse,
+    CartOperationResult,
+    CartOperationType,
+)
 from app.models.cart import Cart, CartItem
 from app.models.product import Product
+from app.models.stock_reservation import StockReservation
 from app.models.user import User
-from app.dependencies import get_db, get_current_user
-from typing import List
+from app.crud.cart_items import add_cart_item
+from app.crud.inventory import InsufficientStockError, load_products_by_id
+from app.crud.reservations import held_quantities, hold_stock, hold_stock_many, release_reservations
+from app.dependencies import get_db, get_async_db, get_current_user, get_current_user_async
+from typing import Dict, List, Optional
 
 router = APIRouter(prefix="/cart", tags=["Cart"])
 
 
+# Totais do carrinho em um único agregado sobre os itens
+_CART_TOTALS = (
+    func.coalesce(func.sum(CartItem.quantity), 0).label("total_items"),
+    func.count(CartItem.id).label("distinct_items"),
+    func.coalesce(func.sum(CartItem.price_at_time * CartItem.quantity), 0.0).label("total_price"),
+)
+
+
+def _cart_with_totals():
+    """SELECT do carrinho junto com os totais (os itens vêm em um selectinload)."""
+    return (
+        select(Cart, *_CART_TOTALS)
+        .outerjoin(CartItem, CartItem.cart_id == Cart.id)
+        .group_by(Cart.id)
+        .options(selectinload(Cart.items))
+    )
+
+
+def _cart_response(row) -> CartResponse:
+    """Montar a resposta a partir de uma linha de `_cart_with_totals`."""
+    cart = row.Cart
+    return CartResponse(
+        id=cart.id,
+        user_id=cart.user_id,
+        items=cart.items,
+        total_items=row.total_items,
+        distinct_items=row.distinct_items,
+        total_price=round(row.total_price, 2),
+        created_at=cart.created_at,
+        updated_at=cart.updated_at,
+    )
+
+
 @router.get("", response_model=CartResponse)
-def get_cart(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def get_cart(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Obter o carrinho do usuário com todos os itens.
+    Os totais (total_items, distinct_items, total_price) e os subtotais de
+    cada item são calculados pelo banco.
     
     Args:
         current_user: Usuário autenticado
-        db: Sessão do banco de dados
+        db: Sessão assíncrona do banco de dados
         
     Returns:
-        CartResponse: Dados do carrinho com itens
+        CartResponse: Dados do carrinho com itens e totais
         
     Raises:
         HTTPException: Se o carrinho não existe
     """
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    row = (await db.execute(
+        _cart_with_totals().where(Cart.user_id == current_user.id)
+    )).first()
     
-    if not cart:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Carrinho não encontrado",
         )
     
-    return cart
+    return _cart_response(row)
+
+
+@router.get("/summary", response_model=CartSummaryResponse)
+async def get_cart_summary(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Obter só os totais do carrinho, sem carregar os itens.
+    Consulta leve para o contador do cabeçalho; sem carrinho, tudo zero.
+    
+    Args:
+        current_user: Usuário autenticado
+        db: Sessão assíncrona do banco de dados
+        
+    Returns:
+        CartSummaryResponse: Totais do carrinho
+    """
+    row = (await db.execute(
+        select(*_CART_TOTALS)
+        .select_from(Cart)
+        .join(CartItem, CartItem.cart_id == Cart.id)
+        .where(Cart.user_id == current_user.id)
+    )).one()
+    
+    return CartSummaryResponse(
+        total_items=row.total_items,
+        distinct_items=row.distinct_items,
+        total_price=round(row.total_price, 2),
+    )
 
 @router.get("/items", response_model=List[CartItemResponse])
 def list_cart_items(
@@ -112,6 +195,7 @@ def add_item_to_cart(
     Adicionar um item ao carrinho.
     Se o carrinho não existe, cria um novo.
     Se o item já existe no carrinho, atualiza a quantidade.
+    A quantidade do item fica reservada por STOCK_RESERVATION_TTL_SECONDS.
     
     Args:
         item: Dados do item (product_id, quantity)
@@ -160,11 +244,11 @@ def add_item_to_cart(
             detail=f"Produto '{product.name}' não está disponível para compra",
         )
     
-    # Verificar se há estoque
-    if product.stock < item.quantity:
+    # Verificar se há estoque livre (fora das reservas de outros carrinhos)
+    if product.available_stock < item.quantity:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Estoque insuficiente para '{product.name}'. Disponível: {product.stock}, Solicitado: {item.quantity}",
+            detail=f"Estoque insuficiente para '{product.name}'. Disponível: {product.available_stock}, Solicitado: {item.quantity}",
         )
     
     # Obter ou criar carrinho
@@ -175,52 +259,43 @@ def add_item_to_cart(
         db.add(cart)
         db.flush()
     
-    # Verificar se o item já existe no carrinho
-    cart_item = db.query(CartItem).filter(
-        CartItem.cart_id == cart.id,
-        CartItem.product_id == item.product_id,
-    ).first()
-    
-    if cart_item:
-        # Atualizar quantidade
-        new_quantity = cart_item.quantity + item.quantity
-        
-        # Validar nova quantidade
-        if new_quantity > 1000:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Quantidade total não pode exceder 1000 unidades. Atual: {cart_item.quantity}, Solicitado: {item.quantity}",
-            )
-        
-        # Verificar estoque para nova quantidade
-        if product.stock < new_quantity:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Estoque insuficiente para '{product.name}'. Disponível: {product.stock}, Total solicitado: {new_quantity}",
-            )
-        
-        cart_item.quantity = new_quantity
-    else:
-        # Validar limite de itens diferentes no carrinho
-        current_items_count = db.query(CartItem).filter(CartItem.cart_id == cart.id).count()
-        
-        if current_items_count >= 100:
+    # Criar o item ou somar a quantidade em um único upsert; os limites de
+    # 1000 unidades e 100 produtos são conferidos no mesmo statement
+    cart_id = cart.id
+    result = add_cart_item(db, cart_id, product.id, item.quantity, product.price)
+    
+    if result is None:
+        current = db.query(CartItem.quantity).filter(
+            CartItem.cart_id == cart_id,
+            CartItem.product_id == product.id,
+        ).scalar()
+        db.rollback()
+        if current is not None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Carrinho não pode conter mais de 100 produtos diferentes",
+                detail=f"Quantidade total não pode exceder 1000 unidades. Atual: {current}, Solicitado: {item.quantity}",
             )
-        
-        # Criar novo item
-        cart_item = CartItem(
-            cart_id=cart.id,
-            product_id=item.product_id,
-            quantity=item.quantity,
-            price_at_time=product.price,
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Carrinho não pode conter mais de 100 produtos diferentes",
+        )
+    
+    # Reservar a nova quantidade total (o que já está reservado para este
+    # carrinho conta como disponível)
+    item_id, new_quantity = result
+    try:
+        hold_stock(db, cart_id, product.id, new_quantity)
+    except InsufficientStockError:
+        held = held_quantities(db, cart_id, [product.id]).get(product.id, 0)
+        name, available = product.name, product.available_stock + held
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Estoque insuficiente para '{name}'. Disponível: {available}, Total solicitado: {new_quantity}",
         )
-        db.add(cart_item)
     
     db.commit()
-    db.refresh(cart_item)
+    cart_item = db.get(CartItem, item_id)
     
     return cart_item
 
@@ -296,20 +371,201 @@ def update_cart_item(
         )
     
     # Verificar estoque para nova quantidade
-    if product.stock < quantity:
+    held = held_quantities(db, cart_item.cart_id, [product.id]).get(product.id, 0)
+    if product.available_stock + held < quantity:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Estoque insuficiente para '{product.name}'. Disponível: {product.stock}, Solicitado: {quantity}",
+            detail=f"Estoque insuficiente para '{product.name}'. Disponível: {product.available_stock + held}, Solicitado: {quantity}",
         )
     
-    # Atualizar quantidade
+    # Atualizar quantidade e a reserva
     cart_item.quantity = quantity
+    _hold_or_conflict(db, cart_item.cart_id, product, quantity)
     db.commit()
     db.refresh(cart_item)
     
     return cart_item
 
 
+@router.patch("/items:batch", response_model=CartBatchResponse)
+def batch_update_cart_items(
+    batch: CartBatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Adicionar, alterar e remover vários itens do carrinho de uma vez.
+    
+    As operações são aplicadas na ordem, em uma única transação, com uma
+    busca de produtos, uma busca dos itens do carrinho (com as reservas), um
+    UPDATE nos produtos, um upsert das reservas e um único commit.
+    Cada operação é validada separadamente (mesmas regras de POST e PUT
+    /cart/items): as inválidas são reportadas em `results` e não impedem
+    as demais.
+    
+    Args:
+        batch: Operações (add, set, remove)
+        current_user: Usuário autenticado
+        db: Sessão do banco de dados
+        
+    Returns:
+        CartBatchResponse: Carrinho resultante e o resultado de cada operação
+    """
+    # Obter ou criar carrinho
+    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    
+    if not cart:
+        cart = Cart(user_id=current_user.id)
+        db.add(cart)
+        db.flush()
+    cart_id = cart.id
+    
+    # Buscar os produtos das operações e os itens do carrinho (com a
+    # quantidade reservada de cada um) em uma query cada
+    products_by_id = load_products_by_id(
+        db, {operation.product_id for operation in batch.operations if operation.product_id > 0}
+    )
+    rows = db.execute(
+        select(CartItem, StockReservation.quantity, StockReservation.expires_at)
+        .outerjoin(StockReservation, and_(
+            StockReservation.cart_id == CartItem.cart_id,
+            StockReservation.product_id == CartItem.product_id,
+        ))
+        .where(CartItem.cart_id == cart_id)
+    ).all()
+    items_by_product = {item.product_id: item for item, _, _ in rows}
+    held = {item.product_id: held_quantity or 0 for item, held_quantity, _ in rows}
+    reservations = {
+        item.product_id: (held_quantity, expires_at)
+        for item, held_quantity, expires_at in rows
+        if held_quantity is not None
+    }
+    
+    # Aplicar as operações sobre as quantidades, validando uma a uma
+    quantities = {product_id: item.quantity for product_id, item in items_by_product.items()}
+    results = []
+    applied = {}  # ID do produto -> índices das operações aplicadas
+    for index, operation in enumerate(batch.operations):
+        error = _check_operation(operation, quantities, products_by_id, held)
+        if error is None:
+            if operation.op == CartOperationType.REMOVE:
+                del quantities[operation.product_id]
+            elif operation.op == CartOperationType.ADD:
+                quantities[operation.product_id] = quantities.get(operation.product_id, 0) + operation.quantity
+            else:
+                quantities[operation.product_id] = operation.quantity
+            applied.setdefault(operation.product_id, []).append(index)
+        results.append(CartOperationResult(
+            index=index,
+            op=operation.op,
+            product_id=operation.product_id,
+            success=error is None,
+            error=error,
+        ))
+    
+    # Reservar as quantidades finais de uma vez: as diferenças saem das
+    # reservas lidas acima (um UPDATE nos produtos e um upsert das reservas)
+    failed = hold_stock_many(
+        db,
+        cart_id,
+        {product_id: quantities[product_id] for product_id in applied if product_id in quantities},
+        reservations,
+    )
+    
+    # Gravar o estado final de cada produto alterado
+    removed = []
+    for product_id, indexes in applied.items():
+        item = items_by_product.get(product_id)
+        quantity = quantities.get(product_id)
+        
+        if quantity is None:
+            if item is not None:
+                db.delete(item)
+                removed.append(product_id)
+            continue
+        
+        product = products_by_id[product_id]
+        if product_id in failed:
+            # Outro carrinho levou as unidades depois da validação; o UPDATE
+            # condicional não alterou este produto, então só ele fica de fora
+            for index in indexes:
+                results[index].success = False
+                results[index].error = (
+                    f"Estoque insuficiente para '{product.name}'. O estoque mudou durante a alteração."
+                )
+            continue
+        
+        if item is None:
+            db.add(CartItem(
+                cart_id=cart_id,
+                product_id=product_id,
+                quantity=quantity,
+                price_at_time=product.price,
+            ))
+        else:
+            item.quantity = quantity
+    
+    if removed:
+        release_reservations(db, cart_id, removed)
+    
+    db.commit()
+    
+    row = db.execute(_cart_with_totals().where(Cart.id == cart_id)).one()
+    return CartBatchResponse(cart=_cart_response(row), results=results)
+
+
+def _check_operation(
+    operation: CartBatchOperation,
+    quantities: Dict[int, int],
+    products_by_id: Dict[int, Product],
+    held: Dict[int, int],
+) -> Optional[str]:
+    """
+    Validar uma operação do lote contra o estado atual do carrinho.
+    
+    Args:
+        operation: Operação a validar
+        quantities: Quantidade de cada produto no carrinho (após as operações anteriores)
+        products_by_id: Produtos das operações, indexados por ID
+        held: Quantidade já reservada pelo carrinho, por produto
+        
+    Returns:
+        Optional[str]: Motivo da falha, ou None se a operação é válida
+    """
+    product_id = operation.product_id
+    if product_id <= 0:
+        return "ID do produto deve ser um número positivo"
+    
+    if operation.op == CartOperationType.REMOVE:
+        if product_id not in quantities:
+            return "Item do carrinho não encontrado"
+        return None
+    
+    if operation.quantity is None or operation.quantity <= 0:
+        return "Quantidade deve ser maior que zero"
+    if operation.quantity > 1000:
+        return "Quantidade não pode exceder 1000 unidades"
+    
+    product = products_by_id.get(product_id)
+    if not product:
+        return f"Produto com ID {product_id} não encontrado"
+    if not product.is_active:
+        return f"Produto '{product.name}' não está disponível para compra"
+    
+    current = quantities.get(product_id, 0)
+    new_quantity = current + operation.quantity if operation.op == CartOperationType.ADD else operation.quantity
+    if new_quantity > 1000:
+        return f"Quantidade total não pode exceder 1000 unidades. Atual: {current}, Solicitado: {operation.quantity}"
+    
+    available = product.available_stock + held.get(product_id, 0)
+    if available < new_quantity:
+        return f"Estoque insuficiente para '{product.name}'. Disponível: {available}, Solicitado: {new_quantity}"
+    
+    if product_id not in quantities and len(quantities) >= 100:
+        return "Carrinho não pode conter mais de 100 produtos diferentes"
+    return None
+
+
 @router.delete("/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 def remove_item_from_cart(
     item_id: int,
@@ -339,6 +595,7 @@ def remove_item_from_cart(
             detail="Item do carrinho não encontrado",
         )
     
+    release_reservations(db, cart_item.cart_id, [cart_item.product_id])
     db.delete(cart_item)
     db.commit()
 
@@ -366,6 +623,20 @@ def clear_cart(
             detail="Carrinho não encontrado",
         )
     
-    # Deletar todos os itens do carrinho
+    # Deletar todos os itens do carrinho e devolver as reservas
+    release_reservations(db, cart.id)
     db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
-    db.commit()
\ No newline at end of file
+    db.commit()
+
+
+def _hold_or_conflict(db: Session, cart_id: int, product: Product, quantity: int) -> None:
+    """Reservar a quantidade do item; se outro carrinho levou as unidades, 409."""
+    name = product.name
+    try:
+        hold_stock(db, cart_id, product.id, quantity)
+    except InsufficientStockError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Estoque insuficiente para '{name}'. O estoque mudou enquanto o item era adicionado.",
+        )
\ No newline at end of file
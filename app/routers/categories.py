@@ -1,11 +1,15 @@
 # app/routers/categories.py
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.schemas.category import CategoryCreate, CategoryResponse, CategoryUpdate
 from app.models.category import Category
 from app.dependencies import get_db, get_current_admin_user
 from app.models.user import User
+from app.core.response_cache import cache_key, response_cache
+from app.utils.conditional import ConditionalRequest, make_validators, weak_etag
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
@@ -59,15 +63,19 @@ def create_category(
 def list_categories(
     skip: int = 0,
     limit: int = 10,
+    conditional: ConditionalRequest = Depends(),
     db: Session = Depends(get_db),
 ):
     """
     Listar todas as categorias.
     Endpoint público (não requer autenticação).
+    Responde 304 se o cliente já tem a versão atual: o ETag vem de
+    count + max(updated_at), sem carregar as categorias.
     
     Args:
         skip: Quantas categorias pular (paginação)
         limit: Quantas categorias retornar (máximo 100)
+        conditional: Cabeçalhos condicionais da requisição
         db: Sessão do banco de dados
         
     Returns:
@@ -77,22 +85,46 @@ def list_categories(
     if limit > 100:
         limit = 100
     
+    key = cache_key("categories.list", skip=skip, limit=limit)
+    cached = response_cache.get(key)
+    if cached is not None:
+        if conditional.is_not_modified(cached["validators"]):
+            return conditional.not_modified(cached["validators"])
+        conditional.set_validators(cached["validators"])
+        return cached["body"]
+    generation = response_cache.generation
+    
+    count, last_updated = db.query(func.count(Category.id), func.max(Category.updated_at)).one()
+    validators = make_validators(weak_etag(key, count, last_updated), last_updated)
+    if conditional.is_not_modified(validators):
+        return conditional.not_modified(validators)
+    
     categories = db.query(Category).offset(skip).limit(limit).all()
     
-    return categories
+    response = jsonable_encoder([CategoryResponse.model_validate(category) for category in categories])
+    response_cache.set(
+        key, {"body": response, "validators": validators}, {"categories"}, generation=generation
+    )
+    
+    conditional.set_validators(validators)
+    return response
 
 
 @router.get("/{category_id}", response_model=CategoryResponse)
 def get_category(
     category_id: int,
+    conditional: ConditionalRequest = Depends(),
     db: Session = Depends(get_db),
 ):
     """
     Obter uma categoria por ID.
     Endpoint público (não requer autenticação).
+    Responde 304 se o cliente já tem a versão atual (ETag/Last-Modified
+    calculados a partir de updated_at).
     
     Args:
         category_id: ID da categoria
+        conditional: Cabeçalhos condicionais da requisição
         db: Sessão do banco de dados
         
     Returns:
@@ -109,6 +141,11 @@ def get_category(
             detail="Categoria não encontrada",
         )
     
+    validators = make_validators(weak_etag("categories.detail", category.id, category.updated_at), category.updated_at)
+    if conditional.is_not_modified(validators):
+        return conditional.not_modified(validators)
+    
+    conditional.set_validators(validators)
     return category
 
 
@@ -1,12 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import desc, insert, select
 from app.schemas.order import OrderCreate, OrderResponse, OrderItemCreate
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.cart import Cart, CartItem
 from app.models.product import Product
 from app.models.user import User
-from app.dependencies import get_db, get_current_user
+from app.dependencies import get_db, get_async_db, get_current_user, get_current_user_async
+from app.crud.inventory import (
+    InsufficientStockError,
+    load_products_by_id,
+    release_stock,
+    reserve_stock,
+)
+from app.crud.reservations import held_quantities, release_reservations
+from app.core.idempotency import Idempotency, IdempotencyRecord
+from app.utils.pagination import decode_cursor, keyset_filter, next_cursor_for, order_by_keyset
 from datetime import datetime
 from typing import List, Optional
 
@@ -14,7 +24,8 @@ router = APIRouter(prefix="/orders", tags=["Orders"])
 
 
 @router.get("", response_model=List[OrderResponse])
-def list_orders(
+async def list_orders(
+    response: Response,
     skip: int = 0,
     limit: int = 10,
     status_filter: Optional[str] = None,
@@ -24,13 +35,20 @@ def list_orders(
     max_price: Optional[float] = None,
     sort_by: str = "created_at",
     sort_order: str = "desc",
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Listar todos os pedidos do usuário com filtros e paginação.
     
+    Paginação:
+    - offset: skip/limit (compatível com clientes antigos)
+    - cursor: passe o cabeçalho `X-Next-Cursor` da resposta anterior para
+      buscar a próxima página; o custo não cresce com a profundidade
+    
     Args:
+        response: Resposta HTTP (recebe o cabeçalho X-Next-Cursor)
         skip: Número de registros a pular (padrão: 0)
         limit: Número máximo de registros a retornar (padrão: 10)
         status_filter: Filtrar por status (pending, processing, shipped, delivered, cancelled)
@@ -40,14 +58,13 @@ def list_orders(
         max_price: Preço máximo
         sort_by: Campo para ordenação (created_at, total_price)
         sort_order: Ordem de classificação (asc, desc)
+        cursor: Cursor opaco da próxima página (ignora skip)
         current_user: Usuário autenticado
-        db: Sessão do banco de dados
+        db: Sessão assíncrona do banco de dados
         
     Returns:
         List[OrderResponse]: Lista de pedidos filtrados e paginados
     """
-    from datetime import datetime
-    
     # Validar parâmetros
     if skip < 0:
         skip = 0
@@ -59,7 +76,7 @@ def list_orders(
         sort_by = "created_at"
     
     # Construir query base
-    query = db.query(Order).filter(Order.user_id == current_user.id)
+    query = select(Order).filter(Order.user_id == current_user.id)
     
     # Aplicar filtros
     if status_filter:
@@ -93,13 +110,27 @@ def list_orders(
     else:
         sort_column = Order.created_at
     
-    if sort_order == "asc":
-        query = query.order_by(sort_column.asc())
+    # Ordenar com o ID como desempate: os índices (user_id, [status,]
+    # created_at, id) e (user_id, total_price, id) entregam a ordem pronta
+    query = order_by_keyset(query, sort_column, Order.id, sort_order)
+    
+    # Aplicar paginação: por cursor (keyset) ou por offset.
+    # Busca um registro a mais para saber se existe próxima página.
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_by, sort_order)
+        query = query.filter(keyset_filter(sort_column, Order.id, value, last_id, sort_order))
     else:
-        query = query.order_by(sort_column.desc())
+        query = query.offset(skip)
+    
+    # Itens carregados junto: AsyncSession não faz lazy load
+    query = query.options(selectinload(Order.items)).limit(limit + 1)
+    rows = (await db.scalars(query)).all()
+    orders, next_cursor = next_cursor_for(
+        rows, limit, sort_by, sort_order, lambda order: getattr(order, sort_by)
+    )
     
-    # Aplicar paginação
-    orders = query.offset(skip).limit(limit).all()
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
     return orders
 
@@ -124,7 +155,7 @@ def get_order(
     Raises:
         HTTPException: Se o pedido não existe ou não pertence ao usuário
     """
-    order = db.query(Order).filter(
+    order = db.query(Order).options(selectinload(Order.items)).filter(
         Order.id == order_id,
         Order.user_id == current_user.id,
     ).first()
@@ -143,14 +174,19 @@ def create_order(
     order_data: OrderCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
+    idempotency: IdempotencyRecord = Depends(Idempotency("orders.create")),
 ):
     """
     Criar um novo pedido a partir do carrinho.
     
+    Com o cabeçalho Idempotency-Key, repetir a requisição devolve o mesmo
+    pedido em vez de criar outro.
+    
     Args:
         order_data: Dados do pedido (items, shipping_address, payment_method)
         current_user: Usuário autenticado
         db: Sessão do banco de dados
+        idempotency: Chave de idempotência da requisição
         
     Returns:
         OrderResponse: Dados do pedido criado
@@ -177,17 +213,26 @@ def create_order(
     order_items_data = []
     product_ids_in_order = set()
     
+    # Validar que não há produtos duplicados
     for item in order_data.items:
-        # Validar que não há produtos duplicados
         if item.product_id in product_ids_in_order:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Produto com ID {item.product_id} aparece mais de uma vez no pedido",
             )
         product_ids_in_order.add(item.product_id)
-        
+    
+    # Buscar todos os produtos do pedido em uma única query (IN) e indexar por ID,
+    # em vez de uma query por item na validação e outra na baixa de estoque
+    products_by_id = load_products_by_id(db, product_ids_in_order)
+    
+    # Unidades reservadas pelo carrinho do usuário contam como disponíveis
+    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    held = held_quantities(db, cart.id) if cart else {}
+    
+    for item in order_data.items:
         # Verificar se o produto existe
-        product = db.query(Product).filter(Product.id == item.product_id).first()
+        product = products_by_id.get(item.product_id)
         
         if not product:
             raise HTTPException(
@@ -203,10 +248,11 @@ def create_order(
             )
         
         # Verificar estoque
-        if product.stock < item.quantity:
+        available = product.available_stock + held.get(product.id, 0)
+        if available < item.quantity:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Estoque insuficiente para '{product.name}'. Disponível: {product.stock}, Solicitado: {item.quantity}",
+                detail=f"Estoque insuficiente para '{product.name}'. Disponível: {available}, Solicitado: {item.quantity}",
             )
         
         item_total = product.price * item.quantity
@@ -245,30 +291,53 @@ def create_order(
         db.add(order)
         db.flush()  # gera o order.id sem commitar ainda
 
-        # Adicionar itens do pedido e atualizar estoque
-        for item_data in order_items_data:
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=item_data["product_id"],
-                quantity=item_data["quantity"],
-                price=item_data["price_at_time"],
-            )
-            db.add(order_item)
+        # Adicionar itens do pedido em um único INSERT (executemany)
+        db.execute(
+            insert(OrderItem),
+            [
+                {
+                    "order_id": order.id,
+                    "product_id": item_data["product_id"],
+                    "quantity": item_data["quantity"],
+                    "price": item_data["price_at_time"],
+                }
+                for item_data in order_items_data
+            ],
+        )
 
-            # Atualizar estoque do produto
-            product = db.query(Product).filter(
-                Product.id == item_data["product_id"]
-            ).first()
-            product.stock -= item_data["quantity"]
+        # Devolver as reservas do carrinho (que vai ser esvaziado) antes da baixa
+        if cart:
+            release_reservations(db, cart.id)
+
+        # Baixar estoque com UPDATE condicional atômico: se outro checkout
+        # levou as últimas unidades depois da validação, o pedido falha inteiro
+        reserve_stock(db, {
+            item_data["product_id"]: item_data["quantity"]
+            for item_data in order_items_data
+        })
 
         # Limpar carrinho do usuário
-        cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
         if cart:
             db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
 
-        db.commit()
+        db.flush()
         db.refresh(order)
+        response = OrderResponse.model_validate(order)
 
+        # A resposta da Idempotency-Key é confirmada junto com o pedido
+        idempotency.save(response, status.HTTP_201_CREATED)
+        db.commit()
+
+    except InsufficientStockError as e:
+        db.rollback()
+        names = ", ".join(f"'{products_by_id[pid].name}'" for pid in e.product_ids)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Estoque insuficiente para {names}. O estoque mudou durante a finalização do pedido.",
+        )
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception:
         db.rollback()
         raise HTTPException(
@@ -276,7 +345,7 @@ def create_order(
             detail="Erro interno ao processar o pedido. Tente novamente.",
         )
 
-    return order
+    return response
 
 
 @router.put("/{order_id}/cancel", response_model=OrderResponse)
@@ -320,10 +389,11 @@ def cancel_order(
     # Atualizar status
     order.status = OrderStatus.CANCELLED
     
-    # Restaurar estoque
+    # Restaurar estoque (um único UPDATE atômico para todos os itens)
+    quantities = {}
     for item in order.items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        product.stock += item.quantity
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    release_stock(db, quantities)
     
     db.commit()
     db.refresh(order)
@@ -7,6 +7,7 @@ from app.models.user import User
 from app.models.product_request import ProductRequest, RequestStatus
 from app.models.payment import Payment, PaymentType, PaymentStatus
 from app.schemas.payment import PaymentCreate, PaymentResponse
+from app.core.idempotency import Idempotency, IdempotencyRecord
 
 router = APIRouter(prefix="/payments", tags=["Pagamentos"])
 
@@ -16,11 +17,13 @@ def register_payment(
     data: PaymentCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
+    idempotency: IdempotencyRecord = Depends(Idempotency("payments.create")),
 ):
     """
     Cliente registra um pagamento (sinal ou final).
     - Sinal: permitido somente quando status == 'aguardando_sinal'
     - Final: permitido somente quando status == 'aguardando_pagamento_final'
+    - Com o cabeçalho Idempotency-Key, a repetição devolve o mesmo pagamento
     """
     req = db.query(ProductRequest).filter(
         ProductRequest.id == data.request_id,
@@ -91,9 +94,14 @@ def register_payment(
     elif data.type == PaymentType.FINAL:
         req.status = RequestStatus.PAGO.value
 
-    db.commit()
+    db.flush()
     db.refresh(payment)
-    return payment
+    response = PaymentResponse.model_validate(payment)
+
+    # A resposta da Idempotency-Key é confirmada junto com o pagamento
+    idempotency.save(response, status.HTTP_201_CREATED)
+    db.commit()
+    return response
 
 
 @router.get("/my", response_model=List[PaymentResponse])
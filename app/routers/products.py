@@ -1,17 +1,58 @@
+import logging
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from typing import Optional, List
 from app.schemas.product import ProductCreate, ProductResponse, ProductUpdate, ProductListResponse
 from app.models.product import Product
 from app.models.category import Category
-from app.dependencies import get_db, get_current_admin_user
+from app.database import SessionLocal
+from app.dependencies import get_db, get_async_db, get_current_admin_user
 from app.models.user import User
 from fastapi import File, UploadFile
-from app.utils.image_handler import save_and_optimize_image, delete_image
+from app.utils.image_handler import save_and_optimize_image
+from app.utils.pagination import decode_cursor, keyset_filter, next_cursor_for, order_by_keyset
+from app.utils.conditional import ConditionalRequest, make_validators, weak_etag
+from app.core.search import search_index
+from app.core.response_cache import cache_key, response_cache
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
 
+def _search_product_ids(search: str, conditions: list) -> Optional[List[int]]:
+    """
+    Buscar IDs de produtos no índice de busca, ordenados por relevância.
+    
+    Síncrono (Session própria e ranking em CPU): chamar via run_in_threadpool.
+    
+    Args:
+        search: Termo de busca
+        conditions: Filtros da listagem, aplicados antes do limite de resultados
+    
+    Returns:
+        Optional[List[int]]: IDs encontrados, ou None se o índice falhou
+        (a listagem volta para a busca por ILIKE)
+    """
+    db = SessionLocal()
+    try:
+        return search_index.search(db, search, conditions)
+    except Exception as e:
+        logger.warning("Falha no índice de busca, usando ILIKE: %s", e)
+        return None
+    finally:
+        db.close()
+
+
+def _latest(*values):
+    """Maior dos datetimes informados (ignorando None)."""
+    return max((value for value in values if value is not None), default=None)
+
+
 @router.post("", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 def create_product(
     product_data: ProductCreate,
@@ -70,12 +111,13 @@ def create_product(
     db.add(new_product)
     db.commit()
     db.refresh(new_product)
+    search_index.index_product(new_product)
     
     return new_product
 
 
 @router.get("", response_model=ProductListResponse)
-def list_products(
+async def list_products(
     skip: int = 0,
     limit: int = 10,
     category_id: Optional[int] = None,
@@ -85,11 +127,24 @@ def list_products(
     search: Optional[str] = None,
     sort_by: str = "created_at",
     sort_order: str = "desc",
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
+    conditional: ConditionalRequest = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Listar produtos com filtros e paginação.
     
+    Suporta dois modos de paginação:
+    - offset (skip/limit): modo tradicional, calcula total e pages por padrão
+    - cursor: passe o `next_cursor` da resposta anterior para buscar a próxima
+      página sem OFFSET; total e pages só são calculados com include_total=true
+    
+    A resposta traz ETag e Last-Modified; com If-None-Match/If-Modified-Since
+    atuais, retorna 304. Quando o total é calculado, o ETag vem da mesma
+    query do total (count + max(updated_at)) e o 304 sai sem carregar os
+    produtos; sem total, vem dos produtos da página.
+    
     Args:
         skip: Número de registros a pular (padrão: 0)
         limit: Número máximo de registros a retornar (padrão: 10)
@@ -97,13 +152,16 @@ def list_products(
         min_price: Preço mínimo
         max_price: Preço máximo
         in_stock: Filtrar por disponibilidade (True = em estoque, False = fora de estoque)
-        search: Buscar por nome do produto
-        sort_by: Campo para ordenação (created_at, price, name)
+        search: Buscar por nome ou descrição (sem acento, por prefixo de palavra)
+        sort_by: Campo para ordenação (created_at, price, name, relevance — só com search)
         sort_order: Ordem de classificação (asc, desc)
-        db: Sessão do banco de dados
+        cursor: Cursor opaco da próxima página (ignora skip)
+        include_total: Calcular total e pages (padrão: sim no modo offset, não no modo cursor)
+        conditional: Cabeçalhos condicionais da requisição
+        db: Sessão assíncrona do banco de dados
         
     Returns:
-        List[ProductResponse]: Lista de produtos filtrados e paginados
+        ProductListResponse: Lista de produtos filtrados e paginados
     """
         # Validar parâmetros
     if skip < 0:
@@ -112,72 +170,183 @@ def list_products(
         limit = 10
     if sort_order not in ["asc", "desc"]:
         sort_order = "desc"
-    if sort_by not in ["created_at", "price", "name"]:
+    if sort_by not in ["created_at", "price", "name", "relevance"]:
         sort_by = "created_at"
+    if sort_by == "relevance" and not search:
+        sort_by = "created_at"
+    if include_total is None:
+        include_total = cursor is None
+    
+    # Resposta em cache? A chave usa os parâmetros já normalizados
+    key = cache_key(
+        "products.list",
+        skip=0 if cursor else skip,
+        limit=limit,
+        category_id=category_id or None,
+        min_price=min_price,
+        max_price=max_price,
+        in_stock=in_stock,
+        search=search or None,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        cursor=cursor,
+        include_total=include_total,
+    )
+    cached = await response_cache.aget(key)
+    if cached is not None:
+        if conditional.is_not_modified(cached["validators"]):
+            return conditional.not_modified(cached["validators"])
+        conditional.set_validators(cached["validators"])
+        return cached["body"]
+    generation = response_cache.generation
     
-    # Construir query base - filtrar apenas produtos ativos
-    query = db.query(Product).filter(Product.is_active == True)
+    # Filtros - apenas produtos ativos
+    conditions = [Product.is_active == True]
     
-    # Aplicar filtros
     if category_id:
-        query = query.filter(Product.category_id == category_id)
+        conditions.append(Product.category_id == category_id)
     
     if min_price is not None:
-        query = query.filter(Product.price >= min_price)
+        conditions.append(Product.price >= min_price)
     
     if max_price is not None:
-        query = query.filter(Product.price <= max_price)
+        conditions.append(Product.price <= max_price)
     
+    # Em estoque = há unidades fora das reservas dos carrinhos
     if in_stock is not None:
         if in_stock:
-            query = query.filter(Product.stock > 0)
+            conditions.append(Product.stock > Product.reserved_stock)
         else:
-            query = query.filter(Product.stock == 0)
+            conditions.append(Product.stock <= Product.reserved_stock)
+    
+    query = select(Product).filter(*conditions)
     
+    ranked_ids = None
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Product.name.ilike(search_term)) | 
-            (Product.description.ilike(search_term))
-        )
+        # O índice de busca é síncrono e faz o ranking em CPU: fora do event
+        # loop. Os filtros vão junto para valerem antes do limite de resultados.
+        ranked_ids = await run_in_threadpool(_search_product_ids, search, conditions)
+        if ranked_ids is None:
+            # Índice indisponível: busca por substring (varre a tabela)
+            search_term = f"%{search}%"
+            query = query.filter(
+                (Product.name.ilike(search_term)) | 
+                (Product.description.ilike(search_term))
+            )
+        else:
+            query = query.filter(Product.id.in_(ranked_ids))
     
     # Aplicar ordenação
-    if sort_by == "price":
-        sort_column = Product.price
-    elif sort_by == "name":
-        sort_column = Product.name
-    else:
-        sort_column = Product.created_at
+    if sort_by == "relevance" and not ranked_ids:
+        sort_by = "created_at"
     
-    if sort_order == "asc":
-        query = query.order_by(sort_column.asc())
+    if sort_by == "relevance":
+        # Pontuação decrescente: o mais relevante tem a maior pontuação
+        relevance = {
+            product_id: len(ranked_ids) - position
+            for position, product_id in enumerate(ranked_ids)
+        }
+        sort_column = case(relevance, value=Product.id)
+        sort_value = lambda product: relevance[product.id]
     else:
-        query = query.order_by(sort_column.desc())
+        if sort_by == "price":
+            sort_column = Product.price
+        elif sort_by == "name":
+            sort_column = Product.name
+        else:
+            sort_column = Product.created_at
+        sort_value = lambda product: getattr(product, sort_column.key)
+    
+    # Contar total de resultados (antes de paginar), só quando solicitado.
+    # A mesma query traz o maior updated_at (dos produtos e das categorias,
+    # cujo nome aparece na resposta) para montar o ETag.
+    total = None
+    validators = None
+    if include_total:
+        filtered = query.subquery()
+        total, products_updated, categories_updated = (await db.execute(
+            select(func.count(), func.max(filtered.c.updated_at), func.max(Category.updated_at))
+            .select_from(filtered.outerjoin(Category, Category.id == filtered.c.category_id))
+        )).one()
+        validators = make_validators(
+            weak_etag(key, total, products_updated, categories_updated),
+            _latest(products_updated, categories_updated),
+        )
+        if conditional.is_not_modified(validators):
+            return conditional.not_modified(validators)
+    
+    # Ordenar com o ID como desempate para a paginação ser determinística
+    query = order_by_keyset(query, sort_column, Product.id, sort_order)
+    
+    # Aplicar paginação: por cursor (keyset) ou por offset.
+    # Busca um registro a mais para saber se existe próxima página.
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_by, sort_order)
+        query = query.filter(keyset_filter(sort_column, Product.id, value, last_id, sort_order))
+        page = None
+    else:
+        query = query.offset(skip)
+        page = (skip // limit) + 1
+    
+    # A categoria vem junto (AsyncSession não faz lazy load)
+    query = query.options(selectinload(Product.category)).limit(limit + 1)
+    rows = (await db.scalars(query)).all()
+    products, next_cursor = next_cursor_for(rows, limit, sort_by, sort_order, sort_value)
+    
+    if validators is None:
+        # Sem total: validadores a partir dos produtos da página
+        products_updated = max((product.updated_at for product in products), default=None)
+        categories_updated = max(
+            (product.category.updated_at for product in products if product.category),
+            default=None,
+        )
+        validators = make_validators(
+            weak_etag(key, [product.id for product in products], products_updated, categories_updated),
+            _latest(products_updated, categories_updated),
+        )
+        if conditional.is_not_modified(validators):
+            return conditional.not_modified(validators)
     
-    # Contar total de resultados (antes de paginar)
-    total = query.count()
-
-    # Aplicar paginação
-    products = query.offset(skip).limit(limit).all()
-
-    page = (skip // limit) + 1 if limit > 0 else 1
-    pages = (total + limit - 1) // limit if limit > 0 else 1
-
-    return ProductListResponse(items=products, total=total, page=page, pages=pages)
+    pages = (total + limit - 1) // limit if total is not None else None
+    
+    response = jsonable_encoder(ProductListResponse(
+        items=products,
+        total=total,
+        page=page,
+        pages=pages,
+        next_cursor=next_cursor,
+    ))
+    
+    tags = {"products"}
+    if category_id:
+        tags.add(f"category:{category_id}")
+    if in_stock is not None:
+        # Disponibilidade muda com as reservas dos carrinhos
+        tags.add("stock")
+    await response_cache.aset(
+        key, {"body": response, "validators": validators}, tags, generation=generation
+    )
+    
+    conditional.set_validators(validators)
+    return response
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product(
+async def get_product(
     product_id: int,
-    db: Session = Depends(get_db),
+    conditional: ConditionalRequest = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Obter um produto por ID.
     Endpoint público (não requer autenticação).
+    Responde 304 se o cliente já tem a versão atual (ETag/Last-Modified
+    calculados a partir de updated_at do produto e da categoria).
     
     Args:
         product_id: ID do produto
-        db: Sessão do banco de dados
+        conditional: Cabeçalhos condicionais da requisição
+        db: Sessão assíncrona do banco de dados
         
     Returns:
         ProductResponse: Dados do produto
@@ -185,7 +354,16 @@ def get_product(
     Raises:
         HTTPException: Se o produto não existe
     """
-    product = db.query(Product).filter(Product.id == product_id).first()
+    key = cache_key("products.detail", product_id=product_id)
+    cached = await response_cache.aget(key)
+    if cached is not None:
+        if conditional.is_not_modified(cached["validators"]):
+            return conditional.not_modified(cached["validators"])
+        conditional.set_validators(cached["validators"])
+        return cached["body"]
+    generation = response_cache.generation
+    
+    product = await db.get(Product, product_id, options=[selectinload(Product.category)])
     
     if not product:
         raise HTTPException(
@@ -193,7 +371,22 @@ def get_product(
             detail="Produto não encontrado",
         )
     
-    return product
+    category_updated = product.category.updated_at if product.category else None
+    validators = make_validators(
+        weak_etag(key, product.updated_at, category_updated),
+        _latest(product.updated_at, category_updated),
+    )
+    if conditional.is_not_modified(validators):
+        return conditional.not_modified(validators)
+    
+    response = jsonable_encoder(ProductResponse.model_validate(product))
+    tags = {f"product:{product.id}", f"category:{product.category_id}"}
+    await response_cache.aset(
+        key, {"body": response, "validators": validators}, tags, generation=generation
+    )
+    
+    conditional.set_validators(validators)
+    return response
 
 
 @router.put("/{product_id}", response_model=ProductResponse)
@@ -257,6 +450,7 @@ def update_product(
     
     if product_data.image_url is not None:
         product.image_url = product_data.image_url
+        product.image_variants = None  # URL externa: sem variantes
     
     if product_data.stock is not None:
         product.stock = product_data.stock
@@ -266,6 +460,7 @@ def update_product(
     
     db.commit()
     db.refresh(product)
+    search_index.index_product(product)
     
     return product
 
@@ -301,15 +496,13 @@ async def upload_product_image(
             detail="Produto não encontrado",
         )
     
-    # Deletar imagem antiga se existir
-    if product.image_url:
-        delete_image(product.image_url)
-    
-    # Salvar e otimizar nova imagem
-    image_path = await save_and_optimize_image(file)
+    # Salvar nova imagem em todas as variantes responsivas (a antiga é
+    # apagada após o commit se nenhum outro registro a usa; ver core/image_storage)
+    image_path, variants = await save_and_optimize_image(file)
     
     # Atualizar produto com novo caminho de imagem
     product.image_url = image_path
+    product.image_variants = variants
     db.commit()
     db.refresh(product)
     
@@ -345,4 +538,5 @@ def delete_product(
         )
     
     db.delete(product)
-    db.commit()
\ No newline at end of file
+    db.commit()
+    search_index.remove_product(product_id)
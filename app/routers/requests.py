@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from typing import Optional
 
 from app.dependencies import get_db, get_current_user
@@ -75,7 +75,13 @@ def list_my_requests(
         query = query.filter(ProductRequest.status == status_filter)
 
     total = query.count()
-    items = query.order_by(ProductRequest.created_at.desc()).offset(skip).limit(limit).all()
+    items = (
+        query.options(selectinload(ProductRequest.payments))
+        .order_by(ProductRequest.created_at.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
     page = (skip // limit) + 1 if limit > 0 else 1
     pages = (total + limit - 1) // limit if limit > 0 else 1
 
@@ -7,9 +7,19 @@ from app.schemas.order import (
     OrderResponse,
 )
 from app.models.product import Product
+from app.models.cart import Cart
 from app.models.order import Order, OrderItem
 from app.models.user import User
 from app.dependencies import get_db, get_current_user
+from app.crud.inventory import (
+    InsufficientStockError,
+    load_products_by_id,
+    load_stock_levels,
+    reserve_stock,
+)
+from app.crud.reservations import held_quantities, release_reservations
+from app.core.idempotency import Idempotency, IdempotencyRecord
+from app.core.response_cache import cache_key, response_cache
 
 router = APIRouter(prefix="/stock", tags=["Stock"])
 
@@ -30,26 +40,44 @@ def validate_stock(
     Returns:
         StockValidationResponse: Resultado da validação
     """
-    unavailable_items = []
-    
-    # Verificar estoque de cada item
+    # Somar quantidades por produto (o mesmo produto pode aparecer mais de uma vez)
+    quantities = {}
     for item in request.items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    
+    # Buscar o estoque de todos os produtos em uma única query
+    stock_by_id = load_stock_levels(db, quantities)
+    
+    unavailable_items = []
+    for product_id, quantity in quantities.items():
+        product = stock_by_id.get(product_id)
         
         if not product:
             unavailable_items.append({
-                "product_id": item.product_id,
-                "requested_quantity": item.quantity,
+                "product_id": product_id,
+                "requested_quantity": quantity,
                 "available_quantity": 0,
                 "reason": "Produto não encontrado",
             })
             continue
         
-        if product.stock < item.quantity:
+        if not product.is_active:
             unavailable_items.append({
-                "product_id": item.product_id,
+                "product_id": product_id,
                 "product_name": product.name,
-                "requested_quantity": item.quantity,
+                "requested_quantity": quantity,
+                "available_quantity": 0,
+                "reason": "Produto indisponível",
+            })
+            continue
+        
+        # Estoque físico: o endpoint é público e não sabe quais reservas são
+        # do próprio carrinho (o checkout confere as reservas de terceiros)
+        if product.stock < quantity:
+            unavailable_items.append({
+                "product_id": product_id,
+                "product_name": product.name,
+                "requested_quantity": quantity,
                 "available_quantity": product.stock,
                 "reason": f"Estoque insuficiente. Disponível: {product.stock}",
             })
@@ -59,9 +87,9 @@ def validate_stock(
     message = "Todos os itens têm estoque disponível" if is_valid else "Alguns itens não têm estoque suficiente"
     
     return StockValidationResponse(
-        is_valid=is_valid,
+        valid=is_valid,
         message=message,
-        unavailable_items=unavailable_items,
+        items_status=unavailable_items,
     )
 
 
@@ -70,15 +98,17 @@ def checkout(
     order_data: OrderCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
+    idempotency: IdempotencyRecord = Depends(Idempotency("stock.checkout")),
 ):
     """
     Fazer checkout e criar um pedido.
-    Requer autenticação.
+    Requer autenticação. Aceita o cabeçalho Idempotency-Key.
     
     Args:
         order_data: Dados do pedido
         current_user: Usuário autenticado
         db: Sessão do banco de dados
+        idempotency: Chave de idempotência da requisição
         
     Returns:
         OrderResponse: Dados do pedido criado
@@ -86,12 +116,24 @@ def checkout(
     Raises:
         HTTPException: Se há erro na validação de estoque ou dados inválidos
     """
+    # Somar quantidades por produto (o mesmo produto pode aparecer mais de uma vez)
+    quantities = {}
+    for item in order_data.items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    
+    # Buscar todos os produtos em uma única query
+    products_by_id = load_products_by_id(db, quantities)
+    
+    # Unidades reservadas pelo carrinho do usuário contam como disponíveis
+    cart_id = db.query(Cart.id).filter(Cart.user_id == current_user.id).scalar()
+    held = held_quantities(db, cart_id, quantities) if cart_id else {}
+    
     # Validar estoque de todos os itens
     unavailable_items = []
     total_price = 0.0
     
     for item in order_data.items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
+        product = products_by_id.get(item.product_id)
         
         if not product:
             raise HTTPException(
@@ -99,16 +141,17 @@ def checkout(
                 detail=f"Produto com ID {item.product_id} não encontrado",
             )
         
-        if product.stock < item.quantity:
+        available = product.available_stock + held.get(product.id, 0)
+        if available < quantities[item.product_id]:
             unavailable_items.append({
                 "product_id": item.product_id,
                 "product_name": product.name,
                 "requested_quantity": item.quantity,
-                "available_quantity": product.stock,
+                "available_quantity": available,
             })
         
-        # Calcular preço total
-        total_price += item.price * item.quantity
+        # Calcular preço total com o preço atual do produto
+        total_price += product.price * item.quantity
     
     # Se há itens sem estoque, retornar erro
     if unavailable_items:
@@ -131,27 +174,47 @@ def checkout(
     db.add(new_order)
     db.flush()  # Obter o ID do pedido sem fazer commit
     
-    # Criar itens do pedido e atualizar estoque
+    # Criar itens do pedido
     for item in order_data.items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        
-        # Criar item do pedido
-        order_item = OrderItem(
+        db.add(OrderItem(
             order_id=new_order.id,
             product_id=item.product_id,
             quantity=item.quantity,
-            price=item.price,
+            price=products_by_id[item.product_id].price,
+        ))
+    
+    # Baixar estoque com UPDATE condicional atômico (as reservas do próprio
+    # usuário para estes produtos viram a venda)
+    try:
+        if cart_id:
+            release_reservations(db, cart_id, quantities)
+        reserve_stock(db, quantities)
+    except InsufficientStockError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "O estoque mudou durante o checkout",
+                "unavailable_items": [
+                    {
+                        "product_id": product_id,
+                        "product_name": products_by_id[product_id].name,
+                        "requested_quantity": quantities[product_id],
+                    }
+                    for product_id in e.product_ids
+                ],
+            },
         )
-        
-        # Atualizar estoque do produto
-        product.stock -= item.quantity
-        
-        db.add(order_item)
     
-    db.commit()
+    db.flush()
     db.refresh(new_order)
+    response = OrderResponse.model_validate(new_order)
     
-    return new_order
+    # A resposta da Idempotency-Key é confirmada junto com o pedido
+    idempotency.save(response, status.HTTP_201_CREATED)
+    db.commit()
+    
+    return response
 
 
 @router.get("/products/{product_id}/available", status_code=status.HTTP_200_OK)
@@ -173,6 +236,12 @@ def get_product_availability(
     Raises:
         HTTPException: Se o produto não existe
     """
+    key = cache_key("stock.available", product_id=product_id)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+    generation = response_cache.generation
+    
     product = db.query(Product).filter(Product.id == product_id).first()
     
     if not product:
@@ -181,10 +250,15 @@ def get_product_availability(
             detail="Produto não encontrado",
         )
     
-    return {
+    # Unidades reservadas em carrinhos não estão disponíveis
+    available = product.available_stock
+    response = {
         "product_id": product.id,
         "product_name": product.name,
-        "available_quantity": product.stock,
-        "is_available": product.stock > 0,
-        "message": "Produto disponível" if product.stock > 0 else "Produto fora de estoque",
-    }
\ No newline at end of file
+        "available_quantity": available,
+        "is_available": available > 0,
+        "message": "Produto disponível" if available > 0 else "Produto fora de estoque",
+    }
+    response_cache.set(key, response, {f"product:{product.id}"}, generation=generation)
+    
+    return response
\ No newline at end of file
@@ -10,12 +10,19 @@ from app.schemas.cart import (
     CartItemCreate,
     CartItemResponse,
     CartResponse,
+    CartSummaryResponse,
+    CartOperationType,
+    CartBatchOperation,
+    CartBatchRequest,
+    CartOperationResult,
+    CartBatchResponse,
 )
 from app.schemas.order import (
     OrderItemCreate,
     OrderItemResponse,
     OrderCreate,
     OrderResponse,
+    OrderListResponse,
     OrderStatusEnum,
     StockValidationRequest,
     StockValidationResponse,
@@ -36,10 +43,17 @@ __all__ = [
     "CartItemCreate",
     "CartItemResponse",
     "CartResponse",
+    "CartSummaryResponse",
+    "CartOperationType",
+    "CartBatchOperation",
+    "CartBatchRequest",
+    "CartOperationResult",
+    "CartBatchResponse",
     "OrderItemCreate",
     "OrderItemResponse",
     "OrderCreate",
     "OrderResponse",
+    "OrderListResponse",
     "OrderStatusEnum",
     "StockValidationRequest",
     "StockValidationResponse",
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, validator
 from typing import List, Optional
 from datetime import datetime
+from enum import Enum
 
 
 class CartItemBase(BaseModel):
@@ -30,6 +31,7 @@ class CartItemResponse(CartItemBase):
     id: int
     cart_id: int
     price_at_time: float = Field(..., gt=0, description="Preço do produto no momento da adição")
+    subtotal: float = Field(..., description="price_at_time x quantity")
     created_at: datetime
     updated_at: datetime
     
@@ -37,24 +39,24 @@ class CartItemResponse(CartItemBase):
         from_attributes = True
 
 
+class CartSummaryResponse(BaseModel):
+    """Schema para os totais do carrinho (calculados no banco)."""
+    total_items: int = Field(0, description="Soma das quantidades")
+    distinct_items: int = Field(0, description="Número de produtos diferentes")
+    total_price: float = Field(0.0, description="Soma dos subtotais")
+
+
 class CartResponse(BaseModel):
-    """Schema para resposta do carrinho."""
+    """Schema para resposta do carrinho (totais calculados no banco)."""
     id: int
     user_id: int
     items: List[CartItemResponse] = []
+    total_items: int = Field(0, description="Soma das quantidades")
+    distinct_items: int = Field(0, description="Número de produtos diferentes")
+    total_price: float = Field(0.0, description="Soma dos subtotais")
     created_at: datetime
     updated_at: datetime
     
-    @property
-    def total_items(self) -> int:
-        """Calcular total de itens no carrinho."""
-        return sum(item.quantity for item in self.items)
-    
-    @property
-    def total_price(self) -> float:
-        """Calcular preço total do carrinho."""
-        return sum(item.price_at_time * item.quantity for item in self.items)
-    
     class Config:
         from_attributes = True
 
@@ -72,4 +74,48 @@ class CartItemUpdate(BaseModel):
             raise ValueError('Quantidade deve ser maior que 0')
         if v > 1000:
             raise ValueError('Quantidade não pode exceder 1000 unidades')
-        return v
\ No newline at end of file
+        return v
+
+
+class CartOperationType(str, Enum):
+    """Tipos de operação da alteração em lote do carrinho."""
+    ADD = "add"        # somar à quantidade atual (cria o item se não existe)
+    SET = "set"        # definir a quantidade (cria o item se não existe)
+    REMOVE = "remove"  # remover o item
+
+
+class CartBatchOperation(BaseModel):
+    """
+    Uma operação da alteração em lote.
+
+    Os valores são validados por operação no endpoint (e não aqui), para que
+    uma operação inválida seja reportada sem rejeitar as demais.
+    """
+    op: CartOperationType = Field(..., description="Operação: add, set ou remove")
+    product_id: int = Field(..., description="ID do produto")
+    quantity: Optional[int] = Field(None, description="Quantidade (obrigatória em add e set)")
+
+
+class CartBatchRequest(BaseModel):
+    """Schema para alterar vários itens do carrinho de uma vez."""
+    operations: List[CartBatchOperation] = Field(
+        ...,
+        min_items=1,
+        max_items=100,
+        description="Operações, aplicadas na ordem"
+    )
+
+
+class CartOperationResult(BaseModel):
+    """Resultado de uma operação da alteração em lote."""
+    index: int = Field(..., description="Posição da operação na requisição")
+    op: CartOperationType
+    product_id: int
+    success: bool
+    error: Optional[str] = Field(None, description="Motivo da falha")
+
+
+class CartBatchResponse(BaseModel):
+    """Schema para resposta da alteração em lote: carrinho final e resultado de cada operação."""
+    cart: CartResponse
+    results: List[CartOperationResult]
@@ -102,6 +102,12 @@ class OrderResponse(BaseModel):
         from_attributes = True
 
 
+class OrderListResponse(BaseModel):
+    """Schema para listagem de pedidos com total (admin)."""
+    items: List[OrderResponse]
+    total: int
+
+
 class OrderStatusUpdate(BaseModel):
     """Schema para atualizar status do pedido."""
     new_status: OrderStatusEnum = Field(..., description="Novo status do pedido")
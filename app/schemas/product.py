@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
@@ -149,6 +149,40 @@ class CategoryInProduct(BaseModel):
         from_attributes = True
 
 
+class ImageSource(BaseModel):
+    """Um formato da imagem, pronto para <source type="..." srcset="...">."""
+    type: str
+    srcset: str
+
+
+class ProductImageSet(BaseModel):
+    """Variantes responsivas da imagem do produto."""
+    src: str  # maior variante no formato original (fallback do <img>)
+    sources: List[ImageSource]  # WebP primeiro
+    widths: List[int]
+
+    @classmethod
+    def from_variants(cls, variants: Dict[str, Dict[str, str]]) -> "ProductImageSet":
+        """Montar a partir do mapa guardado em Product.image_variants."""
+        # WebP primeiro: o navegador usa o primeiro <source> que suporta
+        ordered = sorted(variants.items(), key=lambda item: item[0] != "image/webp")
+        sources = [
+            ImageSource(
+                type=mime,
+                srcset=", ".join(
+                    f"{url} {width}w" for width, url in sorted(by_width.items(), key=lambda i: int(i[0]))
+                ),
+            )
+            for mime, by_width in ordered
+        ]
+        fallback = ordered[-1][1]
+        return cls(
+            src=fallback[max(fallback, key=int)],
+            sources=sources,
+            widths=sorted({int(width) for _, by_width in ordered for width in by_width}),
+        )
+
+
 class ProductResponse(BaseModel):
     """Schema para resposta de produto."""
     id: int
@@ -160,11 +194,21 @@ class ProductResponse(BaseModel):
     category_id: int
     category: Optional[CategoryInProduct] = None
     image_url: Optional[str]
+    image_variants: Optional[ProductImageSet] = None
     stock: int
     is_active: bool
     created_at: datetime
     updated_at: datetime
 
+    @validator('image_variants', pre=True)
+    def build_image_set(cls, v):
+        """Converter o mapa {tipo MIME: {largura: URL}} do banco em srcset."""
+        if not v or isinstance(v, ProductImageSet):
+            return v or None
+        if isinstance(v, dict) and "sources" in v:
+            return v  # já serializado (ex.: vindo do cache de respostas)
+        return ProductImageSet.from_variants(v)
+
     class Config:
         from_attributes = True
 
@@ -172,9 +216,10 @@ class ProductResponse(BaseModel):
 class ProductListResponse(BaseModel):
     """Schema para resposta paginada de produtos."""
     items: List[ProductResponse]
-    total: int
-    page: int
-    pages: int
+    total: Optional[int] = None  # None quando include_total=false
+    page: Optional[int] = None  # None na paginação por cursor
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # None quando não há próxima página
 
 
 class ProductFilterParams(BaseModel):
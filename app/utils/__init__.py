@@ -7,11 +7,57 @@ from app.utils.image_handler import (
     delete_image,
     validate_image_file,
     create_upload_directory,
+    sniff_image_format,
+    spool_upload,
+    stream_upload,
+    generate_image_variants,
+    content_digest,
+    find_stored_image,
+    reuse_stored_image,
+    image_store_lock,
+    delete_stored_image,
+    stored_image_key,
 )
+from app.utils.pagination import (
+    encode_cursor,
+    decode_cursor,
+    keyset_filter,
+    order_by_keyset,
+    next_cursor_for,
+)
+from app.utils.conditional import (
+    ConditionalRequest,
+    weak_etag,
+    make_validators,
+    http_date,
+)
+from app.utils.static_files import UploadFiles, parse_range, strong_etag
 
 __all__ = [
     "save_and_optimize_image",
     "delete_image",
     "validate_image_file",
     "create_upload_directory",
+    "sniff_image_format",
+    "spool_upload",
+    "stream_upload",
+    "generate_image_variants",
+    "content_digest",
+    "find_stored_image",
+    "reuse_stored_image",
+    "image_store_lock",
+    "delete_stored_image",
+    "stored_image_key",
+    "encode_cursor",
+    "decode_cursor",
+    "keyset_filter",
+    "order_by_keyset",
+    "next_cursor_for",
+    "ConditionalRequest",
+    "weak_etag",
+    "make_validators",
+    "http_date",
+    "UploadFiles",
+    "parse_range",
+    "strong_etag",
 ]
\ No newline at end of file
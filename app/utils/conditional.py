@@ -0,0 +1,115 @@
+"""
+GET condicional (ETag / Last-Modified).
+
+As rotas calculam os validadores a partir de `updated_at` (e do número de
+registros, nas listagens) e chamam `ConditionalRequest.is_not_modified`
+antes de serializar a resposta. Se o cliente já tem a versão atual
+(`If-None-Match` ou `If-Modified-Since`), a rota responde 304 sem corpo.
+
+Os ETags são fracos (W/"..."): dizem que a representação é equivalente,
+não idêntica byte a byte. A precisão é a de `updated_at` no banco.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+from fastapi import Request, Response, status
+
+
+def weak_etag(*parts: Any) -> str:
+    """
+    Gerar um ETag fraco a partir das partes informadas.
+
+    Args:
+        *parts: Valores que identificam a versão da resposta (parâmetros da
+            requisição, maior updated_at, número de registros...)
+
+    Returns:
+        str: ETag no formato W/"<hash>"
+    """
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()[:20]}"'
+
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    """Formatar um datetime (UTC, com ou sem fuso) como data HTTP."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def make_validators(etag: str, last_modified: Optional[datetime]) -> dict:
+    """
+    Montar os validadores de uma resposta (formato serializável em JSON,
+    para poder ser guardado junto com a resposta no cache).
+    """
+    return {"etag": etag, "last_modified": http_date(last_modified)}
+
+
+class ConditionalRequest:
+    """
+    Dependency com os cabeçalhos condicionais da requisição.
+
+    Uso na rota:
+        validators = make_validators(weak_etag(...), updated_at)
+        if conditional.is_not_modified(validators):
+            return conditional.not_modified(validators)
+        conditional.set_validators(validators)
+    """
+
+    def __init__(self, request: Request, response: Response):
+        self.if_none_match = request.headers.get("if-none-match")
+        self.if_modified_since = request.headers.get("if-modified-since")
+        self.response = response
+
+    def is_not_modified(self, validators: dict) -> bool:
+        """
+        Verificar se o cliente já tem a versão atual.
+
+        If-None-Match tem precedência: se veio, If-Modified-Since é ignorado.
+        """
+        if self.if_none_match is not None:
+            return _etag_matches(self.if_none_match, validators["etag"])
+
+        if self.if_modified_since and validators.get("last_modified"):
+            try:
+                since = parsedate_to_datetime(self.if_modified_since)
+                modified = parsedate_to_datetime(validators["last_modified"])
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return modified <= since
+
+        return False
+
+    def not_modified(self, validators: dict) -> Response:
+        """Resposta 304, sem corpo, com os validadores atuais."""
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=_validator_headers(validators),
+        )
+
+    def set_validators(self, validators: dict) -> None:
+        """Adicionar ETag e Last-Modified à resposta 200."""
+        self.response.headers.update(_validator_headers(validators))
+
+
+def _validator_headers(validators: dict) -> dict:
+    headers = {"ETag": validators["etag"]}
+    if validators.get("last_modified"):
+        headers["Last-Modified"] = validators["last_modified"]
+    return headers
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparação fraca (ignora o prefixo W/) contra a lista do If-None-Match."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    candidates = (candidate.strip().removeprefix("W/") for candidate in if_none_match.split(","))
+    return opaque in candidates
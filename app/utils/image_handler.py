@@ -1,10 +1,24 @@
-﻿import logging
+﻿import hashlib
+import json
+import logging
 import os
-import uuid
+import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
+from tempfile import NamedTemporaryFile, SpooledTemporaryFile
+from typing import BinaryIO, Optional, Tuple
 from PIL import Image
-from io import BytesIO
 from fastapi import UploadFile, HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from app.core.image_processor import process_image
+
+try:
+    import fcntl
+except ImportError:  # Windows: só o lock entre threads
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
@@ -15,95 +29,490 @@ MAX_FILE_SIZE = 5 * 1024 * 1024  # 5 MB
 MAX_IMAGE_WIDTH = 1200
 MAX_IMAGE_HEIGHT = 1200
 
+# Variantes responsivas geradas no upload (larguras em px)
+VARIANT_WIDTHS = (200, 400, 800, 1200)
+VARIANT_MIME_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+# Identifica os parâmetros do pipeline na chave de conteúdo (mudar invalida a deduplicação)
+VARIANT_PIPELINE = f"v1:{','.join(map(str, VARIANT_WIDTHS))}:{MAX_IMAGE_WIDTH}x{MAX_IMAGE_HEIGHT}"
+
+UPLOAD_URL_PREFIX = "uploads/products/"
+
+# Reserva de uma imagem reaproveitada até a requisição gravar a referência
+REUSE_LEASE_SECONDS = 10 * 60
+_VARIANT_NAME = re.compile(r"^(.+)-\d+w\.[a-z]+$")
+_MANIFEST_NAME = re.compile(r"^([0-9a-f]{64})\.json$")
+
 
 def create_upload_directory():
     """Criar diretório de upload se não existir."""
     UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 
+# Assinaturas (magic bytes) aceitas -> formato do Pillow
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "JPEG"),
+    (b"\x89PNG\r\n\x1a\n", "PNG"),
+)
+FORMAT_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp"}
+
+# Leitura em blocos: o upload nunca é carregado inteiro na memória
+UPLOAD_CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_MEMORY = 1024 * 1024  # acima disso o arquivo temporário vai para o disco
+
+
+def sniff_image_format(header: bytes) -> Optional[str]:
+    """
+    Identificar o formato da imagem pelos primeiros bytes do arquivo.
+
+    Args:
+        header: Início do arquivo (12 bytes bastam)
+
+    Returns:
+        Optional[str]: "JPEG", "PNG" ou "WEBP"; None se não for um formato aceito
+    """
+    for signature, image_format in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_format
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "WEBP"
+    return None
+
+
+class StreamedUpload:
+    """
+    Upload já copiado para um arquivo temporário (memória até
+    SPOOL_MAX_MEMORY, disco depois disso), com o formato detectado e o
+    sha256 do conteúdo.
+    """
+
+    def __init__(self, file: SpooledTemporaryFile, image_format: str, size: int, sha256: str):
+        self.file = file
+        self.format = image_format
+        self.size = size
+        self.sha256 = sha256
+
+    @property
+    def extension(self) -> str:
+        return FORMAT_EXTENSIONS[self.format]
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "StreamedUpload":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _file_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Arquivo muito grande. Máximo: {MAX_FILE_SIZE // (1024 * 1024)} MB",
+    )
+
+
+def _invalid_format() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Formato de arquivo não permitido. Aceitos: {', '.join(sorted(ALLOWED_EXTENSIONS))}",
+    )
+
+
 def validate_image_file(file: UploadFile) -> None:
     """
-    Validar arquivo de imagem.
-    
+    Rejeitar cedo uploads cujo tamanho declarado já passa do limite.
+
+    O formato não é mais deduzido da extensão do nome do arquivo: ele é
+    detectado pelo conteúdo em `stream_upload`.
+
     Args:
         file: Arquivo enviado
         
     Raises:
-        HTTPException: Se o arquivo não é válido
+        HTTPException: Se o tamanho declarado passa de MAX_FILE_SIZE
     """
-    # Validar extensão
-    file_extension = file.filename.split(".")[-1].lower()
-    if file_extension not in ALLOWED_EXTENSIONS:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Formato de arquivo não permitido. Aceitos: {', '.join(ALLOWED_EXTENSIONS)}"
-        )
-    
-    # Validar tamanho (verificar no content-length)
     if file.size and file.size > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"Arquivo muito grande. Máximo: 5 MB"
-        )
+        raise _file_too_large()
 
 
-async def save_and_optimize_image(file: UploadFile) -> str:
+def spool_upload(
+    source: BinaryIO,
+    max_size: Optional[int] = None,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> StreamedUpload:
     """
-    Salvar e otimizar imagem.
-    
+    Copiar o upload em blocos para um arquivo temporário, validando no caminho.
+
+    O formato é verificado no primeiro bloco (um arquivo que não é imagem é
+    rejeitado sem ser lido até o fim) e a cópia é interrompida assim que o
+    total passa de `max_size`. Faz I/O bloqueante: em rotas async, use
+    `stream_upload`.
+
     Args:
-        file: Arquivo de imagem
-        
+        source: Arquivo de origem (ex.: `UploadFile.file`)
+        max_size: Tamanho máximo em bytes (padrão: MAX_FILE_SIZE)
+        chunk_size: Tamanho de cada bloco lido
+
     Returns:
-        str: Caminho relativo da imagem salva
-        
+        StreamedUpload: Arquivo temporário posicionado no início (fechar após o uso)
+
     Raises:
-        HTTPException: Se houver erro ao processar a imagem
+        HTTPException: 413 se passar do limite, 400 se o formato não é aceito
     """
+    if max_size is None:
+        max_size = MAX_FILE_SIZE
+    spooled = SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
     try:
-        # Validar arquivo
-        validate_image_file(file)
-        
-        # Criar diretório se não existir
-        create_upload_directory()
-        
-        # Ler arquivo
-        contents = await file.read()
-        
-        # Validar tamanho novamente
-        if len(contents) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"Arquivo muito grande. Máximo: 5 MB"
-            )
-        
-        # Abrir imagem com Pillow
-        image = Image.open(BytesIO(contents))
-        
+        image_format = None
+        size = 0
+        digest = hashlib.sha256()
+        while chunk := source.read(chunk_size):
+            size += len(chunk)
+            if size > max_size:
+                raise _file_too_large()
+            spooled.write(chunk)
+            digest.update(chunk)
+            if image_format is None and size >= 12:
+                # O primeiro bloco pode vir curto; decidir quando houver 12 bytes
+                spooled.seek(0)
+                image_format = sniff_image_format(spooled.read(12))
+                spooled.seek(0, os.SEEK_END)
+                if image_format is None:
+                    raise _invalid_format()
+
+        if image_format is None:
+            raise _invalid_format()
+
+        spooled.seek(0)
+        return StreamedUpload(spooled, image_format, size, digest.hexdigest())
+    except BaseException:
+        spooled.close()
+        raise
+
+
+async def stream_upload(file: UploadFile, max_size: Optional[int] = None) -> StreamedUpload:
+    """
+    Versão de `spool_upload` para rotas async (a cópia roda no threadpool).
+
+    Args:
+        file: Arquivo enviado
+        max_size: Tamanho máximo em bytes (padrão: MAX_FILE_SIZE)
+
+    Returns:
+        StreamedUpload: Arquivo temporário com o formato detectado
+    """
+    validate_image_file(file)
+    await file.seek(0)
+    return await run_in_threadpool(spool_upload, file.file, max_size)
+
+
+def _save_variant(image: Image.Image, path: Path, image_format: str) -> None:
+    # Gravar em um temporário e renomear: quem lê o arquivo (ou um upload
+    # idêntico concorrente) nunca vê uma variante pela metade
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    if image_format == "JPEG":
+        image.save(tmp_path, "JPEG", quality=85, optimize=True)
+    elif image_format == "PNG":
+        image.save(tmp_path, "PNG", optimize=True)
+    elif image_format == "WEBP":
+        image.save(tmp_path, "WEBP", quality=80, method=4)
+    os.replace(tmp_path, path)
+
+
+def generate_image_variants(source_path: str, image_format: str, dest_dir: str, stem: str) -> dict:
+    """
+    Gerar todas as variantes responsivas a partir de uma única decodificação
+    (trabalho de CPU, executado no pool de processos de `app.core.image_processor`).
+
+    Cada largura de VARIANT_WIDTHS (limitada ao tamanho original, sem
+    ampliar) é salva em WebP e no formato original. As reduções são feitas em
+    cascata, da maior para a menor, a partir da variante anterior.
+
+    Args:
+        source_path: Arquivo original, já validado
+        image_format: Formato detectado pelos magic bytes ("JPEG", "PNG", "WEBP")
+        dest_dir: Diretório de destino
+        stem: Prefixo dos arquivos gerados ("<stem>-<largura>w.<ext>")
+
+    Returns:
+        dict: {tipo MIME: {largura: nome do arquivo}}, com larguras como string
+    """
+    formats = ["WEBP"] if image_format == "WEBP" else ["WEBP", image_format]
+    variants = {VARIANT_MIME_TYPES[fmt]: {} for fmt in formats}
+
+    # open é preguiçoso (lê o cabeçalho) e só aceita o decodificador detectado
+    with Image.open(source_path, formats=[image_format]) as image:
         # Converter RGBA para RGB se necessário (para JPEG)
         if image.mode in ("RGBA", "LA", "P"):
             rgb_image = Image.new("RGB", image.size, (255, 255, 255))
             rgb_image.paste(image, mask=image.split()[-1] if image.mode == "RGBA" else None)
             image = rgb_image
+        elif image.mode not in ("RGB", "L"):
+            # CMYK/YCbCr etc. não são aceitos pelo encoder WebP
+            image = image.convert("RGB")
+
+        current = image
+        for width in sorted(VARIANT_WIDTHS, reverse=True):
+            variant = current.copy()
+            # Caixa com a mesma proporção do limite máximo (1200x1200)
+            variant.thumbnail(
+                (width, width * MAX_IMAGE_HEIGHT // MAX_IMAGE_WIDTH),
+                Image.Resampling.LANCZOS,
+            )
+            actual_width = str(variant.width)
+            if any(actual_width in by_width for by_width in variants.values()):
+                continue  # imagem menor que a largura pedida: já gerada
+            for fmt in formats:
+                filename = f"{stem}-{actual_width}w.{FORMAT_EXTENSIONS[fmt]}"
+                _save_variant(variant, Path(dest_dir) / filename, fmt)
+                variants[VARIANT_MIME_TYPES[fmt]][actual_width] = filename
+            current = variant
+
+    return variants
+
+
+# ============================================================================
+# ARMAZENAMENTO ENDEREÇADO POR CONTEÚDO
+# ============================================================================
+
+def content_digest(upload_sha256: str) -> str:
+    """
+    Chave de armazenamento de uma imagem.
+
+    As variantes são função determinística dos bytes enviados e dos
+    parâmetros do pipeline, então o hash dos dois identifica a saída
+    normalizada sem precisar gerá-la: um upload idêntico é reconhecido
+    antes de qualquer reprocessamento. Mudar os parâmetros muda as chaves.
+
+    Args:
+        upload_sha256: sha256 do arquivo enviado (`StreamedUpload.sha256`)
+
+    Returns:
+        str: sha256 em hexadecimal (64 caracteres)
+    """
+    return hashlib.sha256(f"{VARIANT_PIPELINE}:{upload_sha256}".encode()).hexdigest()
+
+
+def _manifest_path(key: str) -> Path:
+    return UPLOAD_DIR / f"{key}.json"
+
+
+_store_lock = threading.Lock()
+
+
+@contextmanager
+def image_store_lock():
+    """
+    Serializar o reaproveitamento e a remoção das imagens armazenadas.
+
+    Vale entre as threads (threading.Lock) e entre os workers da máquina
+    (flock em um arquivo ao lado de UPLOAD_DIR, fora do diretório servido).
+    """
+    with _store_lock:
+        if fcntl is None:
+            yield
+            return
+        UPLOAD_DIR.parent.mkdir(parents=True, exist_ok=True)
+        with open(UPLOAD_DIR.parent / f".{UPLOAD_DIR.name}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def find_stored_image(key: str) -> Optional[dict]:
+    """
+    Procurar uma imagem já armazenada com essa chave.
+
+    O manifesto ("<chave>.json") é gravado depois de todas as variantes,
+    então a existência dele indica uma imagem completa.
+
+    Returns:
+        Optional[dict]: {"format": ..., "variants": {tipo MIME: {largura: arquivo}}}
+            ou None se não existe (ou falta algum arquivo)
+    """
+    try:
+        manifest = json.loads(_manifest_path(key).read_text())
+    except (OSError, ValueError):
+        return None
+    filenames = [name for by_width in manifest["variants"].values() for name in by_width.values()]
+    if not all((UPLOAD_DIR / name).exists() for name in filenames):
+        return None
+    return manifest
+
+
+def _stored_image_paths(key: str, manifest: Optional[dict] = None) -> list:
+    """Arquivos de uma imagem: variantes e manifesto, ou o arquivo antigo (uuid)."""
+    manifest = manifest or find_stored_image(key)
+    if manifest is not None:
+        paths = [UPLOAD_DIR / name for by_width in manifest["variants"].values() for name in by_width.values()]
+    else:
+        paths = list(UPLOAD_DIR.glob(f"{key}-*w.*"))
+    return paths + [UPLOAD_DIR / key, _manifest_path(key)]
+
+
+def reuse_stored_image(key: str) -> Optional[dict]:
+    """
+    Reaproveitar uma imagem já armazenada, reservando-a.
+
+    Entre devolver os caminhos e o commit da nova referência, outra
+    transação pode remover a última referência existente e apagar os
+    arquivos. A reserva evita isso: o mtime dos arquivos vai para
+    REUSE_LEASE_SECONDS no futuro, e nem a remoção após o commit nem o
+    coletor de órfãos apagam arquivos com mtime futuro. O commit que grava
+    a referência libera a reserva (`release_image_lease`).
+
+    Returns:
+        Optional[dict]: O manifesto (como em `find_stored_image`) ou None
+    """
+    with image_store_lock():
+        manifest = find_stored_image(key)
+        if manifest is None:
+            return None
+        until = time.time() + REUSE_LEASE_SECONDS
+        for path in _stored_image_paths(key, manifest):
+            try:
+                os.utime(path, (until, until))
+            except FileNotFoundError:
+                continue
+    return manifest
+
+
+def image_is_leased(key: str) -> bool:
+    """Se a imagem está reservada por um reaproveitamento ainda não confirmado."""
+    now = time.time()
+    for path in _stored_image_paths(key):
+        try:
+            if path.stat().st_mtime > now:
+                return True
+        except FileNotFoundError:
+            continue
+    return False
+
+
+def release_image_lease(key: str) -> None:
+    """Liberar a reserva de `reuse_stored_image` (a referência já foi gravada)."""
+    now = time.time()
+    for path in _stored_image_paths(key):
+        try:
+            if path.stat().st_mtime > now:
+                os.utime(path, (now, now))
+        except FileNotFoundError:
+            continue
+
+
+def _write_manifest(key: str, image_format: str, variants: dict) -> dict:
+    manifest = {"format": image_format, "variants": variants}
+    path = _manifest_path(key)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(manifest))
+    os.replace(tmp_path, path)
+    return manifest
+
+
+def delete_stored_image(key: str) -> int:
+    """
+    Deletar todos os arquivos de uma imagem armazenada.
+
+    Aceita a chave de conteúdo (variantes + manifesto) e também nomes
+    antigos (uuid, com ou sem variantes), que não têm manifesto.
+
+    Args:
+        key: Chave devolvida por `stored_image_key`
+
+    Returns:
+        int: Bytes liberados
+    """
+    reclaimed = 0
+    for path in _stored_image_paths(key):
+        try:
+            size = path.stat().st_size
+            path.unlink()
+            reclaimed += size
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            logger.warning("Erro ao deletar imagem '%s': %s", path, e)
+    return reclaimed
+
+
+def stored_image_key(url: Optional[str]) -> Optional[str]:
+    """
+    Chave da imagem local referenciada por uma URL (None para URLs externas).
+
+    "/uploads/products/<chave>-400w.webp" (ou o manifesto "<chave>.json")
+    -> "<chave>"; arquivos antigos sem
+    variantes ("uploads/products/<uuid>.jpg") usam o próprio nome.
+    """
+    if not url:
+        return None
+    path = url.lstrip("/")
+    if not path.startswith(UPLOAD_URL_PREFIX):
+        return None
+    name = path[len(UPLOAD_URL_PREFIX):]
+    if not name or "/" in name:
+        return None
+    match = _VARIANT_NAME.match(name) or _MANIFEST_NAME.match(name)
+    return match.group(1) if match else name
+
+
+def _copy_to_named_file(upload: StreamedUpload) -> str:
+    """Copiar o upload para um arquivo com nome, que o pool de processos consiga abrir."""
+    with NamedTemporaryFile(suffix=f".{upload.extension}", delete=False) as target:
+        shutil.copyfileobj(upload.file, target)
+    return target.name
+
+
+async def save_and_optimize_image(file: UploadFile) -> Tuple[str, dict]:
+    """
+    Salvar a imagem em todas as variantes responsivas.
+
+    O upload é validado em blocos (`stream_upload`) e o Pillow roda no pool
+    de processos de imagens, sem travar o event loop. Os arquivos são
+    nomeados pela chave de conteúdo (`content_digest`): se a mesma imagem
+    já foi enviada, os caminhos existentes são devolvidos sem reprocessar.
+    
+    Args:
+        file: Arquivo de imagem
         
-        # Redimensionar se necessário
-        image.thumbnail((MAX_IMAGE_WIDTH, MAX_IMAGE_HEIGHT), Image.Resampling.LANCZOS)
-        
-        # Gerar nome único para o arquivo
-        file_extension = file.filename.split(".")[-1].lower()
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
-        file_path = UPLOAD_DIR / unique_filename
-        
-        # Salvar imagem otimizada
-        if file_extension in ("jpg", "jpeg"):
-            image.save(file_path, "JPEG", quality=85, optimize=True)
-        elif file_extension == "png":
-            image.save(file_path, "PNG", optimize=True)
-        elif file_extension == "webp":
-            image.save(file_path, "WEBP", quality=85)
+    Returns:
+        Tuple[str, dict]: Caminho relativo da maior variante no formato
+            original (usado como `image_url`) e o mapa de variantes
+            {tipo MIME: {largura: URL}}, guardado em `Product.image_variants`
         
-        # Retornar caminho relativo
-        return f"uploads/products/{unique_filename}"
+    Raises:
+        HTTPException: Se houver erro ao processar a imagem (503 se a fila
+            de processamento estiver cheia)
+    """
+    source_path = None
+    try:
+        with await stream_upload(file) as upload:
+            key = content_digest(upload.sha256)
+            manifest = await run_in_threadpool(reuse_stored_image, key)
+            if manifest is None:
+                source_path = await run_in_threadpool(_copy_to_named_file, upload)
+            image_format = upload.format
+
+        if manifest is None:
+            create_upload_directory()
+            filenames = await process_image(
+                generate_image_variants, source_path, image_format, str(UPLOAD_DIR), key
+            )
+            manifest = await run_in_threadpool(_write_manifest, key, image_format, filenames)
+        else:
+            logger.info("Imagem já armazenada, reaproveitando: %s", key)
+
+        variants = {
+            mime: {width: f"/{UPLOAD_URL_PREFIX}{filename}" for width, filename in by_width.items()}
+            for mime, by_width in manifest["variants"].items()
+        }
+
+        # Retornar caminho relativo da maior variante no formato original
+        original = manifest["variants"][VARIANT_MIME_TYPES[manifest["format"]]]
+        largest = max(original, key=int)
+        return f"{UPLOAD_URL_PREFIX}{original[largest]}", variants
     
     except HTTPException:
         raise
@@ -112,6 +521,9 @@ async def save_and_optimize_image(file: UploadFile) -> str:
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao processar imagem: {str(e)}"
         )
+    finally:
+        if source_path:
+            Path(source_path).unlink(missing_ok=True)
 
 
 def delete_image(image_path: str) -> None:
@@ -119,9 +531,10 @@ def delete_image(image_path: str) -> None:
     Deletar imagem do servidor.
     
     Args:
-        image_path: Caminho da imagem
+        image_path: Caminho da imagem ("uploads/..." ou "/uploads/...")
     """
     try:
+        image_path = image_path.lstrip("/") if image_path else image_path
         if image_path and image_path.startswith("uploads/"):
             file_path = Path(image_path)
             if file_path.exists():
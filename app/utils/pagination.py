@@ -0,0 +1,134 @@
+"""
+Paginação por cursor (keyset).
+
+Em vez de `OFFSET n`, que obriga o banco a percorrer e descartar todas as
+linhas anteriores, a próxima página é buscada a partir do último registro
+visto: `WHERE (coluna, id) < (:valor, :id) ORDER BY coluna, id`. O custo de
+cada página é o mesmo, não importa quão fundo o cliente esteja na lista.
+
+O cursor é opaco para o cliente: um JSON codificado em base64 url-safe com
+a ordenação usada, o valor da coluna e o ID do último registro da página.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, last_id: int) -> str:
+    """
+    Gerar o cursor opaco da próxima página.
+
+    Args:
+        sort_by: Campo de ordenação usado na listagem
+        sort_order: Ordem de classificação (asc, desc)
+        value: Valor da coluna de ordenação no último registro da página
+        last_id: ID do último registro da página
+
+    Returns:
+        str: Cursor codificado
+    """
+    if isinstance(value, datetime):
+        value = {"dt": value.isoformat()}
+
+    payload = {"s": sort_by, "o": sort_order, "v": value, "id": last_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> Tuple[Any, int]:
+    """
+    Decodificar um cursor e validar que ele pertence à mesma ordenação.
+
+    Args:
+        cursor: Cursor recebido do cliente
+        sort_by: Campo de ordenação da requisição atual
+        sort_order: Ordem de classificação da requisição atual
+
+    Returns:
+        Tuple[Any, int]: Valor da coluna de ordenação e ID do último registro
+
+    Raises:
+        HTTPException: Se o cursor é inválido ou foi gerado para outra ordenação
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = payload["v"]
+        last_id = int(payload["id"])
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["dt"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginação inválido",
+        )
+
+    if payload.get("s") != sort_by or payload.get("o") != sort_order:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginação não corresponde à ordenação solicitada",
+        )
+
+    return value, last_id
+
+
+def keyset_filter(sort_column, id_column, value: Any, last_id: int, sort_order: str):
+    """
+    Montar a condição que seleciona os registros depois do cursor.
+
+    Equivale a `(sort_column, id_column) > (value, last_id)` (ou `<` em ordem
+    decrescente), escrito com AND/OR para funcionar em qualquer banco.
+
+    Args:
+        sort_column: Coluna de ordenação
+        id_column: Coluna de desempate (chave primária)
+        value: Valor da coluna de ordenação no cursor
+        last_id: ID no cursor
+        sort_order: Ordem de classificação (asc, desc)
+    """
+    if sort_order == "asc":
+        return or_(
+            sort_column > value,
+            and_(sort_column == value, id_column > last_id),
+        )
+    return or_(
+        sort_column < value,
+        and_(sort_column == value, id_column < last_id),
+    )
+
+
+def order_by_keyset(query, sort_column, id_column, sort_order: str):
+    """Ordenar a query pela coluna de ordenação com o ID como desempate."""
+    if sort_order == "asc":
+        return query.order_by(sort_column.asc(), id_column.asc())
+    return query.order_by(sort_column.desc(), id_column.desc())
+
+
+def next_cursor_for(rows: list, limit: int, sort_by: str, sort_order: str, sort_value: Callable[[Any], Any]) -> Tuple[list, Optional[str]]:
+    """
+    Separar a página dos resultados e gerar o cursor da próxima página.
+
+    A query deve buscar `limit + 1` registros: se veio o registro extra,
+    existe próxima página.
+
+    Args:
+        rows: Registros retornados pela query (até limit + 1)
+        limit: Tamanho da página
+        sort_by: Campo de ordenação usado na listagem
+        sort_order: Ordem de classificação (asc, desc)
+        sort_value: Função que extrai de um registro o valor da coluna de ordenação
+
+    Returns:
+        Tuple[list, Optional[str]]: Registros da página e cursor da próxima
+    """
+    if len(rows) <= limit:
+        return rows, None
+
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(sort_by, sort_order, sort_value(last), last.id)
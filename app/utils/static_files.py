@@ -0,0 +1,217 @@
+"""
+Arquivos enviados (/uploads) com cache de longa duração.
+
+Os nomes dos uploads são únicos e nunca sobrescritos (imagens de produto
+são nomeadas pelo conteúdo; ver `image_handler.content_digest`), então as
+respostas podem ser marcadas como imutáveis: o navegador guarda o arquivo
+por um ano e não volta ao servidor a cada visualização de página.
+
+Além do Cache-Control, `UploadFiles`:
+    - usa ETag forte (o próprio nome, quando ele é um hash de conteúdo;
+      senão tamanho + mtime) e responde 304 a If-None-Match/If-Modified-Since;
+    - atende Range de um intervalo (206/416), respeitando If-Range;
+    - usa as extensões ASGI de envio sem cópia quando o servidor as oferece
+      (`http.response.pathsend` e `http.response.zerocopysend`); senão, lê o
+      arquivo em blocos.
+"""
+
+import calendar
+import os
+import re
+from email.utils import formatdate, parsedate
+from mimetypes import guess_type
+from typing import Optional, Tuple
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Receive, Scope, Send
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_CONTENT_ADDRESSED_NAME = re.compile(r"^[0-9a-f]{64}([-.]|$)")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    """O Range pedido não tem nenhum byte dentro do arquivo."""
+
+
+def strong_etag(path: str, stat_result: os.stat_result) -> str:
+    """
+    ETag forte de um arquivo enviado.
+
+    Para nomes endereçados por conteúdo o próprio nome já identifica os
+    bytes (e é igual em todos os servidores); para os demais, tamanho e mtime.
+    """
+    name = os.path.basename(path)
+    if _CONTENT_ADDRESSED_NAME.match(name):
+        return f'"{name}"'
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpretar um cabeçalho Range de um único intervalo.
+
+    Args:
+        header: Valor do cabeçalho (ex.: "bytes=0-1023", "bytes=-500")
+        size: Tamanho do arquivo
+
+    Returns:
+        Optional[Tuple[int, int]]: (início, fim inclusivo), ou None se o
+            cabeçalho deve ser ignorado (inválido ou com vários intervalos;
+            nesses casos o arquivo inteiro é enviado)
+
+    Raises:
+        RangeNotSatisfiable: Se o intervalo começa depois do fim do arquivo
+    """
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Sufixo: os últimos N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+class UploadFileResponse(Response):
+    """
+    Resposta com o arquivo inteiro ou um intervalo dele.
+
+    Prefere as extensões ASGI de envio sem cópia; sem elas, lê em blocos.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        headers: dict,
+        byte_range: Tuple[int, int],
+        size: int,
+        status_code: int = 200,
+    ):
+        self.path = path
+        self.status_code = status_code
+        self.media_type = guess_type(path)[0] or "application/octet-stream"
+        self.background = None
+        self.start, self.end = byte_range
+        self.full = self.start == 0 and self.end == size - 1
+        headers = {**headers, "content-length": str(self.end - self.start + 1)}
+        if status_code == 206:
+            headers["content-range"] = f"bytes {self.start}-{self.end}/{size}"
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        extensions = scope.get("extensions") or {}
+        count = self.end - self.start + 1
+        if self.full and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": os.path.abspath(self.path)})
+        elif "http.response.zerocopysend" in extensions:
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": self.start,
+                    "count": count,
+                })
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(self.start)
+                remaining = count
+                more_body = True
+                while more_body:
+                    chunk = await file.read(min(self.chunk_size, remaining)) if remaining > 0 else b""
+                    remaining -= len(chunk)
+                    more_body = remaining > 0 and bool(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+
+class UploadFiles(StaticFiles):
+    """
+    StaticFiles para /uploads: Cache-Control imutável, ETag forte,
+    GET condicional e Range.
+    """
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        size = stat_result.st_size
+        etag = strong_etag(full_path, stat_result)
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        headers = {
+            "cache-control": IMMUTABLE_CACHE_CONTROL,
+            "etag": etag,
+            "last-modified": last_modified,
+            "accept-ranges": "bytes",
+        }
+
+        if self._is_not_modified(request_headers, etag, stat_result):
+            return Response(status_code=304, headers=headers)
+
+        byte_range = None
+        range_header = request_headers.get("range")
+        if range_header and self._if_range_matches(request_headers, etag, last_modified):
+            try:
+                byte_range = parse_range(range_header, size)
+            except RangeNotSatisfiable:
+                return Response(
+                    status_code=416,
+                    headers={**headers, "content-range": f"bytes */{size}"},
+                )
+
+        if byte_range is None:
+            return UploadFileResponse(full_path, headers, (0, size - 1), size, status_code)
+        return UploadFileResponse(full_path, headers, byte_range, size, 206)
+
+    @staticmethod
+    def _is_not_modified(request_headers: Headers, etag: str, stat_result: os.stat_result) -> bool:
+        # If-None-Match usa comparação fraca e tem precedência sobre If-Modified-Since
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            if if_none_match.strip() == "*":
+                return True
+            return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+        if_modified_since = parsedate(request_headers.get("if-modified-since", ""))
+        if if_modified_since is None:
+            return False
+        return int(stat_result.st_mtime) <= calendar.timegm(if_modified_since[:6])
+
+    @staticmethod
+    def _if_range_matches(request_headers: Headers, etag: str, last_modified: str) -> bool:
+        # Sem If-Range, o Range vale; com ele, só se o arquivo não mudou
+        # (comparação forte do ETag, ou data idêntica ao Last-Modified)
+        if_range = request_headers.get("if-range")
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith('"') or if_range.startswith("W/"):
+            return if_range == etag
+        return if_range == last_modified
+
@@ -0,0 +1,196 @@
+"""
+Benchmark do histórico de pedidos (GET /orders) com e sem os índices compostos.
+
+Popula a tabela de pedidos com um cliente de N pedidos (padrão: 50.000) em
+meio aos pedidos de outros clientes e mede a latência de `list_orders` na
+primeira página e em uma página profunda (metade do histórico), por offset
+e por cursor, primeiro sem os índices declarados em `Order.__table_args__` e
+depois com eles.
+
+Execute:
+    python -m benchmarks.bench_order_history --database-url postgresql://... --orders 50000
+    python -m benchmarks.bench_order_history --database-url sqlite:///./bench.db
+
+ATENÇÃO: o script apaga e recria as tabelas no banco informado.
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from fastapi import Response
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import Base, async_database_url
+from app.models.order import Order, OrderStatus
+from app.models.user import User
+from app.routers.orders import list_orders
+
+
+CUSTOMER_ID = 1
+PAGE_SIZE = 20
+BATCH_SIZE = 10_000
+
+# Filtro -> (parâmetros, fração do histórico que passa no filtro)
+FILTERS = {
+    "sem filtro": ({}, 1),
+    "status": ({"status_filter": OrderStatus.DELIVERED.value}, 1 / len(OrderStatus)),
+}
+SORTS = list(itertools.product(["created_at", "total_price"], ["asc", "desc"]))
+
+
+def seed(engine, orders: int, other_users: int) -> None:
+    """Recriar as tabelas e inserir o histórico do cliente e dos demais."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    rng = random.Random(42)
+    start = datetime(2021, 1, 1)
+    statuses = [status.value for status in OrderStatus]
+    users = other_users + 1
+
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User),
+            [
+                {"email": f"cliente{i}@example.com", "username": f"cliente{i}", "hashed_password": "x"}
+                for i in range(1, users + 1)
+            ],
+        )
+
+        # O cliente medido tem `orders` pedidos; os demais dividem outro tanto
+        owners = [CUSTOMER_ID] * orders + [rng.randint(2, users) for _ in range(orders if other_users else 0)]
+        rng.shuffle(owners)
+        for offset in range(0, len(owners), BATCH_SIZE):
+            batch = [
+                {
+                    "user_id": user_id,
+                    "total_price": round(rng.uniform(10, 2000), 2),
+                    "status": rng.choice(statuses),
+                    "shipping_address": "Rua do Benchmark, 42",
+                    "payment_method": "pix",
+                    "created_at": start + timedelta(seconds=rng.randrange(60 * 60 * 24 * 365 * 3)),
+                    "updated_at": start,
+                }
+                for user_id in owners[offset:offset + BATCH_SIZE]
+            ]
+            conn.execute(insert(Order), batch)
+            print(f"  {offset + len(batch):>9,} / {len(owners):,} pedidos", end="\r")
+    print()
+
+
+def drop_history_indexes(engine) -> None:
+    for index in Order.__table__.indexes:
+        if index.name.startswith("ix_orders_user_") and index.name != "ix_orders_user_id":
+            index.drop(bind=engine, checkfirst=True)
+
+
+def create_history_indexes(engine) -> None:
+    for index in Order.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.exec_driver_sql("ANALYZE orders")
+        elif engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("ANALYZE")
+
+
+async def _page(session_factory, customer, filters, sort_by, sort_order, skip=0, cursor=None):
+    """Uma chamada de list_orders; retorna (ms, cursor da próxima página)."""
+    response = Response()
+    async with session_factory() as db:
+        started = time.perf_counter()
+        await list_orders(
+            skip=skip,
+            limit=PAGE_SIZE,
+            status_filter=filters.get("status_filter"),
+            min_date=None,
+            max_date=None,
+            min_price=None,
+            max_price=None,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            cursor=cursor,
+            response=response,
+            current_user=customer,
+            db=db,
+        )
+        elapsed = (time.perf_counter() - started) * 1000
+    return elapsed, response.headers.get("X-Next-Cursor")
+
+
+async def measure(database_url: str, orders: int, repeat: int) -> dict:
+    """Medir a mediana (ms) da primeira página e da página do meio, por offset e por cursor."""
+    # list_orders usa AsyncSession: medir pelo driver assíncrono. O engine
+    # é descartado no fim, pois cada asyncio.run tem o seu event loop.
+    async_engine = create_async_engine(async_database_url(database_url))
+    session_factory = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+    customer = User(id=CUSTOMER_ID)
+    results = {}
+    for (filter_name, (filters, fraction)), (sort_by, sort_order) in itertools.product(FILTERS.items(), SORTS):
+        depth = int(orders * fraction / 2) // PAGE_SIZE * PAGE_SIZE
+        # Cursor da página profunda: o último pedido antes dela, pelo offset
+        _, deep_cursor = await _page(
+            session_factory, customer, filters, sort_by, sort_order, skip=depth - PAGE_SIZE
+        )
+        cases = {
+            "1ª página": {},
+            "offset": {"skip": depth},
+            "cursor": {"cursor": deep_cursor},
+        }
+        for case_name, params in cases.items():
+            if case_name == "cursor" and deep_cursor is None:
+                continue
+            timings = []
+            for _ in range(repeat):
+                elapsed, _ = await _page(session_factory, customer, filters, sort_by, sort_order, **params)
+                timings.append(elapsed)
+            results[(filter_name, sort_by, sort_order, case_name)] = statistics.median(timings)
+    await async_engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:///./bench.db")
+    parser.add_argument("--orders", type=int, default=50_000, help="Pedidos do cliente medido")
+    parser.add_argument("--other-users", type=int, default=100, help="Clientes que dividem outros N pedidos")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-seed", action="store_true", help="Reaproveitar os dados já inseridos")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+
+    if not args.skip_seed:
+        print(f"🔄 Populando {args.orders:,} pedidos do cliente e {args.other_users} outros clientes...")
+        seed(engine, args.orders, args.other_users)
+
+    print("🔄 Medindo sem índices compostos...")
+    drop_history_indexes(engine)
+    before = asyncio.run(measure(args.database_url, args.orders, args.repeat))
+
+    print("🔄 Criando índices e medindo novamente...")
+    create_history_indexes(engine)
+    after = asyncio.run(measure(args.database_url, args.orders, args.repeat))
+
+    print()
+    print("offset/cursor: página do meio do histórico (filtrado)")
+    print(f"{'filtro':<12} {'ordenação':<18} {'página':<10} {'antes (ms)':>11} {'depois (ms)':>12} {'ganho':>8}")
+    for key in before:
+        filter_name, sort_by, sort_order, case_name = key
+        if key not in after:
+            continue
+        speedup = before[key] / after[key] if after[key] else float("inf")
+        print(
+            f"{filter_name:<12} {sort_by + ' ' + sort_order:<18} {case_name:<10} "
+            f"{before[key]:>11.2f} {after[key]:>12.2f} {speedup:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
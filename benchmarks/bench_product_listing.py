@@ -0,0 +1,212 @@
+"""
+Benchmark da listagem de produtos (GET /products) com e sem os índices compostos.
+
+Popula a tabela de produtos com N linhas (padrão: 1.000.000) e mede a latência
+de cada combinação de filtro/ordenação aceita por `list_products` (inclusive
+busca e ordenação por relevância), primeiro sem os índices compostos da
+listagem (`LISTING_INDEXES`) e depois com eles. Os demais índices da tabela
+ficam nas duas medições, como em produção antes da migração.
+
+Com SEARCH_BACKEND=postgres, aplique antes migrations/add_product_search_index.sql.
+
+Execute:
+    python -m benchmarks.bench_product_listing --database-url postgresql://... --rows 1000000
+    python -m benchmarks.bench_product_listing --database-url sqlite:///./bench.db --rows 100000
+
+ATENÇÃO: o script apaga e recria as tabelas no banco informado.
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from fastapi import Request, Response
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, async_database_url
+from app.models.category import Category
+from app.models.product import Product
+from app.core.response_cache import response_cache
+from app.core.search import search_index
+from app.routers import products as products_router
+from app.routers.products import list_products
+from app.utils.conditional import ConditionalRequest
+
+
+CATEGORIES = 50
+BATCH_SIZE = 10_000
+
+# Índices adicionados para a listagem (migrations/add_product_listing_indexes.sql)
+LISTING_INDEXES = {
+    "ix_products_category_id",
+    "ix_products_active_created",
+    "ix_products_active_price",
+    "ix_products_active_name",
+    "ix_products_active_category_created",
+    "ix_products_active_category_price",
+    "ix_products_active_category_name",
+}
+
+# Os nomes gerados são "Produto 0000000".."Produto 9999999": o prefixo
+# "0123" acerta ~1 em 10.000 produtos
+FILTERS = {
+    "sem filtro": {},
+    "categoria": {"category_id": 7},
+    "faixa de preço": {"min_price": 100.0, "max_price": 200.0},
+    "em estoque": {"in_stock": True},
+    "fora de estoque": {"in_stock": False},
+    "categoria + preço": {"category_id": 7, "min_price": 100.0, "max_price": 200.0},
+    "busca": {"search": "produto 0123"},
+    "busca + categoria": {"search": "produto 0123", "category_id": 7},
+}
+SORT_FIELDS = ["created_at", "price", "name"]
+SORT_ORDERS = ["asc", "desc"]
+
+
+def seed(engine, rows: int) -> None:
+    """Recriar as tabelas e inserir `rows` produtos aleatórios."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    rng = random.Random(42)
+    start = datetime(2023, 1, 1)
+
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Category),
+            [{"name": f"Categoria {i}", "is_active": True} for i in range(1, CATEGORIES + 1)],
+        )
+
+        for offset in range(0, rows, BATCH_SIZE):
+            batch = [
+                {
+                    "name": f"Produto {rng.randrange(rows):07d}",
+                    "description": "Produto gerado para benchmark",
+                    "price": round(rng.uniform(5, 1000), 2),
+                    "category_id": rng.randint(1, CATEGORIES),
+                    "stock": rng.choice([0, rng.randint(1, 50)]),
+                    "is_active": rng.random() > 0.05,
+                    "created_at": start + timedelta(seconds=rng.randrange(60 * 60 * 24 * 365)),
+                    "updated_at": start,
+                }
+                for _ in range(min(BATCH_SIZE, rows - offset))
+            ]
+            conn.execute(insert(Product), batch)
+            print(f"  {offset + len(batch):>9,} / {rows:,} produtos", end="\r")
+    print()
+
+
+def combinations():
+    """Combinações filtro x ordenação aceitas por `list_products`."""
+    for filter_name, filters in FILTERS.items():
+        # Relevância só vale com busca (sem ela, a listagem usa created_at)
+        fields = SORT_FIELDS + (["relevance"] if filters.get("search") else [])
+        for sort_by, sort_order in itertools.product(fields, SORT_ORDERS):
+            yield filter_name, filters, sort_by, sort_order
+
+
+def listing_indexes():
+    return [index for index in Product.__table__.indexes if index.name in LISTING_INDEXES]
+
+
+def drop_listing_indexes(engine) -> None:
+    for index in listing_indexes():
+        index.drop(bind=engine, checkfirst=True)
+
+
+def create_listing_indexes(engine) -> None:
+    for index in listing_indexes():
+        index.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.exec_driver_sql("ANALYZE products")
+        elif engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("ANALYZE")
+
+
+async def measure(database_url: str, repeat: int) -> dict:
+    """Medir a mediana (ms) de cada combinação filtro x ordenação."""
+    # list_products usa AsyncSession: medir pelo driver assíncrono. O engine
+    # é descartado no fim, pois cada asyncio.run tem o seu event loop.
+    async_engine = create_async_engine(async_database_url(database_url))
+    session_factory = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+    results = {}
+    for filter_name, filters, sort_by, sort_order in combinations():
+        timings = []
+        for _ in range(repeat):
+            async with session_factory() as db:
+                started = time.perf_counter()
+                await list_products(
+                    skip=0,
+                    limit=20,
+                    category_id=filters.get("category_id"),
+                    min_price=filters.get("min_price"),
+                    max_price=filters.get("max_price"),
+                    in_stock=filters.get("in_stock"),
+                    search=filters.get("search"),
+                    sort_by=sort_by,
+                    sort_order=sort_order,
+                    cursor=None,
+                    include_total=False,
+                    conditional=ConditionalRequest(Request({"type": "http", "headers": []}), Response()),
+                    db=db,
+                )
+                timings.append((time.perf_counter() - started) * 1000)
+        results[(filter_name, sort_by, sort_order)] = statistics.median(timings)
+    await async_engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:///./bench.db")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-seed", action="store_true", help="Reaproveitar os dados já inseridos")
+    args = parser.parse_args()
+
+    # Medir o banco, não o cache de respostas
+    response_cache.ttl = 0
+
+    engine = create_engine(args.database_url)
+
+    if not args.skip_seed:
+        print(f"🔄 Populando {args.rows:,} produtos...")
+        seed(engine, args.rows)
+
+    # A busca abre a própria Session (SessionLocal da aplicação): apontar
+    # para o banco do benchmark e construir o índice fora das medições
+    session_factory = sessionmaker(bind=engine)
+    products_router.SessionLocal = session_factory
+    print("🔄 Construindo o índice de busca...")
+    with session_factory() as db:
+        search_index.reset()
+        search_index.build(db)
+
+    print("🔄 Medindo sem índices compostos...")
+    drop_listing_indexes(engine)
+    before = asyncio.run(measure(args.database_url, args.repeat))
+
+    print("🔄 Criando índices e medindo novamente...")
+    create_listing_indexes(engine)
+    after = asyncio.run(measure(args.database_url, args.repeat))
+
+    print()
+    print(f"{'filtro':<20} {'ordenação':<16} {'antes (ms)':>11} {'depois (ms)':>12} {'ganho':>8}")
+    for key in before:
+        filter_name, sort_by, sort_order = key
+        speedup = before[key] / after[key] if after[key] else float("inf")
+        print(
+            f"{filter_name:<20} {sort_by + ' ' + sort_order:<16} "
+            f"{before[key]:>11.2f} {after[key]:>12.2f} {speedup:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark do servidor de /uploads: StaticFiles puro x UploadFiles.
+
+Gera imagens de teste em um diretório temporário e mede, para cada
+implementação, chamando a aplicação ASGI diretamente (sem rede):
+
+    GET completo     requisições/s de downloads inteiros
+    Range            requisições/s de "bytes=0-65535" (StaticFiles ignora o
+                     Range e envia o arquivo inteiro)
+    páginas          N visualizações de uma página com M imagens, com um
+                     navegador que respeita o cache: sem Cache-Control, cada
+                     visualização revalida cada imagem (If-None-Match -> 304);
+                     com `immutable`, só a primeira visualização chega ao
+                     servidor
+
+Execute:
+    python -m benchmarks.bench_static_uploads
+    python -m benchmarks.bench_static_uploads --requests 5000 --concurrency 32 --size-kb 200
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.staticfiles import StaticFiles
+
+from app.utils.static_files import UploadFiles
+
+
+def make_files(directory: str, count: int, size_kb: int) -> list:
+    """Criar `count` arquivos com nomes únicos (como os uploads reais)."""
+    names = []
+    for i in range(count):
+        name = f"{i:064x}-800w.webp"
+        with open(os.path.join(directory, name), "wb") as file:
+            file.write(os.urandom(size_kb * 1024))
+        names.append(name)
+    return names
+
+
+def build_app(static) -> Starlette:
+    return Starlette(routes=[Mount("/uploads", static)])
+
+
+async def throughput(app, names: list, requests: int, concurrency: int, headers=None) -> dict:
+    """Disparar `requests` GETs com `concurrency` clientes simultâneos."""
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    statuses = {}
+    queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(names[i % len(names)])
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            while not queue.empty():
+                name = queue.get_nowait()
+                started = time.perf_counter()
+                response = await client.get(f"/uploads/{name}", headers=headers)
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "statuses": statuses,
+    }
+
+
+async def page_views(app, names: list, views: int) -> dict:
+    """Simular um navegador que guarda as respostas conforme Cache-Control."""
+    transport = httpx.ASGITransport(app=app)
+    cache = {}  # nome -> (etag, imutável)
+    hits_server = 0
+    started = time.perf_counter()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(views):
+            for name in names:
+                cached = cache.get(name)
+                if cached and cached[1]:
+                    continue  # fresco no cache do navegador: nenhuma requisição
+                headers = {"If-None-Match": cached[0]} if cached else None
+                response = await client.get(f"/uploads/{name}", headers=headers)
+                hits_server += 1
+                if response.status_code == 200:
+                    immutable = "immutable" in response.headers.get("cache-control", "")
+                    cache[name] = (response.headers["etag"], immutable)
+    return {"requests": hits_server, "seconds": time.perf_counter() - started}
+
+
+async def run(args) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        names = make_files(directory, args.files, args.size_kb)
+        apps = {
+            "StaticFiles": build_app(StaticFiles(directory=directory)),
+            "UploadFiles": build_app(UploadFiles(directory=directory)),
+        }
+
+        print(f"{args.files} arquivos de {args.size_kb} KB, {args.requests} requisições, "
+              f"concorrência {args.concurrency}\n")
+        print(f"{'cenário':<14} {'implementação':<13} {'req/s':>9} {'p50 (ms)':>9}  status")
+        for scenario, headers in [("GET completo", None), ("Range 64 KB", {"Range": "bytes=0-65535"})]:
+            for label, app in apps.items():
+                result = await throughput(app, names, args.requests, args.concurrency, headers)
+                print(f"{scenario:<14} {label:<13} {result['rps']:>9.0f} {result['p50_ms']:>9.2f}  {result['statuses']}")
+
+        print(f"\n{args.views} visualizações de uma página com {args.files} imagens:")
+        for label, app in apps.items():
+            result = await page_views(app, names, args.views)
+            print(f"  {label:<13} {result['requests']:>6} requisições ao servidor em {result['seconds']:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--size-kb", type=int, default=120)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--views", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark de POST /stock/validate: uma query por item x uma query no total.
+
+Popula a tabela de produtos e mede, para carrinhos de 1, 10 e 100 itens, a
+latência da validação antiga (um `db.query(Product)` por item, carregando a
+entidade completa) e da atual (`validate_stock`, uma única query sobre a
+projeção `(id, name, stock, is_active)`).
+
+Execute:
+    python -m benchmarks.bench_stock_validation
+    python -m benchmarks.bench_stock_validation --database-url postgresql://... --repeat 200
+
+ATENÇÃO: o script apaga e recria as tabelas no banco informado.
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.category import Category
+from app.models.product import Product
+from app.routers.stock import validate_stock
+from app.schemas.order import StockValidationRequest
+
+CART_SIZES = (1, 10, 100)
+
+
+def seed(engine, rows: int) -> None:
+    """Recriar as tabelas e inserir `rows` produtos."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(insert(Category), [{"name": "Benchmark", "is_active": True}])
+        conn.execute(insert(Product), [
+            {
+                "name": f"Produto {i}",
+                "description": "Produto gerado para benchmark " * 10,
+                "price": round(rng.uniform(5, 1000), 2),
+                "category_id": 1,
+                "stock": rng.randint(0, 50),
+                "is_active": True,
+            }
+            for i in range(rows)
+        ])
+
+
+def validate_per_item(request: StockValidationRequest, db) -> list:
+    """Implementação anterior: uma query (entidade completa) por item."""
+    unavailable_items = []
+    for item in request.items:
+        product = db.query(Product).filter(Product.id == item.product_id).first()
+        if not product or product.stock < item.quantity:
+            unavailable_items.append(item.product_id)
+    return unavailable_items
+
+
+def measure(session_factory, func, request, repeat: int, counter: list) -> tuple:
+    """Mediana (ms) e número de queries de uma validação."""
+    timings = []
+    for _ in range(repeat):
+        with session_factory() as db:
+            counter.clear()
+            started = time.perf_counter()
+            func(request, db)
+            timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), len(counter)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:///./bench.db")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    print(f"🔄 Populando {args.rows:,} produtos...")
+    seed(engine, args.rows)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+    session_factory = sessionmaker(bind=engine)
+    rng = random.Random(7)
+
+    print()
+    print(f"{'itens':>6} {'antes (ms)':>11} {'queries':>8} {'depois (ms)':>12} {'queries':>8} {'ganho':>8}")
+    for size in CART_SIZES:
+        request = StockValidationRequest(items=[
+            {"product_id": product_id, "quantity": rng.randint(1, 5)}
+            for product_id in rng.sample(range(1, args.rows + 1), size)
+        ])
+        before, before_queries = measure(session_factory, validate_per_item, request, args.repeat, statements)
+        after, after_queries = measure(session_factory, validate_stock, request, args.repeat, statements)
+        speedup = before / after if after else float("inf")
+        print(f"{size:>6} {before:>11.2f} {before_queries:>8} {after:>12.2f} {after_queries:>8} {speedup:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
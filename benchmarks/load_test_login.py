@@ -0,0 +1,137 @@
+"""
+Teste de carga: rajadas de login não devem travar outros endpoints.
+
+Dispara N logins simultâneos enquanto mede, em paralelo, a latência de um
+endpoint leve (GET /health). Roda a aplicação em processo (httpx + ASGI),
+então tudo compartilha o mesmo event loop, como em um worker do uvicorn.
+
+Modos:
+    pool    bcrypt no pool de processos (comportamento atual)
+    inline  bcrypt no threadpool do Starlette (sem o pool de processos)
+
+Execute:
+    python -m benchmarks.load_test_login --logins 50
+    python -m benchmarks.load_test_login --logins 50 --mode inline
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+from app.main import app
+from app.database import Base
+from app.dependencies import get_async_db, get_db
+from app.core.limiter import limiter
+from app.core.security import hash_password, verify_password
+from app.models.user import User
+from app.routers import auth
+
+
+EMAIL = "carga@example.com"
+PASSWORD = "Carga123!"
+
+
+def setup_database():
+    """Criar um banco SQLite temporário com um usuário e ligá-lo à aplicação."""
+    db_path = Path(tempfile.mkdtemp()) / "load_test.db"
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = session_factory()
+    db.add(User(email=EMAIL, username="carga", hashed_password=hash_password(PASSWORD), is_active=True))
+    db.commit()
+    db.close()
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async_session_factory = async_sessionmaker(
+        bind=create_async_engine(f"sqlite+aiosqlite:///{db_path}"),
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+    async def override_get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+
+
+async def run(logins: int, probe_interval: float) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # Aquecer (inicia os processos do pool)
+        await client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PASSWORD})
+
+        health_latencies = []
+        done = asyncio.Event()
+
+        async def probe():
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/health")
+                health_latencies.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(probe_interval)
+
+        async def login():
+            response = await client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PASSWORD})
+            return response.status_code
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    return {"statuses": statuses, "elapsed": elapsed, "health": health_latencies}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--mode", choices=["pool", "inline"], default="pool")
+    parser.add_argument("--probe-interval", type=float, default=0.005)
+    args = parser.parse_args()
+
+    limiter.enabled = False
+    setup_database()
+
+    if args.mode == "inline":
+        async def verify_in_threadpool(plain_password, hashed_password):
+            return await run_in_threadpool(verify_password, plain_password, hashed_password)
+
+        auth.verify_password_async = verify_in_threadpool
+
+    result = asyncio.run(run(args.logins, args.probe_interval))
+
+    health = sorted(result["health"])
+    ok = sum(1 for code in result["statuses"] if code == 200)
+    print(f"Modo: {args.mode}")
+    print(f"Logins: {ok}/{args.logins} OK em {result['elapsed']:.2f}s")
+    print(f"GET /health durante a rajada: {len(health)} amostras")
+    if health:
+        p99 = health[min(len(health) - 1, int(len(health) * 0.99))]
+        print(f"  p50 = {statistics.median(health):.1f} ms")
+        print(f"  p99 = {p99:.1f} ms")
+        print(f"  max = {health[-1]:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+-- Um item por produto em cada carrinho (alvo do INSERT ... ON CONFLICT de add_cart_item)
+
+-- 1. Juntar itens duplicados no de menor id, somando as quantidades (limite de 1000)
+UPDATE cart_items AS c
+SET quantity = LEAST(d.total, 1000)
+FROM (
+    SELECT MIN(id) AS keep_id, SUM(quantity) AS total
+    FROM cart_items
+    GROUP BY cart_id, product_id
+    HAVING COUNT(*) > 1
+) AS d
+WHERE c.id = d.keep_id;
+
+DELETE FROM cart_items AS c
+USING cart_items AS k
+WHERE c.cart_id = k.cart_id
+  AND c.product_id = k.product_id
+  AND c.id > k.id;
+
+-- 2. Índice único
+CREATE UNIQUE INDEX IF NOT EXISTS uq_cart_items_cart_product ON cart_items(cart_id, product_id);
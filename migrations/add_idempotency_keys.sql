@@ -0,0 +1,17 @@
+﻿-- Chaves de idempotência (cabeçalho Idempotency-Key) de POST /orders,
+-- /stock/checkout e /payments; status_code NULL = requisição em andamento
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    scope VARCHAR(50) NOT NULL,
+    key VARCHAR(255) NOT NULL,
+    fingerprint VARCHAR(64) NOT NULL,
+    status_code INTEGER,
+    response_body TEXT,
+    created_at TIMESTAMP NOT NULL,
+    expires_at TIMESTAMP NOT NULL,
+    CONSTRAINT uq_idempotency_keys_user_scope_key UNIQUE (user_id, scope, key)
+);
+
+CREATE INDEX IF NOT EXISTS ix_idempotency_keys_id ON idempotency_keys(id);
+CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expires_at ON idempotency_keys(expires_at);
@@ -0,0 +1,3 @@
+﻿-- Adicionar coluna 'image_variants' à tabela 'products'
+-- Mapa das variantes responsivas geradas no upload: {tipo MIME: {largura: URL}}
+ALTER TABLE products ADD COLUMN IF NOT EXISTS image_variants JSON NULL;
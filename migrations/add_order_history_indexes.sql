@@ -0,0 +1,5 @@
+-- Índices compostos para o histórico de pedidos (GET /orders)
+-- Mantidos em sincronia com Order.__table_args__ em app/models/order.py
+CREATE INDEX IF NOT EXISTS ix_orders_user_created ON orders(user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_orders_user_status_created ON orders(user_id, status, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_orders_user_price ON orders(user_id, total_price, id);
@@ -0,0 +1,9 @@
+-- Índices compostos para a listagem de produtos (GET /products)
+-- Mantidos em sincronia com Product.__table_args__ em app/models/product.py
+CREATE INDEX IF NOT EXISTS ix_products_category_id ON products(category_id);
+CREATE INDEX IF NOT EXISTS ix_products_active_created ON products(is_active, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_products_active_price ON products(is_active, price, id);
+CREATE INDEX IF NOT EXISTS ix_products_active_name ON products(is_active, name, id);
+CREATE INDEX IF NOT EXISTS ix_products_active_category_created ON products(is_active, category_id, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_products_active_category_price ON products(is_active, category_id, price, id);
+CREATE INDEX IF NOT EXISTS ix_products_active_category_name ON products(is_active, category_id, name, id);
@@ -0,0 +1,8 @@
+-- Busca textual de produtos no PostgreSQL (SEARCH_BACKEND=postgres)
+-- A expressão do índice deve ser idêntica a PostgresSearchIndex.VECTOR_SQL em app/core/search.py
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() não é IMMUTABLE, então não pode ser usado direto em um índice
+CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text AS $$ SELECT public.unaccent('public.unaccent', $1) $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+
+CREATE INDEX IF NOT EXISTS ix_products_search ON products USING GIN ((setweight(to_tsvector('portuguese', immutable_unaccent(coalesce(name, ''))), 'A') || setweight(to_tsvector('portuguese', immutable_unaccent(coalesce(description, ''))), 'B')));
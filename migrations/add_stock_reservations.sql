@@ -0,0 +1,17 @@
+﻿-- Reservas de estoque dos carrinhos
+-- products.reserved_stock = soma das reservas ativas do produto
+ALTER TABLE products ADD COLUMN IF NOT EXISTS reserved_stock INTEGER DEFAULT 0 NOT NULL;
+
+CREATE TABLE IF NOT EXISTS stock_reservations (
+    id SERIAL PRIMARY KEY,
+    cart_id INTEGER NOT NULL REFERENCES carts(id) ON DELETE CASCADE,
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    quantity INTEGER NOT NULL,
+    expires_at TIMESTAMP NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    CONSTRAINT uq_stock_reservations_cart_product UNIQUE (cart_id, product_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_stock_reservations_id ON stock_reservations(id);
+CREATE INDEX IF NOT EXISTS ix_stock_reservations_product_id ON stock_reservations(product_id);
+CREATE INDEX IF NOT EXISTS ix_stock_reservations_expires_at ON stock_reservations(expires_at);
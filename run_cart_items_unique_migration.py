@@ -0,0 +1,40 @@
+from sqlalchemy import text
+from app.database import engine
+
+# Mesmos comandos de migrations/add_cart_items_unique_index.sql
+sql_commands = [
+    """
+    UPDATE cart_items AS c
+    SET quantity = LEAST(d.total, 1000)
+    FROM (
+        SELECT MIN(id) AS keep_id, SUM(quantity) AS total
+        FROM cart_items
+        GROUP BY cart_id, product_id
+        HAVING COUNT(*) > 1
+    ) AS d
+    WHERE c.id = d.keep_id;
+    """,
+    """
+    DELETE FROM cart_items AS c
+    USING cart_items AS k
+    WHERE c.cart_id = k.cart_id
+      AND c.product_id = k.product_id
+      AND c.id > k.id;
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_cart_items_cart_product ON cart_items(cart_id, product_id);",
+]
+
+try:
+    with engine.connect() as connection:
+        for command in sql_commands:
+            try:
+                connection.execute(text(command))
+                print(f"✅ Executado: {command.strip()[:60]}...")
+            except Exception as e:
+                print(f"⚠️  Aviso: {command.strip()[:60]}...")
+                print(f"   Detalhes: {e}")
+
+        connection.commit()
+        print("\n✅ Migração do índice único de itens do carrinho concluída!")
+except Exception as e:
+    print(f"❌ Erro geral: {e}")
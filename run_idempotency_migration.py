@@ -0,0 +1,37 @@
+from sqlalchemy import text
+from app.database import engine
+
+# Mesmos comandos de migrations/add_idempotency_keys.sql
+sql_commands = [
+    """
+    CREATE TABLE IF NOT EXISTS idempotency_keys (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        scope VARCHAR(50) NOT NULL,
+        key VARCHAR(255) NOT NULL,
+        fingerprint VARCHAR(64) NOT NULL,
+        status_code INTEGER,
+        response_body TEXT,
+        created_at TIMESTAMP NOT NULL,
+        expires_at TIMESTAMP NOT NULL,
+        CONSTRAINT uq_idempotency_keys_user_scope_key UNIQUE (user_id, scope, key)
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_idempotency_keys_id ON idempotency_keys(id);",
+    "CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expires_at ON idempotency_keys(expires_at);",
+]
+
+try:
+    with engine.connect() as connection:
+        for command in sql_commands:
+            try:
+                connection.execute(text(command))
+                print(f"✅ Executado: {command.strip()[:60]}...")
+            except Exception as e:
+                print(f"⚠️  Aviso: {command.strip()[:60]}...")
+                print(f"   Detalhes: {e}")
+
+        connection.commit()
+        print("\n✅ Migração das chaves de idempotência concluída!")
+except Exception as e:
+    print(f"❌ Erro geral: {e}")
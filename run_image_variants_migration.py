@@ -0,0 +1,24 @@
+from sqlalchemy import text
+from app.database import engine
+
+# Mesmo comando de migrations/add_image_variants_to_products.sql
+sql_commands = [
+    "ALTER TABLE products ADD COLUMN IF NOT EXISTS image_variants JSON NULL;",
+]
+
+try:
+    with engine.connect() as connection:
+        for command in sql_commands:
+            try:
+                connection.execute(text(command))
+                print(f"✅ Executado: {command[:60]}...")
+            except Exception as e:
+                print(f"⚠️  Aviso: {command[:60]}...")
+                print(f"   Detalhes: {e}")
+
+        connection.commit()
+        print("\n✅ Migração de variantes de imagem concluída!")
+        print("   Imagens enviadas antes da migração continuam só com image_url;")
+        print("   reenvie a imagem para gerar as variantes.")
+except Exception as e:
+    print(f"❌ Erro geral: {e}")
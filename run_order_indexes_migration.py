@@ -0,0 +1,28 @@
+from pathlib import Path
+from sqlalchemy import text
+from app.database import engine
+
+# Comandos SQL lidos do arquivo de migração (um por linha, ignorando comentários)
+migration_file = Path(__file__).parent / "migrations" / "add_order_history_indexes.sql"
+sql_commands = [
+    line.strip()
+    for line in migration_file.read_text(encoding="utf-8").splitlines()
+    if line.strip() and not line.strip().startswith("--")
+]
+
+# Executar o script SQL
+try:
+    with engine.connect() as connection:
+        for command in sql_commands:
+            try:
+                connection.execute(text(command))
+                print(f"✅ Executado: {command[:60]}...")
+            except Exception as e:
+                print(f"⚠️  Aviso: {command[:60]}...")
+                print(f"   Detalhes: {e}")
+
+        # Confirmar as mudanças
+        connection.commit()
+        print("\n✅ Migração de índices do histórico de pedidos concluída!")
+except Exception as e:
+    print(f"❌ Erro geral: {e}")
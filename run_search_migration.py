@@ -0,0 +1,33 @@
+from sqlalchemy import text
+from app.database import engine
+
+# Mesmos comandos de migrations/add_product_search_index.sql
+sql_commands = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent;",
+    """
+    CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text AS $$
+        SELECT public.unaccent('public.unaccent', $1)
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_products_search ON products USING GIN ((
+        setweight(to_tsvector('portuguese', immutable_unaccent(coalesce(name, ''))), 'A') ||
+        setweight(to_tsvector('portuguese', immutable_unaccent(coalesce(description, ''))), 'B')
+    ));
+    """,
+]
+
+try:
+    with engine.connect() as connection:
+        for command in sql_commands:
+            try:
+                connection.execute(text(command))
+                print(f"✅ Executado com sucesso")
+            except Exception as e:
+                print(f"⚠️  Aviso: {e}")
+
+        connection.commit()
+        print("\n✅ Migração de busca de produtos concluída!")
+        print("   Defina SEARCH_BACKEND=postgres no .env para usar o índice GIN.")
+except Exception as e:
+    print(f"❌ Erro geral: {e}")
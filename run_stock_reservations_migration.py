@@ -0,0 +1,37 @@
+from sqlalchemy import text
+from app.database import engine
+
+# Mesmos comandos de migrations/add_stock_reservations.sql
+sql_commands = [
+    "ALTER TABLE products ADD COLUMN IF NOT EXISTS reserved_stock INTEGER DEFAULT 0 NOT NULL;",
+    """
+    CREATE TABLE IF NOT EXISTS stock_reservations (
+        id SERIAL PRIMARY KEY,
+        cart_id INTEGER NOT NULL REFERENCES carts(id) ON DELETE CASCADE,
+        product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+        quantity INTEGER NOT NULL,
+        expires_at TIMESTAMP NOT NULL,
+        created_at TIMESTAMP DEFAULT NOW(),
+        CONSTRAINT uq_stock_reservations_cart_product UNIQUE (cart_id, product_id)
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_stock_reservations_id ON stock_reservations(id);",
+    "CREATE INDEX IF NOT EXISTS ix_stock_reservations_product_id ON stock_reservations(product_id);",
+    "CREATE INDEX IF NOT EXISTS ix_stock_reservations_expires_at ON stock_reservations(expires_at);",
+]
+
+try:
+    with engine.connect() as connection:
+        for command in sql_commands:
+            try:
+                connection.execute(text(command))
+                print(f"✅ Executado: {command.strip()[:60]}...")
+            except Exception as e:
+                print(f"⚠️  Aviso: {command.strip()[:60]}...")
+                print(f"   Detalhes: {e}")
+
+        connection.commit()
+        print("\n✅ Migração de reservas de estoque concluída!")
+        print("   Itens que já estavam nos carrinhos ficam sem reserva até serem alterados.")
+except Exception as e:
+    print(f"❌ Erro geral: {e}")
@@ -0,0 +1,24 @@
+import argparse
+from app.core.upload_gc import run_upload_gc
+
+# Coletar uploads órfãos em uploads/products (ver app/core/upload_gc.py)
+parser = argparse.ArgumentParser(description="Coletor de uploads órfãos")
+parser.add_argument("--dry-run", action="store_true", help="Só contar, sem mover nem apagar")
+parser.add_argument("--grace-hours", type=float, default=None, help="Idade mínima para a quarentena")
+parser.add_argument("--quarantine-hours", type=float, default=None, help="Tempo em quarentena antes de apagar")
+args = parser.parse_args()
+
+try:
+    report = run_upload_gc(
+        grace_seconds=int(args.grace_hours * 3600) if args.grace_hours is not None else None,
+        quarantine_seconds=int(args.quarantine_hours * 3600) if args.quarantine_hours is not None else None,
+        dry_run=args.dry_run,
+    )
+    prefix = "🔎 (simulação) " if args.dry_run else ""
+    print(f"{prefix}Arquivos analisados: {report['scanned']}")
+    print(f"   Referenciados: {report['referenced']}  |  Recentes (carência): {report['recent']}")
+    print(f"   Em quarentena: {report['quarantined']} ({report['bytes_quarantined'] / 1024:.1f} KB)")
+    print(f"   Restaurados: {report['restored']}  |  Apagados: {report['deleted']}")
+    print(f"\n✅ Espaço liberado: {report['bytes_reclaimed'] / 1024:.1f} KB")
+except Exception as e:
+    print(f"❌ Erro geral: {e}")
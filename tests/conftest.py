@@ -7,14 +7,19 @@ current_path = Path(__file__).parent.parent
 sys.path.insert(0, str(current_path))
 
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import NullPool
 from fastapi.testclient import TestClient
 
 try:
     from app.main import app
-    from app.database import Base
-    from app.dependencies import get_db
+    from app.database import Base, get_db as database_get_db
+    from app.dependencies import get_db, get_async_db
+    from app.core.search import search_index
+    from app.core.user_cache import user_cache
+    from app.core.response_cache import response_cache
     from app.models.user import User
     from app.models.product import Product
     from app.models.category import Category
@@ -39,6 +44,20 @@ engine = create_engine(
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine assíncrono no mesmo arquivo, para as rotas que usam AsyncSession.
+# NullPool: o TestClient cria um event loop por teste, então nenhuma conexão
+# deve sobreviver entre eles.
+async_engine = create_async_engine(
+    "sqlite+aiosqlite:///./test.db",
+    poolclass=NullPool,
+)
+
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 
 @pytest.fixture(scope="function")
 def db():
@@ -64,9 +83,20 @@ def client(db: Session):
         finally:
             db.close()
     
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as async_db:
+            yield async_db
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[database_get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     
     with TestClient(app) as test_client:
+        # O startup constrói o índice de busca a partir do banco da aplicação;
+        # descartá-lo para que seja reconstruído a partir do banco de teste
+        search_index.reset()
+        user_cache.clear()
+        response_cache.clear()
         yield test_client
     
     app.dependency_overrides.clear()
@@ -226,7 +256,96 @@ def test_order(db: Session, test_user: User, test_product: Product):
 @pytest.fixture(scope="function")
 def auth_headers(test_user: User):
     """Fixture para gerar headers de autenticação."""
-    # Nota: Você precisará implementar a geração de token JWT
-    # Por enquanto, retornamos um dicionário vazio
-    # Será implementado quando você tiver autenticação JWT
-    return {"Authorization": "Bearer test_token"}
\ No newline at end of file
+    # Gera o token direto, sem passar pelo /auth/login (que tem rate limit)
+    from app.core.security import create_access_token
+    token = create_access_token(data={"sub": test_user.email})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(scope="function")
+def admin_auth_headers(test_admin_user: User):
+    """Fixture para gerar headers de autenticação de admin."""
+    from app.core.security import create_access_token
+    token = create_access_token(data={"sub": test_admin_user.email})
+    return {"Authorization": f"Bearer {token}"}
+
+
+class QueryCounter:
+    """Conta os statements SQL executados nos engines de teste (síncrono e assíncrono)."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def reset(self):
+        self.statements.clear()
+
+
+@pytest.fixture(scope="function")
+def query_counter():
+    """Fixture para contar as queries executadas durante o teste."""
+    counter = QueryCounter()
+    engines = [engine, async_engine.sync_engine]
+    for bind in engines:
+        event.listen(bind, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        for bind in engines:
+            event.remove(bind, "before_cursor_execute", counter)
+
+
+class NPlusOneDetector:
+    """
+    Detecta N+1: falha se o número de statements de uma requisição cresce
+    junto com o número de registros retornados.
+    """
+
+    def __init__(self, counter: QueryCounter):
+        self.counter = counter
+
+    def count(self, request) -> int:
+        """Executar a requisição e retornar quantos statements ela gerou."""
+        self.counter.reset()
+        response = request()
+        assert response.status_code == 200, response.text
+        return self.counter.count
+
+    def check(self, request, add_rows, sizes=(1, 3, 6)):
+        """
+        Medir a requisição com resultados de tamanhos crescentes.
+
+        Args:
+            request: Função sem argumentos que faz a requisição
+            add_rows: Função que recebe N e cria mais N registros no resultado
+            sizes: Tamanhos do resultado a medir
+        """
+        current = 0
+        counts = []
+        for size in sizes:
+            add_rows(size - current)
+            current = size
+            # A primeira chamada aquece caches (usuário autenticado, índice de busca)
+            request()
+            counts.append(self.count(request))
+
+        if len(set(counts)) > 1:
+            repeated = max(set(self.counter.statements), key=self.counter.statements.count)
+            pytest.fail(
+                f"N+1: {counts} statements para {list(sizes)} registros. "
+                f"Statement mais repetido: {repeated}"
+            )
+
+
+@pytest.fixture(scope="function")
+def n_plus_one(query_counter, monkeypatch):
+    """Fixture para verificar que uma rota não faz uma query por registro."""
+    # Medir as queries da rota, não acertos do cache de respostas
+    monkeypatch.setattr(response_cache, "ttl", 0)
+    return NPlusOneDetector(query_counter)
@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+from app.core import image_processor
+from app.core.config import settings
+from app.core.image_processor import image_processor_stats, process_image
+from app.utils.image_handler import generate_image_variants
+
+
+def _write_image(path, size, image_format="PNG", mode="RGB"):
+    Image.new(mode, size, (10, 120, 200, 255)[: len(mode)]).save(path, image_format)
+    return str(path)
+
+
+class TestImageProcessor:
+    """Testes para o pool de processamento de imagens"""
+
+    @pytest.mark.asyncio
+    async def test_optimize_in_pool(self, tmp_path):
+        """Teste: A imagem é reduzida no pool e as métricas são registradas"""
+        source = _write_image(tmp_path / "origem.png", (2000, 1000), mode="RGBA")
+        processed = image_processor_stats()["processed"]
+
+        variants = await process_image(generate_image_variants, source, "PNG", str(tmp_path), "final")
+
+        with Image.open(tmp_path / variants["image/png"]["1200"]) as result:
+            assert result.size == (1200, 600)
+            assert result.mode == "RGB"
+        stats = image_processor_stats()
+        assert stats["processed"] == processed + 1
+        assert stats["pending"] == 0
+        assert stats["processing_ms"]["max"] > 0
+
+    @pytest.mark.asyncio
+    async def test_event_loop_not_blocked(self, tmp_path):
+        """Teste: O event loop continua respondendo durante a otimização"""
+        source = _write_image(tmp_path / "origem.jpg", (3000, 3000), "JPEG")
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        # Aquecer o pool (o primeiro uso inicia os processos)
+        await process_image(generate_image_variants, source, "JPEG", str(tmp_path), "aquecimento")
+
+        task = asyncio.create_task(ticker())
+        await asyncio.gather(*(
+            process_image(generate_image_variants, source, "JPEG", str(tmp_path), f"final{i}")
+            for i in range(2)
+        ))
+        task.cancel()
+
+        assert ticks > 0
+
+    @pytest.mark.asyncio
+    async def test_queue_full_returns_503(self, monkeypatch):
+        """Teste: Fila cheia falha com 503 em vez de enfileirar"""
+        monkeypatch.setattr(image_processor.pool, "pending", settings.IMAGE_PROCESS_MAX_PENDING)
+        rejected = image_processor_stats()["rejected"]
+
+        with pytest.raises(HTTPException) as exc_info:
+            await process_image(generate_image_variants, "x.png", "PNG", ".", "y")
+
+        assert exc_info.value.status_code == 503
+        assert "Retry-After" in exc_info.value.headers
+        assert image_processor_stats()["rejected"] == rejected + 1
+
+    @pytest.mark.asyncio
+    async def test_worker_error_is_counted(self, tmp_path):
+        """Teste: Erro no worker é propagado e contado como falha"""
+        broken = tmp_path / "quebrada.png"
+        broken.write_bytes(b"\x89PNG\r\n\x1a\n" + b"\0" * 32)
+        failed = image_processor_stats()["failed"]
+
+        with pytest.raises(Exception):
+            await process_image(generate_image_variants, str(broken), "PNG", str(tmp_path), "final")
+
+        assert image_processor_stats()["failed"] == failed + 1
+        assert image_processor_stats()["pending"] == 0
+
+    def test_health_endpoint(self, client):
+        """Teste: GET /health/image-processor expõe a fila e os tempos"""
+        response = client.get("/health/image-processor")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["max_pending"] == settings.IMAGE_PROCESS_MAX_PENDING
+        assert {"pending", "processed", "rejected", "processing_ms", "wait_ms"} <= data.keys()
@@ -0,0 +1,194 @@
+"""
+Testes para o armazenamento de imagens endereçado por conteúdo.
+"""
+
+import io
+from datetime import datetime
+
+import pytest
+from PIL import Image
+
+from app.core import image_processor
+from app.core.image_storage import count_image_references, delete_unreferenced_images
+from app.models.category import Category
+from app.models.payment import Payment
+from app.models.product import Product
+from app.models.product_request import ProductRequest
+from app.utils import image_handler
+from app.utils.image_handler import stored_image_key
+
+
+def _jpeg(color=(200, 30, 30), size=(500, 250)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    """Salvar os uploads em um diretório temporário."""
+    monkeypatch.setattr(image_handler, "UPLOAD_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def products(db):
+    """Dois produtos sem imagem."""
+    category = Category(name="Imagens")
+    db.add(category)
+    db.commit()
+    rows = [
+        Product(name=f"Produto {i}", description="Produto", price=10.0, category_id=category.id, stock=1)
+        for i in range(2)
+    ]
+    db.add_all(rows)
+    db.commit()
+    return [row.id for row in rows]
+
+
+@pytest.fixture
+def upload(client, admin_auth_headers):
+    """Enviar uma imagem para um produto e devolver o image_url."""
+    def _upload(product_id, content):
+        response = client.post(
+            f"/api/v1/products/upload?product_id={product_id}",
+            files={"file": ("foto.jpg", content, "image/jpeg")},
+            headers=admin_auth_headers,
+        )
+        assert response.status_code == 200
+        return response.json()["product"]["image_url"]
+    return _upload
+
+
+class TestStoredImageKey:
+    """Testes para a chave extraída das URLs"""
+
+    def test_variant_and_legacy_urls(self):
+        """Teste: Variantes usam o prefixo; arquivos antigos, o nome inteiro"""
+        digest = "a" * 64
+        assert stored_image_key(f"/uploads/products/{digest}-400w.webp") == digest
+        assert stored_image_key(f"uploads/products/{digest}-1200w.jpg") == digest
+        assert stored_image_key("/uploads/products/1234-abcd.jpg") == "1234-abcd.jpg"
+
+    def test_external_urls_ignored(self):
+        """Teste: URLs externas não são imagens locais"""
+        assert stored_image_key("https://example.com/foto.jpg") is None
+        assert stored_image_key(None) is None
+        assert stored_image_key("/uploads/outros/foto.jpg") is None
+
+
+class TestContentAddressedStorage:
+    """Testes de deduplicação e contagem de referências"""
+
+    def test_identical_upload_is_not_reprocessed(self, products, upload, upload_dir):
+        """Teste: O mesmo arquivo enviado de novo reaproveita os caminhos existentes"""
+        processed = image_processor.image_processor_stats()["processed"]
+
+        first = upload(products[0], _jpeg())
+        second = upload(products[1], _jpeg())
+
+        assert first == second
+        assert image_processor.image_processor_stats()["processed"] == processed + 1
+        assert len(list(upload_dir.iterdir())) == 7  # 3 larguras x 2 formatos + manifesto
+
+    def test_shared_image_deleted_with_last_reference(self, db, products, upload, upload_dir):
+        """Teste: A imagem compartilhada só é apagada quando o último produto deixa de usá-la"""
+        upload(products[0], _jpeg())
+        upload(products[1], _jpeg())
+
+        upload(products[0], _jpeg(color=(0, 0, 255)))
+        assert len(list(upload_dir.iterdir())) == 14
+
+        upload(products[1], _jpeg(color=(0, 0, 255)))
+        assert len(list(upload_dir.iterdir())) == 7
+
+    def test_delete_product_deletes_image(self, client, admin_auth_headers, products, upload, upload_dir):
+        """Teste: Deletar o único produto que usa a imagem apaga os arquivos"""
+        upload(products[0], _jpeg())
+
+        response = client.delete(f"/api/v1/admin/products/{products[0]}", headers=admin_auth_headers)
+
+        assert response.status_code == 204
+        assert list(upload_dir.iterdir()) == []
+
+    def test_other_tables_hold_references(self, db, test_user, products, upload, upload_dir):
+        """Teste: Comprovante de pagamento que usa a imagem impede a remoção"""
+        user_id = test_user.id
+        image_url = upload(products[0], _jpeg())
+        request = ProductRequest(user_id=user_id, title="Bolsa", found_image_url=f"/{image_url}")
+        db.add(request)
+        db.flush()
+        db.add(Payment(
+            request_id=request.id,
+            user_id=user_id,
+            type="sinal",
+            amount=10.0,
+            payment_method="pix",
+            payment_date=datetime(2024, 1, 1),
+            receipt_url=f"/{image_url}",
+        ))
+        db.commit()
+
+        product = db.get(Product, products[0])
+        product.image_url = "https://example.com/foto.jpg"
+        db.commit()
+        request = db.get(ProductRequest, request.id)
+        request.found_image_url = None
+        db.commit()
+
+        assert len(list(upload_dir.iterdir())) == 7
+
+        payment = db.query(Payment).first()
+        payment.receipt_url = None
+        db.commit()
+
+        assert list(upload_dir.iterdir()) == []
+
+    def test_rollback_keeps_image(self, db, products, upload, upload_dir):
+        """Teste: Remoção desfeita (rollback) não apaga os arquivos"""
+        upload(products[0], _jpeg())
+
+        product = db.get(Product, products[0])
+        product.image_url = None
+        db.flush()
+        db.rollback()
+
+        assert len(list(upload_dir.iterdir())) == 7
+
+    def test_reference_count_is_one_query_per_column(self, db, products, query_counter):
+        """Teste: A contagem de um lote de chaves faz uma query por coluna"""
+        digests = [c * 64 for c in "abcdef"]
+        product = db.get(Product, products[0])
+        product.image_url = f"uploads/products/{digests[0]}-800w.jpg"
+        db.commit()
+        query_counter.reset()
+
+        counts = count_image_references(db, digests)
+
+        assert query_counter.count == 4  # image_url, reference/found_image_url, receipt_url
+        assert counts[digests[0]] == 1
+        assert all(counts[digest] == 0 for digest in digests[1:])
+
+    def test_reused_image_survives_concurrent_removal(self, db, products, upload, upload_dir):
+        """Teste: Imagem reaproveitada por um upload ainda não confirmado não é apagada"""
+        image_url = upload(products[0], _jpeg())
+        key = stored_image_key(image_url)
+        assert image_handler.reuse_stored_image(key) is not None
+
+        product = db.get(Product, products[0])
+        product.image_url = None
+        db.commit()
+        assert len(list(upload_dir.iterdir())) == 7
+
+        # O upload concorrente grava a referência e libera a reserva
+        product = db.get(Product, products[1])
+        product.image_url = image_url
+        db.commit()
+        assert not image_handler.image_is_leased(key)
+
+    def test_delete_rechecks_committed_references(self, db, products, upload, upload_dir):
+        """Teste: Referência gravada depois do flush impede a remoção"""
+        image_url = upload(products[0], _jpeg())
+
+        assert delete_unreferenced_images(db.get_bind(), {stored_image_key(image_url)}) == 0
+        assert len(list(upload_dir.iterdir())) == 7
@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.core import password_hasher
+from app.core.config import settings
+from app.core.password_hasher import (
+    hash_password_async,
+    password_hasher_stats,
+    verify_password_async,
+)
+from app.core.security import verify_password
+
+
+class TestPasswordHasher:
+    """Testes para o pool de hash de senha"""
+
+    @pytest.mark.asyncio
+    async def test_hash_and_verify_roundtrip(self):
+        """Teste: Hash gerado no pool é verificado corretamente"""
+        hashed = await hash_password_async("Senha123!")
+
+        assert verify_password("Senha123!", hashed)
+        assert await verify_password_async("Senha123!", hashed) is True
+        assert await verify_password_async("Errada123!", hashed) is False
+        assert password_hasher_stats()["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_event_loop_not_blocked(self):
+        """Teste: O event loop continua respondendo durante o hash"""
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        # Aquecer o pool (o primeiro uso inicia os processos)
+        await hash_password_async("Aquecimento1!")
+
+        task = asyncio.create_task(ticker())
+        await asyncio.gather(*(hash_password_async(f"Senha{i}!A") for i in range(4)))
+        task.cancel()
+
+        assert ticks > 0
+
+    @pytest.mark.asyncio
+    async def test_queue_full_returns_503(self, monkeypatch):
+        """Teste: Fila cheia falha com 503 em vez de enfileirar"""
+        monkeypatch.setattr(password_hasher.pool, "pending", settings.PASSWORD_HASH_MAX_PENDING)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await hash_password_async("Senha123!")
+
+        assert exc_info.value.status_code == 503
@@ -0,0 +1,53 @@
+import os
+import time
+import pytest
+from fastapi import HTTPException
+from app.core.process_pool import BoundedProcessPool
+
+
+@pytest.fixture
+def pool():
+    pool = BoundedProcessPool(name="teste", workers=1, max_pending=4, busy_detail="Ocupado", retry_after=3)
+    yield pool
+    pool.shutdown()
+
+
+def _kill_workers(pool):
+    """Matar os processos do pool por fora e esperar o executor notar."""
+    executor = pool._get_executor()
+    for process in list(executor._processes.values()):
+        process.kill()
+    deadline = time.monotonic() + 10
+    while not executor._broken and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert executor._broken
+
+
+class TestBoundedProcessPool:
+    """Testes para o pool de processos compartilhado"""
+
+    @pytest.mark.asyncio
+    async def test_dead_worker_returns_503_and_pool_recovers(self, pool):
+        """Teste: Processo morto durante a tarefa gera 503 e o pool é recriado"""
+        assert await pool.run(pow, 2, 3) == 8
+
+        with pytest.raises(HTTPException) as exc_info:
+            await pool.run(os._exit, 1)
+
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.headers["Retry-After"] == "3"
+        assert await pool.run(pow, 2, 4) == 16
+        stats = pool.stats()
+        assert stats["restarts"] == 1
+        assert stats["failed"] == 1
+        assert stats["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_task_sent_to_broken_pool_is_retried(self, pool):
+        """Teste: Tarefa enviada a um pool já quebrado roda no pool novo"""
+        await pool.run(pow, 2, 3)
+        _kill_workers(pool)
+
+        assert await pool.run(pow, 3, 2) == 9
+        assert pool.stats()["restarts"] == 1
+        assert pool.stats()["failed"] == 0
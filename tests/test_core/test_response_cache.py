@@ -0,0 +1,267 @@
+"""
+Testes para o cache de respostas do catálogo.
+"""
+
+import fnmatch
+import json
+
+import pytest
+
+from app.core.response_cache import (
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    ResponseCache,
+    cache_key,
+    response_cache,
+)
+from app.models.category import Category
+from app.models.product import Product
+
+
+class FakeRedis:
+    """Substituto local do Redis com os comandos usados pelo backend."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def sadd(self, key, *members):
+        self.data.setdefault(key, set()).update(members)
+
+    def smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    def expire(self, key, seconds):
+        pass
+
+    def scan_iter(self, match="*"):
+        return [key for key in list(self.data) if fnmatch.fnmatch(key, match)]
+
+
+@pytest.fixture(params=["memory", "redis"])
+def cache(request):
+    """Cache com cada um dos backends."""
+    if request.param == "memory":
+        backend = MemoryCacheBackend(maxsize=100, ttl=60)
+    else:
+        backend = RedisCacheBackend(FakeRedis())
+    return ResponseCache(backend, ttl=60)
+
+
+class TestCacheKey:
+    """Testes para a normalização das chaves"""
+
+    def test_order_and_none_do_not_matter(self):
+        """Teste: Ordem dos parâmetros e valores None não mudam a chave"""
+        assert cache_key("products.list", limit=10, search=None, skip=0) == cache_key(
+            "products.list", skip=0, limit=10
+        )
+
+    def test_different_values_different_keys(self):
+        """Teste: Valores diferentes geram chaves diferentes"""
+        assert cache_key("products.list", skip=0) != cache_key("products.list", skip=10)
+        assert cache_key("products.detail", product_id=1) != cache_key("stock.available", product_id=1)
+
+
+class TestResponseCacheBackends:
+    """Testes dos backends memory e redis"""
+
+    def test_set_get_roundtrip(self, cache):
+        """Teste: Valor guardado é retornado igual"""
+        key = cache_key("products.detail", product_id=1)
+        cache.set(key, {"id": 1, "name": "Camisa"}, {"product:1"})
+
+        assert cache.get(key) == {"id": 1, "name": "Camisa"}
+
+    def test_invalidate_by_tag(self, cache):
+        """Teste: Invalidar uma tag remove só as entradas marcadas com ela"""
+        cache.set("products.detail:1", {"id": 1}, {"product:1", "category:1"})
+        cache.set("products.detail:2", {"id": 2}, {"product:2", "category:2"})
+
+        cache.invalidate("category:1")
+
+        assert cache.get("products.detail:1") is None
+        assert cache.get("products.detail:2") == {"id": 2}
+
+    def test_clear(self, cache):
+        """Teste: clear remove tudo e zera os contadores"""
+        cache.set("categories.list:{}", [], {"categories"})
+        cache.get("categories.list:{}")
+
+        cache.clear()
+
+        assert cache.get("categories.list:{}") is None
+        assert cache.stats()["hits"] == 0
+
+    def test_stale_response_not_stored(self, cache):
+        """Teste: Resposta calculada antes de uma invalidação não é guardada"""
+        generation = cache.generation
+        cache.invalidate("product:1")
+        cache.set("products.detail:1", {"id": 1}, {"product:1"}, generation=generation)
+
+        assert cache.get("products.detail:1") is None
+
+    def test_counters(self, cache):
+        """Teste: Acertos e falhas são contados por endpoint"""
+        cache.get("products.list:{}")
+        cache.set("products.list:{}", {"items": []}, {"products"})
+        cache.get("products.list:{}")
+        cache.get("products.list:{}")
+
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["by_endpoint"]["products.list"] == {"hits": 2, "misses": 1}
+
+    def test_disabled_with_zero_ttl(self):
+        """Teste: TTL 0 desativa o cache"""
+        cache = ResponseCache(MemoryCacheBackend(maxsize=10, ttl=0), ttl=0)
+        cache.set("k:1", {"a": 1}, {"t"})
+
+        assert cache.get("k:1") is None
+
+    def test_backend_error_is_a_miss(self):
+        """Teste: Falha no backend vira miss, sem levantar erro"""
+        class BrokenRedis(FakeRedis):
+            def get(self, key):
+                raise ConnectionError("redis fora do ar")
+
+        cache = ResponseCache(RedisCacheBackend(BrokenRedis()), ttl=60)
+
+        assert cache.get("products.list:{}") is None
+        assert cache.stats()["misses"] == 1
+
+    def test_redis_stores_json(self):
+        """Teste: Backend redis guarda JSON com prefixo e SET por tag"""
+        client = FakeRedis()
+        cache = ResponseCache(RedisCacheBackend(client), ttl=60)
+        cache.set("products.detail:1", {"id": 1}, {"product:1"})
+
+        assert json.loads(client.data["response_cache:products.detail:1"]) == {"id": 1}
+        assert client.data["response_cache:tag:product:1"] == {"products.detail:1"}
+
+
+def _create_product(db, stock=5):
+    category = Category(name="Cache")
+    db.add(category)
+    db.commit()
+    product = Product(
+        name="Camisa Polo",
+        description="Algodão",
+        price=50.0,
+        category_id=category.id,
+        stock=stock,
+        is_active=True,
+    )
+    db.add(product)
+    db.commit()
+    return product.id, category.id
+
+
+class TestCatalogEndpointsCache:
+    """Testes do cache nos endpoints públicos do catálogo"""
+
+    def test_second_request_is_a_hit(self, client, db, query_counter):
+        """Teste: Segunda requisição igual não consulta o banco"""
+        product_id, _ = _create_product(db)
+
+        for url in [
+            "/api/v1/products",
+            f"/api/v1/products/{product_id}",
+            "/api/v1/categories",
+            f"/api/v1/stock/products/{product_id}/available",
+        ]:
+            first = client.get(url)
+            query_counter.reset()
+            second = client.get(url)
+
+            assert second.status_code == 200
+            assert second.json() == first.json()
+            assert query_counter.count == 0, url
+
+        stats = client.get("/health/cache").json()
+        assert stats["hits"] == 4
+        assert stats["misses"] == 4
+
+    def test_equivalent_queries_share_entry(self, client, db):
+        """Teste: Parâmetros padrão explícitos usam a mesma entrada"""
+        _create_product(db)
+
+        client.get("/api/v1/products")
+        client.get("/api/v1/products?sort_by=created_at&sort_order=desc&skip=0&limit=10")
+
+        assert response_cache.stats()["by_endpoint"]["products.list"] == {"hits": 1, "misses": 1}
+
+    def test_update_product_invalidates(self, client, db, admin_auth_headers):
+        """Teste: Atualizar o produto invalida detalhe e listagem"""
+        product_id, _ = _create_product(db)
+        client.get(f"/api/v1/products/{product_id}")
+        client.get("/api/v1/products")
+
+        response = client.put(
+            f"/api/v1/products/{product_id}",
+            json={"name": "Camisa Nova"},
+            headers=admin_auth_headers,
+        )
+        assert response.status_code == 200
+
+        assert client.get(f"/api/v1/products/{product_id}").json()["name"] == "Camisa Nova"
+        assert client.get("/api/v1/products").json()["items"][0]["name"] == "Camisa Nova"
+
+    def test_stock_change_invalidates(self, client, db, auth_headers):
+        """Teste: Baixa de estoque de um pedido invalida a disponibilidade"""
+        product_id, _ = _create_product(db, stock=5)
+        url = f"/api/v1/stock/products/{product_id}/available"
+        assert client.get(url).json()["available_quantity"] == 5
+
+        response = client.post(
+            "/api/v1/orders",
+            json={
+                "items": [{"product_id": product_id, "quantity": 2}],
+                "shipping_address": "Rua das Flores, 123",
+                "payment_method": "credit_card",
+            },
+            headers=auth_headers,
+        )
+        assert response.status_code == 201
+
+        assert client.get(url).json()["available_quantity"] == 3
+
+    def test_category_change_invalidates_product(self, client, db, admin_auth_headers):
+        """Teste: Renomear a categoria invalida o detalhe dos produtos dela"""
+        product_id, category_id = _create_product(db)
+        client.get(f"/api/v1/products/{product_id}")
+        client.get("/api/v1/categories")
+
+        response = client.put(
+            f"/api/v1/categories/{category_id}",
+            json={"name": "Renomeada"},
+            headers=admin_auth_headers,
+        )
+        assert response.status_code == 200
+
+        assert client.get(f"/api/v1/products/{product_id}").json()["category"]["name"] == "Renomeada"
+        assert client.get("/api/v1/categories").json()[0]["name"] == "Renomeada"
+
+    def test_rollback_does_not_invalidate(self, db):
+        """Teste: Alteração desfeita (rollback) não invalida o cache"""
+        product_id, _ = _create_product(db)
+        key = cache_key("products.detail", product_id=product_id)
+        response_cache.set(key, {"id": product_id}, {f"product:{product_id}"})
+
+        product = db.get(Product, product_id)
+        product.name = "Desfeito"
+        db.flush()
+        db.rollback()
+
+        assert response_cache.get(key) == {"id": product_id}
+        response_cache.clear()
@@ -0,0 +1,126 @@
+import pytest
+from app.core.search import InMemorySearchIndex, fold, tokenize
+from app.models.product import Product
+
+
+# ============================================================================
+# FIXTURES AUXILIARES
+# ============================================================================
+
+@pytest.fixture
+def search_products(db, test_category):
+    """Fixture com produtos para busca"""
+    products = [
+        Product(name="Calção de Banho", description="Calção masculino para praia",
+                price=50.0, category_id=test_category.id, stock=5),
+        Product(name="Camisa Polo", description="Camisa de algodão",
+                price=80.0, category_id=test_category.id, stock=5),
+        Product(name="Camiseta Básica", description="Algodão orgânico",
+                price=40.0, category_id=test_category.id, stock=5),
+        Product(name="Tênis Corrida", description="Tênis leve para corrida e caminhada",
+                price=300.0, category_id=test_category.id, stock=5),
+    ]
+    db.add_all(products)
+    db.commit()
+    return {product.name: product.id for product in products}
+
+
+@pytest.fixture
+def index(db, search_products):
+    index = InMemorySearchIndex()
+    index.build(db)
+    return index
+
+
+# ============================================================================
+# TESTES DE NORMALIZAÇÃO
+# ============================================================================
+
+class TestTokenize:
+    """Testes para normalização de texto"""
+
+    def test_fold_removes_accents(self):
+        """Teste: Acentos e cedilha são removidos"""
+        assert fold("Calção Algodão Tênis") == "calcao algodao tenis"
+
+    def test_tokenize_removes_stopwords(self):
+        """Teste: Stopwords são removidas"""
+        assert tokenize("Camisa de Algodão") == ["camisa", "algodao"]
+
+    def test_tokenize_only_stopwords(self):
+        """Teste: Texto só com stopwords mantém os tokens"""
+        assert tokenize("de") == ["de"]
+
+
+# ============================================================================
+# TESTES DO ÍNDICE EM MEMÓRIA
+# ============================================================================
+
+class TestInMemorySearchIndex:
+    """Testes para o índice invertido em memória"""
+
+    def test_search_accent_insensitive(self, db, index, search_products):
+        """Teste: Busca sem acento encontra texto com acento"""
+        assert index.search(db, "calcao") == [search_products["Calção de Banho"]]
+        assert index.search(db, "TÊNIS") == [search_products["Tênis Corrida"]]
+
+    def test_search_prefix(self, db, index, search_products):
+        """Teste: Busca por prefixo de palavra"""
+        ids = index.search(db, "cami")
+        assert set(ids) == {
+            search_products["Camisa Polo"],
+            search_products["Camiseta Básica"],
+            search_products["Tênis Corrida"],  # "caminhada" na descrição
+        }
+
+    def test_search_ranks_name_above_description(self, db, index, search_products):
+        """Teste: Termo no nome vale mais que termo na descrição"""
+        assert index.search(db, "camisa")[0] == search_products["Camisa Polo"]
+
+    def test_search_all_terms_required(self, db, index, search_products):
+        """Teste: Todos os termos precisam aparecer"""
+        assert index.search(db, "camisa algodao") == [search_products["Camisa Polo"]]
+        assert index.search(db, "camisa praia") == []
+
+    def test_index_product_updates(self, db, index, search_products):
+        """Teste: Atualização incremental de um produto"""
+        product = db.get(Product, search_products["Camisa Polo"])
+        product.name = "Regata Lisa"
+        db.commit()
+
+        index.index_product(product)
+        assert index.search(db, "regata") == [product.id]
+        assert index.search(db, "polo") == []
+
+    def test_remove_product(self, db, index, search_products):
+        """Teste: Produto removido não aparece mais"""
+        index.remove_product(search_products["Calção de Banho"])
+        assert index.search(db, "calcao") == []
+
+    def test_search_builds_lazily(self, db, search_products):
+        """Teste: Índice não construído é construído na primeira busca"""
+        index = InMemorySearchIndex()
+        assert not index.ready
+        assert index.search(db, "polo") == [search_products["Camisa Polo"]]
+        assert index.ready
+
+    def test_conditions_apply_before_limit(self, db, index, search_products):
+        """Teste: Filtros são aplicados antes do corte em `limit`"""
+        ids = index.search(db, "cami", [Product.price >= 300], limit=1)
+        assert ids == [search_products["Tênis Corrida"]]
+
+    def test_refresh_sees_changes_from_other_workers(self, db, index, search_products, monkeypatch):
+        """Teste: Alterações feitas fora deste índice aparecem após a conferência"""
+        from datetime import datetime, timedelta
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "SEARCH_INDEX_REFRESH_SECONDS", 0)
+        product = db.get(Product, search_products["Camisa Polo"])
+        product.name = "Regata Lisa"
+        product.updated_at = datetime.utcnow() + timedelta(minutes=1)
+        db.delete(db.get(Product, search_products["Calção de Banho"]))
+        db.commit()
+
+        assert index.search(db, "regata") == [product.id]
+        assert index.search(db, "polo") == []
+        assert index.search(db, "calcao") == []
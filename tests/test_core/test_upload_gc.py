@@ -0,0 +1,182 @@
+"""
+Testes para o coletor de uploads órfãos.
+"""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.core import upload_gc
+from app.core.upload_gc import collect_orphan_uploads, upload_gc_loop
+from app.models.category import Category
+from app.models.product import Product
+from app.utils import image_handler
+
+DIGEST = "b" * 64
+OLD = time.time() - 10 * 24 * 60 * 60
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    """Diretório de uploads e de quarentena temporários."""
+    uploads = tmp_path / "uploads"
+    quarantine = tmp_path / "quarentena"
+    uploads.mkdir()
+    monkeypatch.setattr(image_handler, "UPLOAD_DIR", uploads)
+    monkeypatch.setattr(upload_gc, "QUARANTINE_DIR", quarantine)
+    return uploads, quarantine
+
+
+def _write(directory, name, size=100, mtime=OLD):
+    path = directory / name
+    path.write_bytes(b"x" * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def referenced_product(db):
+    """Produto que usa a imagem DIGEST (variantes + manifesto)."""
+    category = Category(name="GC")
+    db.add(category)
+    db.commit()
+    product = Product(
+        name="Camisa",
+        description="Algodão",
+        price=10.0,
+        category_id=category.id,
+        stock=1,
+        image_url=f"uploads/products/{DIGEST}-800w.jpg",
+    )
+    db.add(product)
+    db.commit()
+    return product.id
+
+
+class TestCollectOrphanUploads:
+    """Testes da quarentena e da remoção"""
+
+    def test_quarantines_only_old_unreferenced(self, db, dirs, referenced_product):
+        """Teste: Só arquivos sem referência e fora da carência vão para a quarentena"""
+        uploads, quarantine = dirs
+        for name in [f"{DIGEST}-800w.jpg", f"{DIGEST}-400w.webp", f"{DIGEST}.json"]:
+            _write(uploads, name)
+        _write(uploads, "orfao.jpg", size=300)
+        _write(uploads, "recente.jpg", mtime=time.time())
+
+        report = collect_orphan_uploads(db, grace_seconds=3600, quarantine_seconds=3600)
+
+        assert report["scanned"] == 5
+        assert report["referenced"] == 3
+        assert report["recent"] == 1
+        assert report["quarantined"] == 1
+        assert report["bytes_quarantined"] == 300
+        assert report["deleted"] == 0
+        assert sorted(p.name for p in quarantine.iterdir()) == ["orfao.jpg"]
+        assert len(list(uploads.iterdir())) == 4
+
+    def test_deletes_after_quarantine(self, db, dirs):
+        """Teste: Arquivos em quarentena vencida são apagados e os bytes contados"""
+        uploads, quarantine = dirs
+        _write(uploads, "orfao.jpg", size=300)
+        collect_orphan_uploads(db, grace_seconds=0, quarantine_seconds=3600)
+
+        report = collect_orphan_uploads(db, grace_seconds=0, quarantine_seconds=0)
+
+        assert report["deleted"] == 1
+        assert report["bytes_reclaimed"] == 300
+        assert list(quarantine.iterdir()) == []
+
+    def test_restores_if_referenced_again(self, db, dirs):
+        """Teste: Arquivo que voltou a ser usado sai da quarentena em vez de ser apagado"""
+        uploads, quarantine = dirs
+        _write(uploads, f"{DIGEST}-800w.jpg")
+        collect_orphan_uploads(db, grace_seconds=0, quarantine_seconds=3600)
+        assert list(uploads.iterdir()) == []
+
+        category = Category(name="GC")
+        db.add(category)
+        db.commit()
+        db.add(Product(
+            name="Camisa",
+            description="Algodão",
+            price=10.0,
+            category_id=category.id,
+            stock=1,
+            image_url=f"/uploads/products/{DIGEST}-800w.jpg",
+        ))
+        db.commit()
+
+        report = collect_orphan_uploads(db, grace_seconds=0, quarantine_seconds=0)
+
+        assert report["restored"] == 1
+        assert report["deleted"] == 0
+        assert [p.name for p in uploads.iterdir()] == [f"{DIGEST}-800w.jpg"]
+
+    def test_image_reused_during_pass_is_kept(self, db, dirs, monkeypatch):
+        """Teste: Imagem reaproveitada por um upload depois da leitura do lote fica no lugar"""
+        uploads, quarantine = dirs
+        path = _write(uploads, f"{DIGEST}-800w.jpg")
+        confirmed_orphans = upload_gc._confirmed_orphans
+
+        def reuse_before_confirming(db, keys):
+            lease = time.time() + image_handler.REUSE_LEASE_SECONDS
+            os.utime(path, (lease, lease))
+            return confirmed_orphans(db, keys)
+
+        monkeypatch.setattr(upload_gc, "_confirmed_orphans", reuse_before_confirming)
+        report = collect_orphan_uploads(db, grace_seconds=3600)
+
+        assert report["quarantined"] == 0
+        assert report["recent"] == 1
+        assert path.exists()
+
+    def test_dry_run(self, db, dirs):
+        """Teste: Simulação conta, mas não move nada"""
+        uploads, quarantine = dirs
+        _write(uploads, "orfao.jpg")
+
+        report = collect_orphan_uploads(db, grace_seconds=0, dry_run=True)
+
+        assert report["quarantined"] == 1
+        assert report["dry_run"] is True
+        assert (uploads / "orfao.jpg").exists()
+        assert not quarantine.exists()
+
+    def test_batches(self, db, dirs):
+        """Teste: Lotes pequenos processam o diretório inteiro"""
+        uploads, quarantine = dirs
+        for i in range(7):
+            _write(uploads, f"orfao{i}.jpg")
+
+        report = collect_orphan_uploads(db, grace_seconds=0, batch_size=2)
+
+        assert report["scanned"] == 7
+        assert report["quarantined"] == 7
+
+
+class TestUploadGcScheduling:
+    """Testes da tarefa periódica e do endpoint de saúde"""
+
+    def test_loop_runs_periodically(self, monkeypatch):
+        """Teste: A tarefa periódica chama o coletor a cada intervalo"""
+        calls = []
+        monkeypatch.setattr(upload_gc, "run_upload_gc", lambda: calls.append(1))
+
+        async def run_for_a_while():
+            task = asyncio.create_task(upload_gc_loop(0.01))
+            await asyncio.sleep(0.1)
+            task.cancel()
+
+        asyncio.run(run_for_a_while())
+
+        assert len(calls) >= 2
+
+    def test_health_endpoint(self, client):
+        """Teste: GET /health/upload-gc expõe a configuração"""
+        response = client.get("/health/upload-gc")
+
+        assert response.status_code == 200
+        assert {"interval_seconds", "grace_seconds", "quarantine_seconds", "last_run"} <= response.json().keys()
@@ -0,0 +1,143 @@
+import os
+import threading
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import cart_items
+from app.crud.cart_items import MAX_DISTINCT_ITEMS, add_cart_item
+from app.database import Base
+from app.models.cart import Cart, CartItem
+from app.models.category import Category
+from app.models.product import Product
+from app.models.user import User
+from tests.conftest import engine as sqlite_engine
+
+
+# ============================================================================
+# FIXTURES AUXILIARES
+# ============================================================================
+
+POSTGRES_TEST_URL = os.getenv("POSTGRES_TEST_URL")
+
+
+@pytest.fixture(params=["sqlite", "postgres", "fallback"])
+def session_factory(request, monkeypatch):
+    """Fábrica de sessões para cada banco (Postgres só com POSTGRES_TEST_URL) e para o caminho sem upsert."""
+    if request.param == "postgres":
+        if not POSTGRES_TEST_URL:
+            pytest.skip("POSTGRES_TEST_URL não configurada")
+        engine = create_engine(POSTGRES_TEST_URL, pool_size=20)
+    else:
+        engine = sqlite_engine
+        if request.param == "fallback":
+            monkeypatch.setattr(cart_items, "_UPSERT_INSERTS", {})
+
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    finally:
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def cart_and_products(session_factory):
+    """Um carrinho e IDs de produtos suficientes para o limite de itens."""
+    db = session_factory()
+    try:
+        user = User(email="carrinho@example.com", username="carrinho", hashed_password="x")
+        category = Category(name="Carrinho")
+        db.add_all([user, category])
+        db.flush()
+        cart = Cart(user_id=user.id)
+        products = [
+            Product(name=f"Produto {i}", description="Produto", price=10.0, category_id=category.id, stock=10)
+            for i in range(MAX_DISTINCT_ITEMS + 1)
+        ]
+        db.add(cart)
+        db.add_all(products)
+        db.commit()
+        return cart.id, [product.id for product in products]
+    finally:
+        db.close()
+
+
+def _items(session_factory, cart_id):
+    db = session_factory()
+    try:
+        return db.query(CartItem.product_id, CartItem.quantity).filter(CartItem.cart_id == cart_id).all()
+    finally:
+        db.close()
+
+
+# ============================================================================
+# TESTES DO UPSERT
+# ============================================================================
+
+class TestAddCartItem:
+    """Testes para o upsert de itens do carrinho"""
+
+    def test_insert_then_sum(self, session_factory, cart_and_products):
+        """Teste: A primeira adição cria o item; as seguintes somam a quantidade"""
+        cart_id, product_ids = cart_and_products
+
+        db = session_factory()
+        item_id, quantity = add_cart_item(db, cart_id, product_ids[0], 2, 10.0)
+        assert quantity == 2
+        assert add_cart_item(db, cart_id, product_ids[0], 3, 99.0) == (item_id, 5)
+        db.commit()
+        db.close()
+
+        assert _items(session_factory, cart_id) == [(product_ids[0], 5)]
+
+    def test_quantity_cap(self, session_factory, cart_and_products):
+        """Teste: A soma não passa de 1000 unidades"""
+        cart_id, product_ids = cart_and_products
+
+        db = session_factory()
+        add_cart_item(db, cart_id, product_ids[0], 999, 10.0)
+        assert add_cart_item(db, cart_id, product_ids[0], 2, 10.0) is None
+        db.commit()
+        db.close()
+
+        assert _items(session_factory, cart_id) == [(product_ids[0], 999)]
+
+    def test_distinct_items_limit(self, session_factory, cart_and_products):
+        """Teste: Carrinho cheio não aceita produto novo, mas soma nos existentes"""
+        cart_id, product_ids = cart_and_products
+
+        db = session_factory()
+        for product_id in product_ids[:MAX_DISTINCT_ITEMS]:
+            add_cart_item(db, cart_id, product_id, 1, 10.0)
+
+        assert add_cart_item(db, cart_id, product_ids[-1], 1, 10.0) is None
+        assert add_cart_item(db, cart_id, product_ids[0], 1, 10.0)[1] == 2
+        db.commit()
+        db.close()
+
+        assert len(_items(session_factory, cart_id)) == MAX_DISTINCT_ITEMS
+
+    def test_concurrent_adds_never_duplicate(self, session_factory, cart_and_products, request):
+        """Teste: Adições simultâneas do mesmo produto viram uma linha com a soma"""
+        if "fallback" in request.node.callspec.id:
+            pytest.skip("Sem upsert, inserções simultâneas dependem do índice único")
+        cart_id, product_ids = cart_and_products
+        workers = 10
+        barrier = threading.Barrier(workers)
+
+        def worker():
+            db = session_factory()
+            try:
+                barrier.wait()
+                add_cart_item(db, cart_id, product_ids[0], 1, 10.0)
+                db.commit()
+            finally:
+                db.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert _items(session_factory, cart_id) == [(product_ids[0], workers)]
@@ -0,0 +1,162 @@
+import os
+import threading
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.category import Category
+from app.models.product import Product
+from app.crud.inventory import (
+    InsufficientStockError,
+    load_products_by_id,
+    release_stock,
+    reserve_stock,
+)
+from tests.conftest import engine as sqlite_engine
+
+
+# ============================================================================
+# FIXTURES AUXILIARES
+# ============================================================================
+
+POSTGRES_TEST_URL = os.getenv("POSTGRES_TEST_URL")
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def session_factory(request):
+    """Fábrica de sessões para cada banco suportado (Postgres só com POSTGRES_TEST_URL)."""
+    if request.param == "sqlite":
+        engine = sqlite_engine
+    else:
+        if not POSTGRES_TEST_URL:
+            pytest.skip("POSTGRES_TEST_URL não configurada")
+        engine = create_engine(POSTGRES_TEST_URL, pool_size=20)
+
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    finally:
+        Base.metadata.drop_all(bind=engine)
+
+
+def _create_product(session_factory, stock, name="Produto Estoque"):
+    """Criar um produto com o estoque informado e retornar seu ID."""
+    db = session_factory()
+    try:
+        category = Category(name=f"Categoria {name}")
+        db.add(category)
+        db.flush()
+        product = Product(
+            name=name,
+            description="Produto para teste de estoque",
+            price=10.0,
+            category_id=category.id,
+            stock=stock,
+            is_active=True,
+        )
+        db.add(product)
+        db.commit()
+        return product.id
+    finally:
+        db.close()
+
+
+def _get_stock(session_factory, product_id):
+    db = session_factory()
+    try:
+        return db.query(Product.stock).filter(Product.id == product_id).scalar()
+    finally:
+        db.close()
+
+
+# ============================================================================
+# TESTES DE BAIXA DE ESTOQUE
+# ============================================================================
+
+class TestReserveStock:
+    """Testes para a baixa atômica de estoque"""
+
+    def test_reserve_stock_success(self, session_factory):
+        """Teste: Baixa de estoque com quantidade disponível"""
+        product_id = _create_product(session_factory, stock=5)
+
+        db = session_factory()
+        reserve_stock(db, {product_id: 3})
+        db.commit()
+        db.close()
+
+        assert _get_stock(session_factory, product_id) == 2
+
+    def test_reserve_stock_insufficient(self, session_factory):
+        """Teste: Baixa maior que o estoque falha e não altera nada"""
+        first_id = _create_product(session_factory, stock=5, name="Primeiro")
+        second_id = _create_product(session_factory, stock=1, name="Segundo")
+
+        db = session_factory()
+        with pytest.raises(InsufficientStockError) as exc_info:
+            reserve_stock(db, {first_id: 2, second_id: 2})
+        db.rollback()
+        db.close()
+
+        assert exc_info.value.product_ids == [second_id]
+        assert _get_stock(session_factory, first_id) == 5
+        assert _get_stock(session_factory, second_id) == 1
+
+    def test_reserve_stock_refreshes_loaded_product(self, session_factory):
+        """Teste: Produto já carregado na sessão reflete o novo estoque"""
+        product_id = _create_product(session_factory, stock=5)
+
+        db = session_factory()
+        product = load_products_by_id(db, [product_id])[product_id]
+        reserve_stock(db, {product_id: 2})
+        assert product.stock == 3
+        db.rollback()
+        db.close()
+
+    def test_release_stock(self, session_factory):
+        """Teste: Devolução de estoque"""
+        product_id = _create_product(session_factory, stock=5)
+
+        db = session_factory()
+        release_stock(db, {product_id: 4})
+        db.commit()
+        db.close()
+
+        assert _get_stock(session_factory, product_id) == 9
+
+    def test_concurrent_reserve_never_oversells(self, session_factory):
+        """Teste: Checkouts concorrentes nunca vendem mais que o estoque"""
+        initial_stock = 5
+        workers = 20
+        product_id = _create_product(session_factory, stock=initial_stock)
+
+        barrier = threading.Barrier(workers)
+        results = []
+        lock = threading.Lock()
+
+        def worker():
+            db = session_factory()
+            try:
+                barrier.wait()
+                reserve_stock(db, {product_id: 1})
+                db.commit()
+                outcome = "ok"
+            except InsufficientStockError:
+                db.rollback()
+                outcome = "sem_estoque"
+            finally:
+                db.close()
+            with lock:
+                results.append(outcome)
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(results) == workers
+        assert results.count("ok") == initial_stock
+        assert results.count("sem_estoque") == workers - initial_stock
+        assert _get_stock(session_factory, product_id) == 0
@@ -0,0 +1,223 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.crud.inventory import InsufficientStockError, reserve_stock
+from app.crud.reservations import (
+    held_quantities,
+    hold_stock,
+    hold_stock_many,
+    release_reservations,
+    sweep_expired_reservations,
+)
+from app.models.cart import Cart
+from app.models.product import Product
+from app.models.stock_reservation import StockReservation
+from app.models.user import User
+
+
+# ============================================================================
+# FIXTURES AUXILIARES
+# ============================================================================
+
+@pytest.fixture
+def product_id(db, test_category):
+    product = Product(
+        name="Lançamento",
+        description="Edição limitada",
+        price=10.0,
+        category_id=test_category.id,
+        stock=5,
+    )
+    db.add(product)
+    db.commit()
+    return product.id
+
+
+@pytest.fixture
+def carts(db):
+    """Dois carrinhos de usuários diferentes."""
+    ids = []
+    for i in range(2):
+        user = User(email=f"reserva{i}@example.com", username=f"reserva{i}", hashed_password="x")
+        db.add(user)
+        db.flush()
+        cart = Cart(user_id=user.id)
+        db.add(cart)
+        db.flush()
+        ids.append(cart.id)
+    db.commit()
+    return ids
+
+
+def _stock(db, product_id):
+    db.expire_all()
+    product = db.get(Product, product_id)
+    return product.stock, product.reserved_stock
+
+
+# ============================================================================
+# TESTES DAS RESERVAS
+# ============================================================================
+
+class TestHoldStock:
+    """Testes para reservar e devolver estoque"""
+
+    def test_hold_stock(self, db, product_id, carts):
+        """Teste: A reserva aumenta reserved_stock sem mexer no estoque"""
+        hold_stock(db, carts[0], product_id, 3)
+        db.commit()
+
+        assert _stock(db, product_id) == (5, 3)
+        assert held_quantities(db, carts[0]) == {product_id: 3}
+
+    def test_hold_replaces_previous_quantity(self, db, product_id, carts):
+        """Teste: Nova reserva do mesmo carrinho reserva só a diferença"""
+        hold_stock(db, carts[0], product_id, 3)
+        hold_stock(db, carts[0], product_id, 5)
+        assert _stock(db, product_id) == (5, 5)
+
+        hold_stock(db, carts[0], product_id, 1)
+        assert _stock(db, product_id) == (5, 1)
+        assert db.query(StockReservation).count() == 1
+
+    def test_hold_blocked_by_other_cart(self, db, product_id, carts):
+        """Teste: Unidades reservadas por outro carrinho não podem ser reservadas"""
+        hold_stock(db, carts[0], product_id, 4)
+
+        with pytest.raises(InsufficientStockError):
+            hold_stock(db, carts[1], product_id, 2)
+
+    def test_hold_renews_expiration(self, db, product_id, carts):
+        """Teste: Reservar de novo renova o prazo"""
+        hold_stock(db, carts[0], product_id, 1)
+        db.query(StockReservation).update({"expires_at": datetime.utcnow() - timedelta(minutes=1)})
+
+        hold_stock(db, carts[0], product_id, 1)
+
+        reservation = db.query(StockReservation).one()
+        db.refresh(reservation)
+        assert reservation.expires_at > datetime.utcnow()
+
+    def test_release_reservations(self, db, product_id, carts):
+        """Teste: Liberar as reservas devolve as unidades"""
+        hold_stock(db, carts[0], product_id, 3)
+
+        assert release_reservations(db, carts[0]) == {product_id: 3}
+        assert _stock(db, product_id) == (5, 0)
+        assert db.query(StockReservation).count() == 0
+
+    def test_sale_respects_reservations(self, db, product_id, carts):
+        """Teste: A baixa de estoque não vende unidades reservadas"""
+        hold_stock(db, carts[0], product_id, 4)
+
+        with pytest.raises(InsufficientStockError):
+            reserve_stock(db, {product_id: 2})
+        reserve_stock(db, {product_id: 1})
+        assert _stock(db, product_id) == (4, 4)
+
+    def test_deleting_cart_releases(self, db, product_id, carts):
+        """Teste: Excluir o carrinho pelo ORM devolve as reservas"""
+        hold_stock(db, carts[0], product_id, 2)
+        db.commit()
+
+        db.delete(db.get(Cart, carts[0]))
+        db.commit()
+
+        assert _stock(db, product_id) == (5, 0)
+
+    def test_reservations_do_not_touch_product(self, db, product_id, carts):
+        """Teste: Reservar não muda updated_at nem invalida as listagens do catálogo"""
+        from app.core.response_cache import _PENDING_TAGS
+
+        edited = datetime(2024, 1, 1, 12, 0)
+        db.query(Product).filter(Product.id == product_id).update({"updated_at": edited})
+        db.commit()
+
+        hold_stock(db, carts[0], product_id, 3)
+        hold_stock(db, carts[0], product_id, 1)
+        assert db.info[_PENDING_TAGS] == {"stock", f"product:{product_id}"}
+        release_reservations(db, carts[0])
+        db.commit()
+
+        db.expire_all()
+        assert db.get(Product, product_id).updated_at == edited
+
+
+class TestHoldStockMany:
+    """Testes para reservar vários produtos de uma vez"""
+
+    def _reservations(self, db, cart_id):
+        rows = db.query(StockReservation).filter(StockReservation.cart_id == cart_id)
+        return {row.product_id: (row.quantity, row.expires_at) for row in rows}
+
+    def test_hold_many_applies_differences(self, db, product_id, carts):
+        """Teste: Só a diferença para a reserva atual é reservada"""
+        hold_stock(db, carts[0], product_id, 2)
+        db.commit()
+
+        failed = hold_stock_many(db, carts[0], {product_id: 4}, self._reservations(db, carts[0]))
+        db.commit()
+
+        assert failed == set()
+        assert _stock(db, product_id) == (5, 4)
+        assert held_quantities(db, carts[0]) == {product_id: 4}
+
+    def test_hold_many_reports_insufficient_stock(self, db, product_id, carts):
+        """Teste: Produto sem unidades livres volta em `failed` e a reserva não muda"""
+        hold_stock(db, carts[1], product_id, 4)
+        hold_stock(db, carts[0], product_id, 1)
+        db.commit()
+
+        failed = hold_stock_many(db, carts[0], {product_id: 3}, self._reservations(db, carts[0]))
+        db.commit()
+
+        assert failed == {product_id}
+        assert _stock(db, product_id) == (5, 5)
+        assert held_quantities(db, carts[0]) == {product_id: 1}
+
+    def test_hold_many_expiring_reservation(self, db, product_id, carts):
+        """Teste: Reserva prestes a vencer passa pela reserva individual e é renovada"""
+        hold_stock(db, carts[0], product_id, 2)
+        db.query(StockReservation).update({"expires_at": datetime.utcnow() + timedelta(seconds=5)})
+        db.commit()
+
+        failed = hold_stock_many(db, carts[0], {product_id: 3}, self._reservations(db, carts[0]))
+        db.commit()
+
+        assert failed == set()
+        assert _stock(db, product_id) == (5, 3)
+        assert db.query(StockReservation).one().expires_at > datetime.utcnow() + timedelta(minutes=1)
+
+
+class TestSweepExpiredReservations:
+    """Testes para a expiração das reservas"""
+
+    def test_sweep_releases_only_expired(self, db, product_id, carts):
+        """Teste: Só as reservas vencidas são removidas"""
+        hold_stock(db, carts[0], product_id, 2)
+        hold_stock(db, carts[1], product_id, 1)
+        db.query(StockReservation).filter(StockReservation.cart_id == carts[0]).update(
+            {"expires_at": datetime.utcnow() - timedelta(seconds=1)}
+        )
+        db.commit()
+
+        report = sweep_expired_reservations(db)
+
+        assert report == {"expired": 1, "units_released": 2}
+        assert _stock(db, product_id) == (5, 1)
+        assert held_quantities(db, carts[1]) == {product_id: 1}
+
+    def test_sweep_in_batches(self, db, product_id, carts, monkeypatch):
+        """Teste: Lotes pequenos removem todas as reservas vencidas"""
+        from app.crud import reservations
+
+        monkeypatch.setattr(reservations, "SWEEP_BATCH_SIZE", 1)
+        hold_stock(db, carts[0], product_id, 2)
+        hold_stock(db, carts[1], product_id, 3)
+        db.commit()
+
+        report = sweep_expired_reservations(db, now=datetime.utcnow() + timedelta(days=1))
+
+        assert report == {"expired": 2, "units_released": 5}
+        assert _stock(db, product_id) == (5, 0)
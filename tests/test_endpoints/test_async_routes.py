@@ -0,0 +1,109 @@
+"""
+Testes para as rotas de leitura que usam AsyncSession.
+"""
+
+import pytest
+
+from app.dependencies import get_async_db, get_db
+from app.main import app
+from app.models.cart import Cart, CartItem
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.user import User
+
+
+def _forbid_sync_session():
+    raise AssertionError("Rota de leitura não deve abrir sessão síncrona")
+    yield  # pragma: no cover
+
+
+@pytest.fixture
+def shopping_data(db, test_user, test_product):
+    """Carrinho e pedido do usuário de teste (criados depois do produto)."""
+    # test_product limpa a sessão; buscar o usuário de novo
+    user = db.query(User).filter(User.email == "test@example.com").one()
+    cart = Cart(user_id=user.id)
+    order = Order(
+        user_id=user.id,
+        total_price=test_product.price * 2,
+        shipping_address="Rua Teste, 123",
+        payment_method="pix",
+        status=OrderStatus.PENDING,
+    )
+    db.add_all([cart, order])
+    db.flush()
+    db.add_all([
+        CartItem(cart_id=cart.id, product_id=test_product.id, quantity=2, price_at_time=test_product.price),
+        OrderItem(order_id=order.id, product_id=test_product.id, quantity=2, price=test_product.price),
+    ])
+    db.commit()
+    return {"product_id": test_product.id, "category_id": test_product.category_id, "order_id": order.id}
+
+
+class TestAsyncReadRoutes:
+    """Testes para listagem/detalhe de produtos, carrinho e pedidos (async)"""
+
+    def test_routes_use_async_session(self, client, auth_headers, shopping_data):
+        """Teste: As rotas portadas não dependem da sessão síncrona"""
+        assert get_async_db in app.dependency_overrides
+        app.dependency_overrides[get_db] = _forbid_sync_session
+
+        assert client.get("/api/v1/products").status_code == 200
+        assert client.get(f"/api/v1/products/{shopping_data['product_id']}").status_code == 200
+        assert client.get("/api/v1/cart", headers=auth_headers).status_code == 200
+        assert client.get("/api/v1/orders", headers=auth_headers).status_code == 200
+
+    def test_product_detail_includes_category(self, client, shopping_data):
+        """Teste: Detalhe do produto traz a categoria carregada"""
+        response = client.get(f"/api/v1/products/{shopping_data['product_id']}")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["name"] == "Test Product"
+        assert data["category"] == {"id": shopping_data["category_id"], "name": "Test Category"}
+
+    def test_product_detail_not_found(self, client, db):
+        """Teste: Produto inexistente retorna 404"""
+        response = client.get("/api/v1/products/9999")
+
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Produto não encontrado"
+
+    def test_product_list_includes_category(self, client, shopping_data):
+        """Teste: Listagem traz a categoria de cada produto"""
+        response = client.get("/api/v1/products")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 1
+        assert data["items"][0]["category"]["id"] == shopping_data["category_id"]
+
+    def test_get_cart_with_items(self, client, auth_headers, shopping_data):
+        """Teste: Carrinho retorna os itens"""
+        response = client.get("/api/v1/cart", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["items"]) == 1
+        assert data["items"][0]["quantity"] == 2
+
+    def test_get_cart_not_found(self, client, auth_headers):
+        """Teste: Usuário sem carrinho recebe 404"""
+        response = client.get("/api/v1/cart", headers=auth_headers)
+
+        assert response.status_code == 404
+
+    def test_list_orders_with_items(self, client, auth_headers, shopping_data):
+        """Teste: Listagem de pedidos traz os itens de cada pedido"""
+        response = client.get("/api/v1/orders", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 1
+        assert data[0]["id"] == shopping_data["order_id"]
+        assert len(data[0]["items"]) == 1
+
+    def test_async_user_lookup_invalid_token(self, client, db):
+        """Teste: Token inválido retorna 401 nas rotas async"""
+        response = client.get("/api/v1/orders", headers={"Authorization": "Bearer invalido"})
+
+        assert response.status_code == 401
@@ -527,4 +527,184 @@ class TestClearCart:
         )
         assert verify_response.status_code == 200
         data = verify_response.json()
-        assert len(data) == 0
\ No newline at end of file
+        assert len(data) == 0
+
+# ============================================================================
+# TESTES DA ALTERAÇÃO EM LOTE
+# ============================================================================
+
+class TestBatchCartItems:
+    """Testes para PATCH /cart/items:batch"""
+
+    @pytest.fixture
+    def products(self, db, test_category):
+        from app.models.product import Product
+
+        rows = [
+            Product(name=f"Lote {i}", description="Produto", price=10.0 * (i + 1),
+                    category_id=test_category.id, stock=5)
+            for i in range(3)
+        ]
+        db.add_all(rows)
+        db.commit()
+        return [row.id for row in rows]
+
+    def _batch(self, client, headers, operations):
+        return client.patch(
+            "/api/v1/cart/items:batch",
+            json={"operations": operations},
+            headers=headers,
+        )
+
+    def test_batch_without_auth(self, client):
+        """Teste: Alteração em lote sem autenticação"""
+        response = client.patch(
+            "/api/v1/cart/items:batch",
+            json={"operations": [{"op": "add", "product_id": 1, "quantity": 1}]},
+        )
+        assert response.status_code in [401, 403]
+
+    def test_batch_applies_operations_in_order(self, client, auth_headers, products):
+        """Teste: add, set e remove aplicados na ordem, com o carrinho final na resposta"""
+        response = self._batch(client, auth_headers, [
+            {"op": "add", "product_id": products[0], "quantity": 2},
+            {"op": "add", "product_id": products[0], "quantity": 1},
+            {"op": "add", "product_id": products[1], "quantity": 1},
+            {"op": "set", "product_id": products[2], "quantity": 4},
+            {"op": "remove", "product_id": products[1]},
+        ])
+
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert all(result["success"] for result in data["results"])
+        quantities = {item["product_id"]: item["quantity"] for item in data["cart"]["items"]}
+        assert quantities == {products[0]: 3, products[2]: 4}
+
+    def test_batch_reports_errors_per_operation(self, client, auth_headers, products):
+        """Teste: Operações inválidas falham sozinhas; as válidas são gravadas"""
+        response = self._batch(client, auth_headers, [
+            {"op": "add", "product_id": products[0], "quantity": 1},
+            {"op": "add", "product_id": 99999, "quantity": 1},
+            {"op": "set", "product_id": products[1], "quantity": 6},
+            {"op": "add", "product_id": products[2], "quantity": 0},
+            {"op": "remove", "product_id": products[2]},
+        ])
+
+        data = response.json()
+        assert [result["success"] for result in data["results"]] == [True, False, False, False, False]
+        assert "não encontrado" in data["results"][1]["error"]
+        assert "Estoque insuficiente" in data["results"][2]["error"]
+        assert data["results"][4]["error"] == "Item do carrinho não encontrado"
+        assert [item["product_id"] for item in data["cart"]["items"]] == [products[0]]
+
+    def test_batch_reserves_stock(self, client, auth_headers, products, db):
+        """Teste: O lote reserva e devolve estoque como as rotas de item"""
+        from app.models.product import Product
+
+        self._batch(client, auth_headers, [
+            {"op": "set", "product_id": products[0], "quantity": 5},
+            {"op": "set", "product_id": products[1], "quantity": 2},
+        ])
+        self._batch(client, auth_headers, [{"op": "remove", "product_id": products[1]}])
+
+        db.expire_all()
+        assert db.get(Product, products[0]).reserved_stock == 5
+        assert db.get(Product, products[1]).reserved_stock == 0
+
+    def test_batch_query_count(self, client, auth_headers, products, query_counter):
+        """Teste: Leituras e escritas de estoque não dependem do número de operações"""
+        def statements(operations):
+            query_counter.reset()
+            assert self._batch(client, auth_headers, operations).status_code == 200
+            normalized = [statement.lstrip().upper() for statement in query_counter.statements]
+            return {
+                "reads": sum(1 for statement in normalized if statement.startswith("SELECT")),
+                "stock": sum(
+                    1 for statement in normalized
+                    if statement.startswith(("UPDATE PRODUCTS", "INSERT INTO STOCK_RESERVATIONS"))
+                ),
+            }
+
+        statements([{"op": "set", "product_id": products[0], "quantity": 1}])
+        one = statements([{"op": "set", "product_id": products[0], "quantity": 2}])
+        three = statements([{"op": "set", "product_id": product_id, "quantity": 2} for product_id in products])
+
+        assert three == one
+        assert one["stock"] == 2  # um UPDATE nos produtos e um upsert das reservas
+
+    def test_batch_reserves_deltas_from_current_reservations(self, client, auth_headers, products, db):
+        """Teste: Aumentar, diminuir e manter quantidades no mesmo lote ajusta só a diferença"""
+        from app.models.product import Product
+        from app.models.stock_reservation import StockReservation
+
+        self._batch(client, auth_headers, [
+            {"op": "set", "product_id": products[0], "quantity": 2},
+            {"op": "set", "product_id": products[1], "quantity": 4},
+            {"op": "set", "product_id": products[2], "quantity": 1},
+        ])
+        response = self._batch(client, auth_headers, [
+            {"op": "set", "product_id": products[0], "quantity": 5},
+            {"op": "set", "product_id": products[1], "quantity": 1},
+            {"op": "set", "product_id": products[2], "quantity": 1},
+        ])
+
+        assert all(result["success"] for result in response.json()["results"])
+        db.expire_all()
+        assert [db.get(Product, product_id).reserved_stock for product_id in products] == [5, 1, 1]
+        assert db.query(StockReservation).count() == 3
+
+
+# ============================================================================
+# TESTES DOS TOTAIS DO CARRINHO
+# ============================================================================
+
+class TestCartTotals:
+    """Testes para os totais calculados no banco (GET /cart e GET /cart/summary)"""
+
+    @pytest.fixture
+    def filled_cart(self, db, test_user, test_category):
+        from app.models.cart import Cart, CartItem
+        from app.models.product import Product
+
+        products = [
+            Product(name=f"Total {i}", description="Produto", price=1.0, category_id=test_category.id, stock=10)
+            for i in range(2)
+        ]
+        db.add_all(products)
+        cart = Cart(user_id=test_user.id)
+        db.add(cart)
+        db.flush()
+        db.add_all([
+            CartItem(cart_id=cart.id, product_id=products[0].id, quantity=2, price_at_time=10.5),
+            CartItem(cart_id=cart.id, product_id=products[1].id, quantity=3, price_at_time=4.0),
+        ])
+        db.commit()
+        return cart.id
+
+    def test_get_cart_totals(self, client, auth_headers, filled_cart):
+        """Teste: GET /cart traz totais e subtotais por item"""
+        response = client.get("/api/v1/cart", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_items"] == 5
+        assert data["distinct_items"] == 2
+        assert data["total_price"] == 33.0
+        assert sorted(item["subtotal"] for item in data["items"]) == [12.0, 21.0]
+
+    def test_summary(self, client, auth_headers, filled_cart, query_counter):
+        """Teste: GET /cart/summary traz só os totais, em uma query"""
+        client.get("/api/v1/cart/summary", headers=auth_headers)  # aquece o cache do usuário
+        query_counter.reset()
+
+        response = client.get("/api/v1/cart/summary", headers=auth_headers)
+
+        assert response.json() == {"total_items": 5, "distinct_items": 2, "total_price": 33.0}
+        assert query_counter.count == 1
+
+    def test_summary_without_cart(self, client, auth_headers):
+        """Teste: Sem carrinho, o resumo vem zerado"""
+        response = client.get("/api/v1/cart/summary", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.json() == {"total_items": 0, "distinct_items": 0, "total_price": 0.0}
@@ -0,0 +1,141 @@
+"""
+Testes para GET condicional (ETag / Last-Modified) em produtos e categorias.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.core.response_cache import response_cache
+from app.models.category import Category
+from app.models.product import Product
+
+
+@pytest.fixture
+def catalog(db):
+    """Categoria com dois produtos, com updated_at explícito."""
+    category = Category(name="Camisas", updated_at=datetime(2024, 1, 1, 10, 0, 0))
+    db.add(category)
+    db.commit()
+    products = [
+        Product(
+            name=f"Camisa {i}",
+            description="Algodão",
+            price=50.0 + i,
+            category_id=category.id,
+            stock=5,
+            is_active=True,
+            updated_at=datetime(2024, 1, 2, 10, 0, i),
+        )
+        for i in range(2)
+    ]
+    db.add_all(products)
+    db.commit()
+    return {"category_id": category.id, "product_ids": [p.id for p in products]}
+
+
+def _touch_product(db, product_id, updated_at):
+    product = db.get(Product, product_id)
+    product.name = "Camisa Alterada"
+    product.updated_at = updated_at
+    db.commit()
+
+
+CATALOG_URLS = [
+    "/api/v1/products",
+    "/api/v1/products?cursor=&include_total=false",
+    "/api/v1/categories",
+]
+
+
+class TestConditionalGet:
+    """Testes para ETag/Last-Modified e respostas 304"""
+
+    @pytest.mark.parametrize("use_cache", [True, False])
+    def test_list_and_detail_return_304(self, client, catalog, monkeypatch, use_cache):
+        """Teste: If-None-Match com o ETag atual retorna 304 sem corpo"""
+        if not use_cache:
+            monkeypatch.setattr(response_cache, "ttl", 0)
+
+        product_id = catalog["product_ids"][0]
+        for url in CATALOG_URLS + [f"/api/v1/products/{product_id}", f"/api/v1/categories/{catalog['category_id']}"]:
+            first = client.get(url)
+            assert first.status_code == 200
+            etag = first.headers["etag"]
+            assert etag.startswith('W/"')
+            assert "last-modified" in first.headers
+
+            second = client.get(url, headers={"If-None-Match": etag})
+            assert second.status_code == 304, url
+            assert second.content == b""
+            assert second.headers["etag"] == etag
+
+    def test_304_without_loading_rows(self, client, catalog, query_counter, monkeypatch):
+        """Teste: Com total, o 304 sai só com a query de count + max(updated_at)"""
+        monkeypatch.setattr(response_cache, "ttl", 0)
+        etag = client.get("/api/v1/products").headers["etag"]
+
+        query_counter.reset()
+        response = client.get("/api/v1/products", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert query_counter.count == 1
+        assert "max(" in query_counter.statements[0].lower()
+
+    def test_etag_changes_when_product_changes(self, client, db, catalog):
+        """Teste: Alterar um produto muda o ETag da listagem e do detalhe"""
+        product_id = catalog["product_ids"][0]
+        list_etag = client.get("/api/v1/products").headers["etag"]
+        detail_etag = client.get(f"/api/v1/products/{product_id}").headers["etag"]
+
+        _touch_product(db, product_id, datetime(2024, 2, 1))
+
+        for url, etag in [("/api/v1/products", list_etag), (f"/api/v1/products/{product_id}", detail_etag)]:
+            response = client.get(url, headers={"If-None-Match": etag})
+            assert response.status_code == 200
+            assert response.headers["etag"] != etag
+
+    def test_etag_changes_when_product_is_removed(self, client, db, catalog):
+        """Teste: Desativar um produto muda o ETag (contagem diferente)"""
+        etag = client.get("/api/v1/products").headers["etag"]
+
+        product = db.get(Product, catalog["product_ids"][0])
+        product.is_active = False
+        db.commit()
+
+        assert client.get("/api/v1/products", headers={"If-None-Match": etag}).status_code == 200
+
+    def test_etag_depends_on_query(self, client, catalog):
+        """Teste: Páginas/filtros diferentes têm ETags diferentes"""
+        first_page = client.get("/api/v1/products?limit=1").headers["etag"]
+        second_page = client.get("/api/v1/products?limit=1&skip=1").headers["etag"]
+
+        assert first_page != second_page
+
+    def test_if_modified_since(self, client, catalog):
+        """Teste: If-Modified-Since igual ou posterior ao Last-Modified retorna 304"""
+        product_id = catalog["product_ids"][1]
+        last_modified = client.get(f"/api/v1/products/{product_id}").headers["last-modified"]
+
+        assert client.get(
+            f"/api/v1/products/{product_id}", headers={"If-Modified-Since": last_modified}
+        ).status_code == 304
+        assert client.get(
+            f"/api/v1/products/{product_id}", headers={"If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+        ).status_code == 200
+
+    def test_if_none_match_takes_precedence(self, client, catalog):
+        """Teste: If-None-Match diferente ignora If-Modified-Since"""
+        url = f"/api/v1/categories/{catalog['category_id']}"
+        last_modified = client.get(url).headers["last-modified"]
+
+        response = client.get(url, headers={"If-None-Match": 'W/"outro"', "If-Modified-Since": last_modified})
+
+        assert response.status_code == 200
+
+    def test_if_none_match_list_and_star(self, client, catalog):
+        """Teste: If-None-Match aceita lista de ETags e *"""
+        etag = client.get("/api/v1/categories").headers["etag"]
+
+        assert client.get("/api/v1/categories", headers={"If-None-Match": f'W/"outro", {etag}'}).status_code == 304
+        assert client.get("/api/v1/categories", headers={"If-None-Match": "*"}).status_code == 304
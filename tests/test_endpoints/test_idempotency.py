@@ -0,0 +1,248 @@
+"""
+Testes do cabeçalho Idempotency-Key em pedidos, checkout e pagamentos.
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core import idempotency
+from app.models.idempotency_key import IdempotencyKey
+from app.models.order import Order
+from app.models.payment import Payment
+from app.models.product import Product
+from app.models.product_request import ProductRequest, RequestStatus
+from app.models.user import User
+
+
+@pytest.fixture(autouse=True)
+def empty_response_cache():
+    """O LRU é global do processo; os IDs se repetem entre os testes."""
+    idempotency._responses.clear()
+    yield
+    idempotency._responses.clear()
+
+
+def _order(product_id, quantity=2):
+    return {
+        "items": [{"product_id": product_id, "quantity": quantity}],
+        "shipping_address": "Rua A, 123",
+        "payment_method": "pix",
+    }
+
+
+def _with_key(headers, key):
+    return {**headers, "Idempotency-Key": key}
+
+
+class TestIdempotentOrders:
+    """Testes de repetição de POST /orders e /stock/checkout"""
+
+    def test_replay_returns_same_order(self, client, db, auth_headers, test_product):
+        """Teste: Repetir com a mesma chave não cria outro pedido nem baixa estoque de novo"""
+        product_id = test_product.id
+        headers = _with_key(auth_headers, "pedido-1")
+        first = client.post("/api/v1/orders", json=_order(product_id), headers=headers)
+        second = client.post("/api/v1/orders", json=_order(product_id), headers=headers)
+
+        assert first.status_code == 201
+        assert second.status_code == 201
+        assert second.json() == first.json()
+        assert second.headers["Idempotent-Replayed"] == "true"
+        assert "Idempotent-Replayed" not in first.headers
+        assert db.query(Order).count() == 1
+        db.expire_all()
+        assert db.get(Product, product_id).stock == 98
+
+    def test_replay_from_table_without_cache(self, client, db, auth_headers, test_product):
+        """Teste: Outro worker (LRU vazio) repete a resposta guardada na tabela"""
+        product_id = test_product.id
+        headers = _with_key(auth_headers, "checkout-1")
+        first = client.post("/api/v1/stock/checkout", json=_order(product_id), headers=headers)
+        idempotency._responses.clear()
+
+        second = client.post("/api/v1/stock/checkout", json=_order(product_id), headers=headers)
+
+        assert second.status_code == 201
+        assert second.json() == first.json()
+        assert db.query(Order).count() == 1
+
+    def test_same_key_with_different_body_is_rejected(self, client, db, auth_headers, test_product):
+        """Teste: A mesma chave com outro corpo retorna 422"""
+        product_id = test_product.id
+        headers = _with_key(auth_headers, "pedido-2")
+        client.post("/api/v1/orders", json=_order(product_id, 1), headers=headers)
+
+        response = client.post("/api/v1/orders", json=_order(product_id, 3), headers=headers)
+
+        assert response.status_code == 422
+        assert db.query(Order).count() == 1
+
+    def test_keys_are_scoped_per_route(self, client, db, auth_headers, test_product):
+        """Teste: A mesma chave em rotas diferentes são requisições diferentes"""
+        product_id = test_product.id
+        headers = _with_key(auth_headers, "mesma-chave")
+        client.post("/api/v1/orders", json=_order(product_id, 1), headers=headers)
+        response = client.post("/api/v1/stock/checkout", json=_order(product_id, 1), headers=headers)
+
+        assert response.status_code == 201
+        assert db.query(Order).count() == 2
+
+    def test_failed_request_releases_key(self, client, db, auth_headers, test_product):
+        """Teste: Erros não são guardados; a chave pode ser usada de novo"""
+        product_id = test_product.id
+        headers = _with_key(auth_headers, "pedido-3")
+        failed = client.post("/api/v1/orders", json=_order(product_id, 500), headers=headers)
+        assert failed.status_code == 400
+        assert db.query(IdempotencyKey).count() == 0
+
+        response = client.post("/api/v1/orders", json=_order(product_id, 500), headers=headers)
+        assert response.status_code == 400
+
+        invalid = client.post("/api/v1/orders", json={"items": "x"}, headers=headers)
+        assert invalid.status_code == 422
+        assert db.query(IdempotencyKey).count() == 0
+
+    def test_in_progress_key_returns_conflict(self, client, db, auth_headers, test_product):
+        """Teste: Repetição enquanto a primeira requisição roda retorna 409"""
+        product_id = test_product.id
+        user_id = db.query(User.id).filter(User.email == "test@example.com").scalar()
+        body = _order(product_id)
+        now = datetime.utcnow()
+        db.add(IdempotencyKey(
+            user_id=user_id,
+            scope="orders.create",
+            key="pedido-4",
+            fingerprint=idempotency.request_fingerprint(json.dumps(body).encode()),
+            created_at=now,
+            expires_at=now + timedelta(seconds=60),
+        ))
+        db.commit()
+
+        response = client.post("/api/v1/orders", json=body, headers=_with_key(auth_headers, "pedido-4"))
+
+        assert response.status_code == 409
+        assert db.query(Order).count() == 0
+
+    def test_response_is_committed_with_the_order(self, client, db, auth_headers, test_product, monkeypatch):
+        """Teste: Falha entre gravar a resposta e o commit não deixa pedido com a chave pendente"""
+        product_id = test_product.id
+        save = idempotency.IdempotencyRecord.save
+
+        def save_then_crash(self, response, status_code):
+            save(self, response, status_code)
+            raise RuntimeError("queda antes do commit")
+
+        monkeypatch.setattr(idempotency.IdempotencyRecord, "save", save_then_crash)
+        headers = _with_key(auth_headers, "pedido-6")
+        failed = client.post("/api/v1/orders", json=_order(product_id), headers=headers)
+
+        assert failed.status_code == 500
+        assert db.query(Order).count() == 0
+        assert db.query(IdempotencyKey).count() == 0
+
+        monkeypatch.setattr(idempotency.IdempotencyRecord, "save", save)
+        retry = client.post("/api/v1/orders", json=_order(product_id), headers=headers)
+        assert retry.status_code == 201
+        assert db.query(Order).count() == 1
+        assert db.query(IdempotencyKey).one().status_code == 201
+
+    def test_expired_claim_taken_over_rolls_back(self, client, db, auth_headers, test_product, monkeypatch):
+        """Teste: Se a reserva venceu e foi tomada por outra requisição, o pedido é desfeito"""
+        from sqlalchemy import delete
+
+        product_id = test_product.id
+        save = idempotency.IdempotencyRecord.save
+
+        def save_after_takeover(self, response, status_code):
+            self.db.execute(delete(IdempotencyKey).where(IdempotencyKey.id == self.key_id))
+            save(self, response, status_code)
+
+        monkeypatch.setattr(idempotency.IdempotencyRecord, "save", save_after_takeover)
+        response = client.post("/api/v1/orders", json=_order(product_id), headers=_with_key(auth_headers, "pedido-7"))
+
+        assert response.status_code == 409
+        assert db.query(Order).count() == 0
+
+    def test_requests_without_key_are_not_deduplicated(self, client, db, auth_headers, test_product):
+        """Teste: Sem o cabeçalho o comportamento não muda"""
+        product_id = test_product.id
+        client.post("/api/v1/orders", json=_order(product_id, 1), headers=auth_headers)
+        client.post("/api/v1/orders", json=_order(product_id, 1), headers=auth_headers)
+
+        assert db.query(Order).count() == 2
+        assert db.query(IdempotencyKey).count() == 0
+
+
+class TestIdempotentPayments:
+    """Testes de repetição de POST /payments"""
+
+    def test_replay_returns_same_payment(self, client, db, auth_headers):
+        """Teste: Repetir o registro do sinal devolve o mesmo pagamento"""
+        user_id = db.query(User.id).filter(User.email == "test@example.com").scalar()
+        request = ProductRequest(
+            user_id=user_id,
+            title="Tênis",
+            status=RequestStatus.AGUARDANDO_SINAL.value,
+            quoted_price=100.0,
+        )
+        db.add(request)
+        db.commit()
+        body = {
+            "request_id": request.id,
+            "type": "sinal",
+            "amount": 50.0,
+            "payment_method": "pix",
+            "payment_date": "2024-01-01T10:00:00",
+        }
+        headers = _with_key(auth_headers, "sinal-1")
+
+        first = client.post("/api/v1/payments", json=body, headers=headers)
+        second = client.post("/api/v1/payments", json=body, headers=headers)
+
+        assert first.status_code == 201
+        assert second.status_code == 201
+        assert second.json()["id"] == first.json()["id"]
+        assert db.query(Payment).count() == 1
+
+
+class TestIdempotencySweep:
+    """Testes da remoção das chaves vencidas"""
+
+    def test_sweep_removes_only_expired_keys(self, db, test_user):
+        """Teste: A limpeza apaga só as chaves vencidas"""
+        user_id = test_user.id
+        now = datetime.utcnow()
+        for key, expires_at in (("velha", now - timedelta(seconds=1)), ("nova", now + timedelta(hours=1))):
+            db.add(IdempotencyKey(
+                user_id=user_id,
+                scope="orders.create",
+                key=key,
+                fingerprint="x",
+                status_code=201,
+                response_body="{}",
+                created_at=now,
+                expires_at=expires_at,
+            ))
+        db.commit()
+
+        report = idempotency.sweep_expired_keys(db)
+
+        assert report == {"expired": 1}
+        assert [row.key for row in db.query(IdempotencyKey).all()] == ["nova"]
+
+    def test_expired_key_is_reusable(self, client, db, auth_headers, test_product):
+        """Teste: Depois do prazo, a chave vale como nova"""
+        product_id = test_product.id
+        headers = _with_key(auth_headers, "pedido-5")
+        client.post("/api/v1/orders", json=_order(product_id, 1), headers=headers)
+        db.query(IdempotencyKey).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+        db.commit()
+        idempotency._responses.clear()
+
+        response = client.post("/api/v1/orders", json=_order(product_id, 1), headers=headers)
+
+        assert response.status_code == 201
+        assert "Idempotent-Replayed" not in response.headers
+        assert db.query(Order).count() == 2
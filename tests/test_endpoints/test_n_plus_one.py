@@ -0,0 +1,183 @@
+"""
+Testes de N+1: o número de queries das listagens não pode depender do
+número de registros retornados.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.models.cart import Cart, CartItem
+from app.models.category import Category
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.payment import Payment
+from app.models.product import Product
+from app.models.product_request import ProductRequest
+from app.models.user import User
+
+
+@pytest.fixture
+def seed(db, test_user):
+    """Fábricas que criam N registros do usuário de teste (com relacionamentos)."""
+    user_id = test_user.id
+    category = Category(name="N+1")
+    db.add(category)
+    db.commit()
+    category_id = category.id
+
+    def products(count):
+        rows = [
+            Product(
+                name=f"Produto {i}",
+                description="Produto",
+                price=10.0,
+                category_id=category_id,
+                stock=10,
+                is_active=True,
+            )
+            for i in range(count)
+        ]
+        db.add_all(rows)
+        db.commit()
+        return [row.id for row in rows]
+
+    def orders(count, owner_id=user_id):
+        product_ids = products(2)
+        for _ in range(count):
+            order = Order(
+                user_id=owner_id,
+                total_price=20.0,
+                shipping_address="Rua Teste, 123",
+                payment_method="pix",
+                status=OrderStatus.PENDING,
+            )
+            db.add(order)
+            db.flush()
+            db.add_all([
+                OrderItem(order_id=order.id, product_id=product_id, quantity=1, price=10.0)
+                for product_id in product_ids
+            ])
+        db.commit()
+
+    def cart_items(count):
+        cart = db.query(Cart).filter(Cart.user_id == user_id).first()
+        if cart is None:
+            cart = Cart(user_id=user_id)
+            db.add(cart)
+            db.flush()
+        db.add_all([
+            CartItem(cart_id=cart.id, product_id=product_id, quantity=1, price_at_time=10.0)
+            for product_id in products(count)
+        ])
+        db.commit()
+
+    def requests(count, owner_id=user_id):
+        for i in range(count):
+            request = ProductRequest(user_id=owner_id, title=f"Solicitação {i}")
+            db.add(request)
+            db.flush()
+            db.add(Payment(
+                request_id=request.id,
+                user_id=owner_id,
+                type="sinal",
+                amount=10.0,
+                payment_method="pix",
+                payment_date=datetime(2024, 1, 1),
+            ))
+        db.commit()
+
+    def new_user(index=[0]):
+        index[0] += 1
+        user = User(
+            email=f"outro{index[0]}@example.com",
+            username=f"outro{index[0]}",
+            hashed_password="x",
+            is_active=True,
+        )
+        db.add(user)
+        db.commit()
+        return user.id
+
+    return {
+        "products": products,
+        "orders": orders,
+        "cart_items": cart_items,
+        "requests": requests,
+        "new_user": new_user,
+    }
+
+
+class TestListingQueryCount:
+    """Testes de N+1 nas rotas de listagem"""
+
+    def test_list_orders(self, client, auth_headers, seed, n_plus_one):
+        """Teste: GET /orders carrega os itens de todos os pedidos de uma vez"""
+        n_plus_one.check(
+            lambda: client.get("/api/v1/orders?limit=100", headers=auth_headers),
+            seed["orders"],
+        )
+
+    def test_get_cart(self, client, auth_headers, seed, n_plus_one):
+        """Teste: GET /cart carrega os itens de uma vez"""
+        seed["cart_items"](1)
+        n_plus_one.check(
+            lambda: client.get("/api/v1/cart", headers=auth_headers),
+            seed["cart_items"],
+        )
+
+    def test_list_products(self, client, seed, n_plus_one):
+        """Teste: GET /products carrega as categorias de uma vez"""
+        n_plus_one.check(
+            lambda: client.get("/api/v1/products?limit=100"),
+            seed["products"],
+        )
+
+    def test_list_my_requests(self, client, auth_headers, seed, n_plus_one):
+        """Teste: GET /requests carrega os pagamentos de uma vez"""
+        n_plus_one.check(
+            lambda: client.get("/api/v1/requests?limit=100", headers=auth_headers),
+            seed["requests"],
+        )
+
+    def test_admin_list_all_orders(self, client, admin_auth_headers, seed, n_plus_one):
+        """Teste: GET /admin/users/orders/all carrega os itens de uma vez"""
+        def add_orders(count):
+            for _ in range(count):
+                seed["orders"](1, owner_id=seed["new_user"]())
+
+        n_plus_one.check(
+            lambda: client.get("/api/v1/admin/users/orders/all?limit=200", headers=admin_auth_headers),
+            add_orders,
+        )
+
+    def test_admin_user_orders(self, client, admin_auth_headers, test_user, seed, n_plus_one):
+        """Teste: GET /admin/users/{id}/orders carrega os itens de uma vez"""
+        user_id = test_user.id
+        n_plus_one.check(
+            lambda: client.get(f"/api/v1/admin/users/{user_id}/orders", headers=admin_auth_headers),
+            seed["orders"],
+        )
+
+    def test_admin_list_all_requests(self, client, admin_auth_headers, seed, n_plus_one):
+        """Teste: GET /admin/requests carrega usuários e pagamentos de uma vez"""
+        def add_requests(count):
+            for _ in range(count):
+                seed["requests"](1, owner_id=seed["new_user"]())
+
+        n_plus_one.check(
+            lambda: client.get("/api/v1/admin/requests?limit=100", headers=admin_auth_headers),
+            add_requests,
+        )
+
+    def test_detector_catches_lazy_loading(self, client, admin_auth_headers, seed, n_plus_one, monkeypatch):
+        """Teste: O detector falha quando a rota faz lazy load por registro"""
+        from sqlalchemy.orm import Query
+
+        # Anular o selectinload: os itens voltam a ser carregados um pedido por vez
+        monkeypatch.setattr(Query, "options", lambda self, *args: self)
+
+        with pytest.raises(pytest.fail.Exception, match="N\\+1"):
+            n_plus_one.check(
+                lambda: client.get("/api/v1/admin/users/orders/all?limit=200", headers=admin_auth_headers),
+                seed["orders"],
+            )
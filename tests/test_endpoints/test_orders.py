@@ -610,4 +610,197 @@ class TestOrderStatus:
         )
         assert response.status_code == 200
         data = response.json()
-        assert data["status"] == "delivered"
\ No newline at end of file
+        assert data["status"] == "delivered"
+
+# ============================================================================
+# TESTES DE QUANTIDADE DE QUERIES NA CRIAÇÃO DE PEDIDOS
+# ============================================================================
+
+def _create_products(db, category_id, count, stock=10):
+    """Criar `count` produtos ativos e retornar seus IDs."""
+    from app.models.product import Product
+
+    products = [
+        Product(
+            name=f"Produto {i}",
+            description="Produto para teste de queries",
+            price=10.0,
+            category_id=category_id,
+            stock=stock,
+            is_active=True,
+        )
+        for i in range(count)
+    ]
+    db.add_all(products)
+    db.commit()
+    return [product.id for product in products]
+
+
+class TestCreateOrderQueryCount:
+    """Testes para garantir que a criação de pedidos não gera N+1 queries"""
+
+    def _post_order(self, client, headers, product_ids):
+        return client.post(
+            "/api/v1/orders",
+            json={
+                "items": [{"product_id": pid, "quantity": 1} for pid in product_ids],
+                "shipping_address": "Rua das Flores, 123",
+                "payment_method": "credit_card",
+            },
+            headers=headers,
+        )
+
+    def test_create_order_query_count_does_not_grow(
+        self, client, db, auth_headers, test_category, query_counter
+    ):
+        """Teste: Número de queries não cresce com o número de itens do pedido"""
+        product_ids = _create_products(db, test_category.id, 21)
+        # Aquecer o cache do usuário autenticado
+        client.get("/api/v1/orders", headers=auth_headers)
+
+        query_counter.reset()
+        response = self._post_order(client, auth_headers, product_ids[:1])
+        assert response.status_code == 201
+        single_item_queries = query_counter.count
+
+        query_counter.reset()
+        response = self._post_order(client, auth_headers, product_ids[1:])
+        assert response.status_code == 201
+        assert len(response.json()["items"]) == 20
+        many_items_queries = query_counter.count
+
+        assert many_items_queries == single_item_queries
+
+    def test_create_order_batch_updates_stock(
+        self, client, db, auth_headers, test_category
+    ):
+        """Teste: Estoque de todos os produtos é atualizado no pedido em lote"""
+        from app.models.product import Product
+
+        product_ids = _create_products(db, test_category.id, 5, stock=3)
+
+        response = self._post_order(client, auth_headers, product_ids)
+        assert response.status_code == 201
+
+        db.expire_all()
+        stocks = [p.stock for p in db.query(Product).filter(Product.id.in_(product_ids))]
+        assert stocks == [2] * 5
+
+    def test_create_order_batch_missing_product(
+        self, client, db, auth_headers, test_category
+    ):
+        """Teste: Produto inexistente no meio do lote retorna 404"""
+        product_ids = _create_products(db, test_category.id, 2)
+
+        response = self._post_order(client, auth_headers, [product_ids[0], 99999, product_ids[1]])
+        assert response.status_code == 404
+        assert "99999" in response.json()["detail"]
+
+
+# ============================================================================
+# TESTES DE PAGINAÇÃO POR CURSOR DO HISTÓRICO
+# ============================================================================
+
+def _create_orders(db, user_id, count):
+    """Criar `count` pedidos; de dois em dois com a mesma data (desempate pelo ID)."""
+    from app.models.order import Order
+
+    start = datetime(2024, 1, 1)
+    orders = [
+        Order(
+            user_id=user_id,
+            total_price=float(10 + (i * 7) % count),
+            status="delivered" if i % 3 == 0 else "pending",
+            shipping_address="Rua das Flores, 123",
+            payment_method="credit_card",
+            created_at=start + timedelta(days=i // 2),
+        )
+        for i in range(count)
+    ]
+    db.add_all(orders)
+    db.commit()
+    return [order.id for order in orders]
+
+
+class TestListOrdersCursor:
+    """Testes para a paginação por cursor de GET /orders"""
+
+    def _walk(self, client, headers, **params):
+        """Percorrer todas as páginas pelo cabeçalho X-Next-Cursor."""
+        ids, cursor = [], None
+        while True:
+            query = {**params, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/api/v1/orders", params=query, headers=headers)
+            assert response.status_code == 200
+            ids += [order["id"] for order in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                return ids
+
+    def test_cursor_walks_every_order_once(self, client, db, auth_headers, test_user):
+        """Teste: Percorrer por cursor devolve todos os pedidos, na ordem, sem repetir"""
+        _create_orders(db, test_user.id, 25)
+        expected = self._walk(client, auth_headers, limit=100)
+
+        walked = self._walk(client, auth_headers, limit=7)
+
+        assert len(expected) == 25
+        assert walked == expected
+
+    @pytest.mark.parametrize("sort_by", ["created_at", "total_price"])
+    @pytest.mark.parametrize("sort_order", ["asc", "desc"])
+    def test_cursor_matches_offset_pages(self, client, db, auth_headers, test_user, sort_by, sort_order):
+        """Teste: Cursor e offset retornam as mesmas páginas, com filtro de status"""
+        _create_orders(db, test_user.id, 30)
+        params = {"sort_by": sort_by, "sort_order": sort_order, "status_filter": "pending"}
+
+        by_offset = []
+        for skip in range(0, 30, 4):
+            response = client.get(
+                "/api/v1/orders", params={**params, "skip": skip, "limit": 4}, headers=auth_headers
+            )
+            by_offset += [order["id"] for order in response.json()]
+
+        assert self._walk(client, auth_headers, limit=4, **params) == by_offset
+        assert len(by_offset) == 20
+
+    def test_last_page_has_no_cursor(self, client, db, auth_headers, test_user):
+        """Teste: Sem próxima página, o cabeçalho X-Next-Cursor não é enviado"""
+        _create_orders(db, test_user.id, 3)
+
+        response = client.get("/api/v1/orders", params={"limit": 3}, headers=auth_headers)
+
+        assert len(response.json()) == 3
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_cursor_from_other_sort_is_rejected(self, client, db, auth_headers, test_user):
+        """Teste: Cursor gerado para outra ordenação retorna 400"""
+        _create_orders(db, test_user.id, 5)
+        cursor = client.get(
+            "/api/v1/orders", params={"limit": 2}, headers=auth_headers
+        ).headers["X-Next-Cursor"]
+
+        response = client.get(
+            "/api/v1/orders",
+            params={"limit": 2, "sort_by": "total_price", "cursor": cursor},
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 400
+
+    def test_history_uses_composite_indexes(self, db):
+        """Teste: As consultas do histórico usam os índices (user_id, ...) do pedido"""
+        from sqlalchemy import text
+
+        plans = {
+            "ix_orders_user_created": "SELECT id FROM orders WHERE user_id = 1 ORDER BY created_at DESC, id DESC",
+            "ix_orders_user_status_created": (
+                "SELECT id FROM orders WHERE user_id = 1 AND status = 'pending' "
+                "ORDER BY created_at DESC, id DESC"
+            ),
+            "ix_orders_user_price": "SELECT id FROM orders WHERE user_id = 1 ORDER BY total_price, id",
+        }
+        for index, query in plans.items():
+            plan = " ".join(row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {query}")))
+            assert index in plan
+            assert "TEMP B-TREE" not in plan
@@ -384,4 +384,157 @@ class TestProductDeletion:
         
         # Verificar se foi deletado
         response = client.get(f"/products/{product_id}")
-        assert response.status_code == 404
\ No newline at end of file
+        assert response.status_code == 404
+
+# ============================================================================
+# TESTES DE PAGINAÇÃO POR CURSOR
+# ============================================================================
+
+@pytest.fixture
+def catalog(db, test_category):
+    """Fixture com 7 produtos, com preços e datas repetidos para testar desempate"""
+    from datetime import datetime
+    from app.models.product import Product
+
+    products = [
+        Product(
+            name=f"Produto {i:02d}",
+            description="Produto do catálogo de teste",
+            price=float(10 + i // 2),
+            category_id=test_category.id,
+            stock=5,
+            is_active=True,
+            created_at=datetime(2024, 1, 1 + i // 3),
+        )
+        for i in range(7)
+    ]
+    db.add_all(products)
+    db.commit()
+    return [product.id for product in products]
+
+
+class TestProductCursorPagination:
+    """Testes para paginação por cursor (keyset)"""
+
+    def _walk(self, client, params):
+        """Percorrer todas as páginas seguindo next_cursor."""
+        ids = []
+        response = client.get("/api/v1/products", params=params)
+        while True:
+            assert response.status_code == 200
+            data = response.json()
+            ids.extend(item["id"] for item in data["items"])
+            if not data["next_cursor"]:
+                return ids
+            response = client.get(
+                "/api/v1/products",
+                params={**params, "cursor": data["next_cursor"]},
+            )
+
+    @pytest.mark.parametrize("sort_by", ["created_at", "price", "name"])
+    @pytest.mark.parametrize("sort_order", ["asc", "desc"])
+    def test_cursor_pagination_matches_offset(self, client, catalog, sort_by, sort_order):
+        """Teste: Percorrer por cursor retorna os mesmos itens, na mesma ordem, que uma página única"""
+        params = {"sort_by": sort_by, "sort_order": sort_order}
+        expected = client.get("/api/v1/products", params={**params, "limit": 100}).json()
+        expected_ids = [item["id"] for item in expected["items"]]
+
+        assert self._walk(client, {**params, "limit": 2}) == expected_ids
+        assert sorted(expected_ids) == sorted(catalog)
+
+    def test_cursor_mode_skips_count(self, client, catalog, query_counter):
+        """Teste: Modo cursor não calcula total nem pages por padrão"""
+        first = client.get("/api/v1/products", params={"limit": 3}).json()
+        assert first["total"] == 7
+        assert first["pages"] == 3
+
+        query_counter.reset()
+        response = client.get(
+            "/api/v1/products",
+            params={"limit": 3, "cursor": first["next_cursor"]},
+        )
+        data = response.json()
+        assert data["total"] is None
+        assert data["pages"] is None
+        assert len(data["items"]) == 3
+        assert not any("count(" in s.lower() for s in query_counter.statements)
+
+    def test_offset_mode_without_total(self, client, catalog, query_counter):
+        """Teste: include_total=false evita o COUNT também no modo offset"""
+        query_counter.reset()
+        data = client.get("/api/v1/products", params={"include_total": "false"}).json()
+        assert data["total"] is None
+        assert len(data["items"]) == 7
+        assert data["next_cursor"] is None
+        assert not any("count(" in s.lower() for s in query_counter.statements)
+
+    def test_cursor_invalid(self, client, catalog):
+        """Teste: Cursor inválido retorna 400"""
+        response = client.get("/api/v1/products", params={"cursor": "nao-e-um-cursor"})
+        assert response.status_code == 400
+
+    def test_cursor_from_other_sort(self, client, catalog):
+        """Teste: Cursor gerado para outra ordenação retorna 400"""
+        first = client.get("/api/v1/products", params={"limit": 2, "sort_by": "price"}).json()
+        response = client.get(
+            "/api/v1/products",
+            params={"sort_by": "name", "cursor": first["next_cursor"]},
+        )
+        assert response.status_code == 400
+
+
+# ============================================================================
+# TESTES DE BUSCA
+# ============================================================================
+
+class TestProductSearch:
+    """Testes para busca de produtos na listagem"""
+
+    def test_search_accent_insensitive(self, client, test_product):
+        """Teste: Busca ignora acentos e usa prefixo"""
+        response = client.get("/api/v1/products", params={"search": "prod"})
+        assert response.status_code == 200
+        assert [item["id"] for item in response.json()["items"]] == [test_product.id]
+
+    def test_search_combined_with_filters(self, client, test_product):
+        """Teste: Resultado da busca é intersectado com os demais filtros"""
+        response = client.get(
+            "/api/v1/products",
+            params={"search": "product", "max_price": 10},
+        )
+        assert response.json()["items"] == []
+
+    def test_search_sees_created_and_deleted_products(
+        self, client, admin_auth_headers, product_payload
+    ):
+        """Teste: Produtos criados e removidos pela API atualizam o índice"""
+        # Constrói o índice antes da criação
+        assert client.get("/api/v1/products", params={"search": "vestido"}).json()["items"] == []
+
+        payload = {**product_payload, "name": "Vestido Floral", "description": "Vestido de verão estampado"}
+        created = client.post("/api/v1/products", json=payload, headers=admin_auth_headers)
+        assert created.status_code == 201
+        product_id = created.json()["id"]
+
+        response = client.get("/api/v1/products", params={"search": "vestidô"})
+        assert [item["id"] for item in response.json()["items"]] == [product_id]
+
+        client.delete(f"/api/v1/products/{product_id}", headers=admin_auth_headers)
+        assert client.get("/api/v1/products", params={"search": "vestido"}).json()["items"] == []
+
+    def test_search_sort_by_relevance(self, client, db, test_category):
+        """Teste: sort_by=relevance ordena pelo ranking da busca"""
+        from app.models.product import Product
+
+        weak = Product(name="Bolsa Couro", description="Acompanha chaveiro de couro azul",
+                       price=10.0, category_id=test_category.id, stock=1)
+        strong = Product(name="Chaveiro Azul", description="Chaveiro metálico",
+                         price=10.0, category_id=test_category.id, stock=1)
+        db.add_all([weak, strong])
+        db.commit()
+
+        response = client.get(
+            "/api/v1/products",
+            params={"search": "chaveiro", "sort_by": "relevance"},
+        )
+        assert [item["id"] for item in response.json()["items"]] == [strong.id, weak.id]
@@ -0,0 +1,77 @@
+"""
+Testes de POST /stock/validate.
+"""
+
+import pytest
+
+from app.models.product import Product
+
+
+@pytest.fixture
+def products(db, test_category):
+    """Três produtos: com estoque, com pouco estoque e inativo."""
+    rows = [
+        Product(name="Camisa", description="Algodão", price=10.0, category_id=test_category.id, stock=10),
+        Product(name="Boné", description="Aba reta", price=5.0, category_id=test_category.id, stock=1),
+        Product(name="Meia", description="Lã", price=2.0, category_id=test_category.id, stock=10, is_active=False),
+    ]
+    db.add_all(rows)
+    db.commit()
+    return [row.id for row in rows]
+
+
+def _validate(client, items):
+    return client.post(
+        "/api/v1/stock/validate",
+        json={"items": [{"product_id": product_id, "quantity": quantity} for product_id, quantity in items]},
+    )
+
+
+class TestValidateStock:
+    """Testes da validação de estoque"""
+
+    def test_all_available(self, client, products):
+        """Teste: Itens com estoque passam na validação"""
+        response = _validate(client, [(products[0], 3), (products[1], 1)])
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["valid"] is True
+        assert data["items_status"] == []
+
+    def test_insufficient_missing_and_inactive(self, client, products):
+        """Teste: Estoque insuficiente, produto inexistente e inativo são reportados"""
+        response = _validate(client, [(products[1], 2), (99999, 1), (products[2], 1)])
+
+        data = response.json()
+        assert data["valid"] is False
+        by_id = {item["product_id"]: item for item in data["items_status"]}
+        assert by_id[products[1]]["available_quantity"] == 1
+        assert by_id[99999]["reason"] == "Produto não encontrado"
+        assert by_id[products[2]]["reason"] == "Produto indisponível"
+
+    def test_repeated_product_is_summed(self, client, products):
+        """Teste: O mesmo produto em várias linhas é validado pela soma"""
+        response = _validate(client, [(products[1], 1), (products[1], 1)])
+
+        data = response.json()
+        assert data["valid"] is False
+        assert data["items_status"][0]["requested_quantity"] == 2
+
+    def test_single_query(self, client, db, test_category, query_counter):
+        """Teste: O número de queries não depende do número de itens"""
+        rows = [
+            Product(name=f"Produto {i}", description="Produto", price=1.0, category_id=test_category.id, stock=5)
+            for i in range(50)
+        ]
+        db.add_all(rows)
+        db.commit()
+        ids = [row.id for row in rows]
+
+        counts = []
+        for size in (1, 10, 50):
+            query_counter.reset()
+            assert _validate(client, [(product_id, 1) for product_id in ids[:size]]).status_code == 200
+            counts.append(query_counter.count)
+
+        assert counts[0] == counts[1] == counts[2] == 1
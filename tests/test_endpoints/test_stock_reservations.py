@@ -0,0 +1,114 @@
+"""
+Testes das reservas de estoque feitas pelo carrinho.
+"""
+
+import pytest
+
+from app.core.security import create_access_token
+from app.models.product import Product
+from app.models.user import User
+
+
+@pytest.fixture
+def product_id(db, test_category):
+    """Produto com só 3 unidades."""
+    product = Product(
+        name="Lançamento",
+        description="Edição limitada",
+        price=50.0,
+        category_id=test_category.id,
+        stock=3,
+    )
+    db.add(product)
+    db.commit()
+    return product.id
+
+
+@pytest.fixture
+def other_headers(db):
+    """Cabeçalhos de outro comprador."""
+    user = User(email="outro@example.com", username="outro", hashed_password="x", is_active=True)
+    db.add(user)
+    db.commit()
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+
+
+def _add(client, headers, product_id, quantity):
+    return client.post(
+        "/api/v1/cart/items",
+        json={"product_id": product_id, "quantity": quantity},
+        headers=headers,
+    )
+
+
+class TestCartReservations:
+    """Testes do carrinho segurando o estoque"""
+
+    def test_cart_holds_stock_from_other_buyers(self, client, auth_headers, other_headers, product_id):
+        """Teste: Unidades no carrinho de um comprador não vão para outro"""
+        assert _add(client, auth_headers, product_id, 2).status_code == 201
+
+        response = _add(client, other_headers, product_id, 2)
+
+        assert response.status_code == 400
+        assert "Disponível: 1" in response.json()["detail"]
+
+    def test_availability_accounts_for_reservations(self, client, auth_headers, product_id):
+        """Teste: Disponibilidade e filtro in_stock descontam as reservas"""
+        _add(client, auth_headers, product_id, 3)
+
+        availability = client.get(f"/api/v1/stock/products/{product_id}/available").json()
+        assert availability["available_quantity"] == 0
+        assert availability["is_available"] is False
+
+        in_stock = client.get("/api/v1/products?in_stock=true").json()["items"]
+        out_of_stock = client.get("/api/v1/products?in_stock=false").json()["items"]
+        assert product_id not in [item["id"] for item in in_stock]
+        assert product_id in [item["id"] for item in out_of_stock]
+
+    def test_cached_in_stock_listing_follows_reservations(self, client, auth_headers, product_id):
+        """Teste: Listagem in_stock em cache é invalidada ao reservar e ao devolver"""
+        def listed(in_stock):
+            items = client.get(f"/api/v1/products?in_stock={in_stock}").json()["items"]
+            return product_id in [item["id"] for item in items]
+
+        assert listed("true") and not listed("false")
+
+        item_id = _add(client, auth_headers, product_id, 3).json()["id"]
+        assert not listed("true") and listed("false")
+
+        client.delete(f"/api/v1/cart/items/{item_id}", headers=auth_headers)
+        assert listed("true") and not listed("false")
+
+    def test_owner_can_checkout_reserved_units(self, client, auth_headers, product_id, db):
+        """Teste: O dono da reserva compra as unidades reservadas"""
+        _add(client, auth_headers, product_id, 3)
+
+        response = client.post(
+            "/api/v1/orders",
+            json={
+                "items": [{"product_id": product_id, "quantity": 3}],
+                "shipping_address": "Rua Teste, 123",
+                "payment_method": "pix",
+            },
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 201, response.text
+        db.expire_all()
+        product = db.get(Product, product_id)
+        assert (product.stock, product.reserved_stock) == (0, 0)
+
+    def test_removing_item_releases(self, client, auth_headers, other_headers, product_id):
+        """Teste: Remover o item do carrinho devolve as unidades"""
+        item_id = _add(client, auth_headers, product_id, 3).json()["id"]
+        client.delete(f"/api/v1/cart/items/{item_id}", headers=auth_headers)
+
+        assert _add(client, other_headers, product_id, 3).status_code == 201
+
+    def test_health_endpoint(self, client):
+        """Teste: GET /health/stock-reservations expõe a configuração"""
+        response = client.get("/health/stock-reservations")
+
+        assert response.status_code == 200
+        assert {"ttl_seconds", "interval_seconds", "last_run"} <= response.json().keys()
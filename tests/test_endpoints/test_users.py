@@ -39,6 +39,24 @@ class TestUserRegistration:
         assert response.status_code == 400
         assert "Email já cadastrado" in response.json()["detail"]
 
+    def test_register_duplicate_email_skips_hashing(self, client, test_user, monkeypatch):
+        """Teste: Cadastro rejeitado não ocupa o pool de hash de senha"""
+        from app.routers import auth
+
+        async def fail(password):
+            raise AssertionError("hash gerado para um cadastro rejeitado")
+
+        monkeypatch.setattr(auth, "hash_password_async", fail)
+        response = client.post(
+            "/api/v1/auth/register",
+            json={
+                "email": "test@example.com",
+                "password": "AnotherPassword123!",
+                "full_name": "Another User",
+            },
+        )
+        assert response.status_code == 400
+
     def test_register_invalid_email(self, client):
         """Teste: Registrar com email inválido"""
         response = client.post(
@@ -202,4 +220,110 @@ class TestUpdateCurrentUser:
                 "email": "newemail@example.com",
             },
         )
-        assert response.status_code == 403
\ No newline at end of file
+        assert response.status_code == 403
+
+# ============================================================================
+# TESTES DO CACHE DO USUÁRIO AUTENTICADO
+# ============================================================================
+
+def _user_queries(query_counter):
+    return [s for s in query_counter.statements if "FROM users" in s]
+
+
+class TestCurrentUserCache:
+    """Testes para o cache do usuário em get_current_user"""
+
+    def test_steady_state_has_no_user_queries(self, client, auth_headers, query_counter):
+        """Teste: A partir da segunda requisição, o usuário vem do cache"""
+        client.get("/api/v1/orders", headers=auth_headers)
+
+        query_counter.reset()
+        assert client.get("/api/v1/orders", headers=auth_headers).status_code == 200
+        assert client.get("/api/v1/cart/items", headers=auth_headers).status_code == 404
+        assert _user_queries(query_counter) == []
+
+    def test_admin_route_single_lookup(self, client, admin_auth_headers, query_counter):
+        """Teste: Rota de admin busca o usuário uma vez e depois usa o cache"""
+        query_counter.reset()
+        assert client.get("/api/v1/admin/users/orders/all", headers=admin_auth_headers).status_code == 200
+        assert len([s for s in _user_queries(query_counter) if "users.email" in s]) == 1
+        assert not any("WHERE users.id" in s for s in query_counter.statements)
+
+        query_counter.reset()
+        client.get("/api/v1/admin/users/orders/all", headers=admin_auth_headers)
+        assert _user_queries(query_counter) == []
+
+    def test_toggle_active_invalidates_cache(
+        self, client, auth_headers, admin_auth_headers, test_user
+    ):
+        """Teste: Desativar o usuário invalida o cache imediatamente"""
+        assert client.get("/api/v1/auth/me", headers=auth_headers).status_code == 200
+
+        response = client.put(
+            f"/api/v1/admin/users/{test_user.id}/toggle-active",
+            headers=admin_auth_headers,
+        )
+        assert response.status_code == 200
+
+        assert client.get("/api/v1/auth/me", headers=auth_headers).status_code == 403
+
+    def test_update_current_user_with_cached_user(self, client, auth_headers):
+        """Teste: Atualizar o perfil com o usuário vindo do cache"""
+        client.get("/api/v1/auth/me", headers=auth_headers)
+
+        response = client.put(
+            "/api/v1/auth/me",
+            json={"full_name": "Nome Atualizado"},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+
+        response = client.get("/api/v1/auth/me", headers=auth_headers)
+        assert response.json()["full_name"] == "Nome Atualizado"
+
+
+class TestAuthRoutesWithPasswordPool:
+    """Testes das rotas de autenticação assíncronas (bcrypt no pool de processos)"""
+
+    @pytest.fixture(autouse=True)
+    def no_rate_limit(self, monkeypatch):
+        from app.core.limiter import limiter
+        monkeypatch.setattr(limiter, "enabled", False)
+
+    def test_register_and_login(self, client):
+        """Teste: Cadastro e login aguardam o hash sem ocupar o threadpool"""
+        response = client.post(
+            "/api/v1/auth/register",
+            json={"email": "pool@example.com", "password": "Senha123!", "full_name": "Pool"},
+        )
+        assert response.status_code == 201
+
+        response = client.post("/api/v1/auth/login", json={"email": "pool@example.com", "password": "Senha123!"})
+        assert response.status_code == 200
+        assert response.json()["user"]["username"] == "pool"
+
+        response = client.post("/api/v1/auth/login", json={"email": "pool@example.com", "password": "Errada123!"})
+        assert response.status_code == 401
+
+    def test_update_password(self, client, test_user, auth_headers):
+        """Teste: Nova senha do perfil passa a valer no login"""
+        response = client.put("/api/v1/auth/me", json={"password": "NovaSenha123!"}, headers=auth_headers)
+        assert response.status_code == 200
+
+        response = client.post("/api/v1/auth/login", json={"email": "test@example.com", "password": "NovaSenha123!"})
+        assert response.status_code == 200
+
+    def test_reset_password_uses_token_once(self, client, db, test_user):
+        """Teste: Redefinir a senha consome o token"""
+        from datetime import datetime, timedelta
+        from app.models.password_reset_token import PasswordResetToken
+
+        db.add(PasswordResetToken(user_id=test_user.id, token="abc", expires_at=datetime.utcnow() + timedelta(hours=1)))
+        db.commit()
+
+        params = {"token": "abc", "new_password": "Redefinida123!"}
+        assert client.post("/api/v1/auth/reset-password", params=params).status_code == 200
+        assert client.post("/api/v1/auth/reset-password", params=params).status_code == 400
+
+        response = client.post("/api/v1/auth/login", json={"email": "test@example.com", "password": "Redefinida123!"})
+        assert response.status_code == 200
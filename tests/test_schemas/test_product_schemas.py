@@ -4,6 +4,7 @@ from app.schemas.product import (
     ProductCreate,
     ProductUpdate,
     ProductFilterParams,
+    ProductImageSet,
 )
 
 
@@ -264,4 +265,19 @@ class TestProductFilterParamsSchema:
         assert filters.skip == 0
         assert filters.limit == 10
         assert filters.sort_by == "created_at"
-        assert filters.sort_order == "desc"
\ No newline at end of file
+        assert filters.sort_order == "desc"
+
+class TestProductImageSet:
+    """Testes para a representação srcset das variantes de imagem"""
+
+    def test_from_stored_variants(self):
+        """Teste: Mapa do banco vira <source> por formato, WebP primeiro"""
+        image_set = ProductImageSet.from_variants({
+            "image/jpeg": {"400": "/u/a-400w.jpg", "200": "/u/a-200w.jpg"},
+            "image/webp": {"200": "/u/a-200w.webp", "400": "/u/a-400w.webp"},
+        })
+
+        assert image_set.src == "/u/a-400w.jpg"
+        assert image_set.widths == [200, 400]
+        assert image_set.sources[0].type == "image/webp"
+        assert image_set.sources[0].srcset == "/u/a-200w.webp 200w, /u/a-400w.webp 400w"
@@ -0,0 +1,230 @@
+"""
+Testes para a ingestão de imagens em blocos (limite de tamanho e detecção de formato).
+"""
+
+import asyncio
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+
+from app.utils import image_handler
+from app.utils.image_handler import generate_image_variants, sniff_image_format, spool_upload, stream_upload
+
+
+def _image_bytes(image_format, size=(64, 48)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(buffer, image_format)
+    return buffer.getvalue()
+
+
+class CountingReader(io.BytesIO):
+    """BytesIO que conta quantos bytes foram lidos."""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    """Salvar os uploads em um diretório temporário."""
+    monkeypatch.setattr(image_handler, "UPLOAD_DIR", tmp_path)
+    return tmp_path
+
+
+class TestSniffImageFormat:
+    """Testes para a detecção de formato pelos magic bytes"""
+
+    @pytest.mark.parametrize("image_format", ["JPEG", "PNG", "WEBP"])
+    def test_known_formats(self, image_format):
+        """Teste: JPEG, PNG e WebP são reconhecidos pelo conteúdo"""
+        assert sniff_image_format(_image_bytes(image_format)[:12]) == image_format
+
+    def test_unknown_format(self):
+        """Teste: Conteúdo que não é imagem aceita retorna None"""
+        assert sniff_image_format(b"<html><body>") is None
+        assert sniff_image_format(_image_bytes("GIF")[:12]) is None
+
+
+class TestSpoolUpload:
+    """Testes para a cópia em blocos com limite de tamanho"""
+
+    def test_roundtrip(self):
+        """Teste: O arquivo temporário tem o mesmo conteúdo do upload"""
+        data = _image_bytes("PNG")
+
+        with spool_upload(io.BytesIO(data), chunk_size=16) as upload:
+            assert upload.format == "PNG"
+            assert upload.extension == "png"
+            assert upload.size == len(data)
+            assert upload.file.read() == data
+
+    def test_aborts_as_soon_as_cap_is_exceeded(self):
+        """Teste: A leitura para no primeiro bloco que passa do limite"""
+        source = CountingReader(_image_bytes("PNG")[:16] + b"\0" * 10_000)
+
+        with pytest.raises(HTTPException) as exc:
+            spool_upload(source, max_size=1000, chunk_size=100)
+
+        assert exc.value.status_code == 413
+        assert source.bytes_read == 1100
+
+    def test_rejects_non_image_after_first_chunk(self):
+        """Teste: Conteúdo que não é imagem é rejeitado sem ler o resto"""
+        source = CountingReader(b"MZ\x90\x00" + b"\0" * 10_000)
+
+        with pytest.raises(HTTPException) as exc:
+            spool_upload(source, chunk_size=100)
+
+        assert exc.value.status_code == 400
+        assert source.bytes_read == 100
+
+    def test_rejects_tiny_file(self):
+        """Teste: Arquivo menor que o cabeçalho é rejeitado"""
+        with pytest.raises(HTTPException) as exc:
+            spool_upload(io.BytesIO(b"\xff\xd8"))
+
+        assert exc.value.status_code == 400
+
+    def test_stream_upload_ignores_filename(self):
+        """Teste: O formato vem do conteúdo, não da extensão do nome"""
+        file = UploadFile(io.BytesIO(_image_bytes("JPEG")), filename="foto.png")
+
+        upload = asyncio.run(stream_upload(file))
+        with upload:
+            assert upload.format == "JPEG"
+
+
+class TestImageUploadEndpoints:
+    """Testes dos endpoints de upload com o novo fluxo"""
+
+    def test_admin_create_product_with_image(self, client, db, admin_auth_headers, test_category, upload_dir):
+        """Teste: Upload no cadastro usa a extensão do formato detectado"""
+        response = client.post(
+            "/api/v1/admin/products/",
+            data={"name": "Camisa", "description": "Algodão", "price": "50", "category_id": str(test_category.id)},
+            files={"image": ("foto.jpg", _image_bytes("PNG"), "image/jpeg")},
+            headers=admin_auth_headers,
+        )
+
+        assert response.status_code == 201
+        filename = response.json()["image_url"].rsplit("/", 1)[-1]
+        assert filename.endswith(".png")
+        assert (upload_dir / filename).exists()
+
+    def test_admin_create_product_too_large(self, client, admin_auth_headers, test_category, upload_dir, monkeypatch):
+        """Teste: Upload acima do limite retorna 413 e nada é salvo"""
+        monkeypatch.setattr(image_handler, "MAX_FILE_SIZE", 1024)
+
+        response = client.post(
+            "/api/v1/admin/products/",
+            data={"name": "Camisa", "description": "Algodão", "price": "50", "category_id": str(test_category.id)},
+            files={"image": ("foto.png", _image_bytes("PNG") + b"\0" * 2048, "image/png")},
+            headers=admin_auth_headers,
+        )
+
+        assert response.status_code == 413
+        assert list(upload_dir.iterdir()) == []
+
+    def test_cap_applies_without_declared_size(self, monkeypatch):
+        """Teste: Sem tamanho declarado, o limite é aplicado durante a cópia"""
+        monkeypatch.setattr(image_handler, "MAX_FILE_SIZE", 1024)
+        file = UploadFile(io.BytesIO(_image_bytes("PNG") + b"\0" * 2048), filename="foto.png")
+
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(stream_upload(file))
+
+        assert exc.value.status_code == 413
+
+    def test_upload_product_image_optimizes(self, client, admin_auth_headers, test_product, upload_dir):
+        """Teste: POST /products/upload reduz a imagem e detecta o formato"""
+        response = client.post(
+            f"/api/v1/products/upload?product_id={test_product.id}",
+            files={"file": ("foto.bin", _image_bytes("JPEG", size=(2400, 600)), "application/octet-stream")},
+            headers=admin_auth_headers,
+        )
+
+        assert response.status_code == 200
+        filename = response.json()["product"]["image_url"].rsplit("/", 1)[-1]
+        assert filename.endswith(".jpg")
+        with Image.open(upload_dir / filename) as saved:
+            assert saved.size == (1200, 300)
+
+    def test_upload_exposes_srcset(self, client, admin_auth_headers, test_product, upload_dir):
+        """Teste: O produto passa a expor as variantes em formato srcset"""
+        product_id = test_product.id
+        response = client.post(
+            f"/api/v1/products/upload?product_id={product_id}",
+            files={"file": ("foto.png", _image_bytes("PNG", size=(900, 900)), "image/png")},
+            headers=admin_auth_headers,
+        )
+        assert response.status_code == 200
+
+        image_set = client.get(f"/api/v1/products/{product_id}").json()["image_variants"]
+        assert image_set["widths"] == [200, 400, 800, 900]
+        assert [source["type"] for source in image_set["sources"]] == ["image/webp", "image/png"]
+        assert image_set["sources"][0]["srcset"].endswith("-900w.webp 900w")
+        assert image_set["src"].endswith("-900w.png")
+        assert len(list(upload_dir.iterdir())) == 9  # 8 variantes + manifesto
+
+    def test_new_upload_deletes_old_variants(self, client, admin_auth_headers, test_product, upload_dir):
+        """Teste: Reenviar outra imagem remove todas as variantes anteriores"""
+        url = f"/api/v1/products/upload?product_id={test_product.id}"
+
+        for color in [(255, 0, 0), (0, 0, 255)]:
+            buffer = io.BytesIO()
+            Image.new("RGB", (500, 250), color).save(buffer, "JPEG")
+            response = client.post(
+                url,
+                files={"file": ("foto.jpg", buffer.getvalue(), "image/jpeg")},
+                headers=admin_auth_headers,
+            )
+            assert response.status_code == 200
+
+        # 500, 400 e 200 px, em WebP e JPEG, mais o manifesto: só os da segunda imagem
+        assert len(list(upload_dir.iterdir())) == 7
+
+
+class TestGenerateImageVariants:
+    """Testes para a geração das variantes responsivas"""
+
+    def test_all_widths_in_webp_and_original(self, tmp_path):
+        """Teste: Uma decodificação gera todas as larguras em WebP e no formato original"""
+        source = tmp_path / "origem.jpg"
+        source.write_bytes(_image_bytes("JPEG", size=(1600, 800)))
+
+        variants = generate_image_variants(str(source), "JPEG", str(tmp_path), "foto")
+
+        assert set(variants) == {"image/webp", "image/jpeg"}
+        for mime, image_format in [("image/webp", "WEBP"), ("image/jpeg", "JPEG")]:
+            assert sorted(variants[mime], key=int) == ["200", "400", "800", "1200"]
+            for width, filename in variants[mime].items():
+                with Image.open(tmp_path / filename) as variant:
+                    assert variant.format == image_format
+                    assert variant.width == int(width)
+
+    def test_no_upscaling(self, tmp_path):
+        """Teste: Imagem pequena não é ampliada; a maior variante é o tamanho original"""
+        source = tmp_path / "origem.png"
+        source.write_bytes(_image_bytes("PNG", size=(300, 100)))
+
+        variants = generate_image_variants(str(source), "PNG", str(tmp_path), "foto")
+
+        assert sorted(variants["image/png"], key=int) == ["200", "300"]
+
+    def test_webp_source_only_webp(self, tmp_path):
+        """Teste: Original em WebP gera só variantes WebP"""
+        source = tmp_path / "origem.webp"
+        source.write_bytes(_image_bytes("WEBP", size=(450, 450)))
+
+        variants = generate_image_variants(str(source), "WEBP", str(tmp_path), "foto")
+
+        assert list(variants) == ["image/webp"]
+        assert sorted(variants["image/webp"], key=int) == ["200", "400", "450"]
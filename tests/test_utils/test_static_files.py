@@ -0,0 +1,178 @@
+"""
+Testes para o servidor de arquivos enviados (/uploads).
+"""
+
+import asyncio
+from email.utils import formatdate
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from app.main import app
+from app.utils.static_files import (
+    IMMUTABLE_CACHE_CONTROL,
+    RangeNotSatisfiable,
+    UploadFiles,
+    parse_range,
+)
+
+CONTENT = bytes(range(256)) * 4  # 1024 bytes
+DIGEST_NAME = "a" * 64 + "-400w.webp"
+
+
+@pytest.fixture
+def files_dir(tmp_path):
+    (tmp_path / "foto.jpg").write_bytes(CONTENT)
+    (tmp_path / DIGEST_NAME).write_bytes(CONTENT)
+    (tmp_path / "vazio.png").write_bytes(b"")
+    return tmp_path
+
+
+@pytest.fixture
+def uploads(files_dir):
+    """Aplicação mínima com /uploads servido por UploadFiles."""
+    return TestClient(Starlette(routes=[Mount("/uploads", UploadFiles(directory=files_dir))]))
+
+
+class TestParseRange:
+    """Testes para a interpretação do cabeçalho Range"""
+
+    @pytest.mark.parametrize("header, expected", [
+        ("bytes=0-9", (0, 9)),
+        ("bytes=1000-", (1000, 1023)),
+        ("bytes=-24", (1000, 1023)),
+        ("bytes=1000-5000", (1000, 1023)),
+        ("bytes=-5000", (0, 1023)),
+    ])
+    def test_single_range(self, header, expected):
+        """Teste: Intervalos simples, abertos e sufixos"""
+        assert parse_range(header, 1024) == expected
+
+    @pytest.mark.parametrize("header", ["bytes=0-1,5-9", "items=0-9", "bytes=9-0", "bytes=-"])
+    def test_ignored(self, header):
+        """Teste: Vários intervalos ou sintaxe inválida são ignorados"""
+        assert parse_range(header, 1024) is None
+
+    @pytest.mark.parametrize("header", ["bytes=1024-", "bytes=-0"])
+    def test_not_satisfiable(self, header):
+        """Teste: Intervalo fora do arquivo não é satisfazível"""
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range(header, 1024)
+
+
+class TestUploadFiles:
+    """Testes para cache, GET condicional e Range"""
+
+    def test_immutable_cache_headers(self, uploads):
+        """Teste: Resposta cacheável por um ano, com ETag forte"""
+        response = uploads.get("/uploads/foto.jpg")
+
+        assert response.status_code == 200
+        assert response.content == CONTENT
+        assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["content-type"] == "image/jpeg"
+        assert response.headers["etag"].startswith('"')
+
+    def test_content_addressed_etag_is_the_name(self, uploads):
+        """Teste: Arquivo nomeado pelo conteúdo usa o nome como ETag"""
+        response = uploads.get(f"/uploads/{DIGEST_NAME}")
+
+        assert response.headers["etag"] == f'"{DIGEST_NAME}"'
+
+    def test_if_none_match(self, uploads):
+        """Teste: If-None-Match (forte ou fraco) com o ETag atual retorna 304"""
+        etag = uploads.get("/uploads/foto.jpg").headers["etag"]
+
+        for header in [etag, f"W/{etag}", f'"outro", {etag}']:
+            response = uploads.get("/uploads/foto.jpg", headers={"If-None-Match": header})
+            assert response.status_code == 304
+            assert response.content == b""
+            assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+
+        assert uploads.get("/uploads/foto.jpg", headers={"If-None-Match": '"outro"'}).status_code == 200
+
+    def test_if_modified_since(self, uploads):
+        """Teste: If-Modified-Since igual ao Last-Modified retorna 304"""
+        last_modified = uploads.get("/uploads/foto.jpg").headers["last-modified"]
+
+        response = uploads.get("/uploads/foto.jpg", headers={"If-Modified-Since": last_modified})
+        assert response.status_code == 304
+        old = formatdate(0, usegmt=True)
+        assert uploads.get("/uploads/foto.jpg", headers={"If-Modified-Since": old}).status_code == 200
+
+    def test_range(self, uploads):
+        """Teste: Range devolve 206 com o intervalo pedido"""
+        response = uploads.get("/uploads/foto.jpg", headers={"Range": "bytes=10-19"})
+
+        assert response.status_code == 206
+        assert response.content == CONTENT[10:20]
+        assert response.headers["content-range"] == "bytes 10-19/1024"
+        assert response.headers["content-length"] == "10"
+
+    def test_range_not_satisfiable(self, uploads):
+        """Teste: Range fora do arquivo retorna 416"""
+        response = uploads.get("/uploads/foto.jpg", headers={"Range": "bytes=5000-"})
+
+        assert response.status_code == 416
+        assert response.headers["content-range"] == "bytes */1024"
+
+    def test_if_range(self, uploads):
+        """Teste: If-Range com outro ETag ignora o Range e envia o arquivo inteiro"""
+        etag = uploads.get("/uploads/foto.jpg").headers["etag"]
+
+        same = uploads.get("/uploads/foto.jpg", headers={"Range": "bytes=0-9", "If-Range": etag})
+        other = uploads.get("/uploads/foto.jpg", headers={"Range": "bytes=0-9", "If-Range": '"outro"'})
+
+        assert same.status_code == 206
+        assert other.status_code == 200
+        assert other.content == CONTENT
+
+    def test_head_and_empty_file(self, uploads):
+        """Teste: HEAD não envia corpo; arquivo vazio é servido"""
+        head = uploads.head("/uploads/foto.jpg")
+        assert head.status_code == 200
+        assert head.content == b""
+        assert head.headers["content-length"] == "1024"
+
+        empty = uploads.get("/uploads/vazio.png")
+        assert empty.status_code == 200
+        assert empty.content == b""
+
+    @pytest.mark.parametrize("extension, expected", [
+        ("http.response.pathsend", "http.response.pathsend"),
+        ("http.response.zerocopysend", "http.response.zerocopysend"),
+    ])
+    def test_zero_copy_extensions(self, files_dir, extension, expected):
+        """Teste: Usa o envio sem cópia quando o servidor oferece a extensão"""
+        static = UploadFiles(directory=files_dir)
+        messages = []
+
+        async def receive():
+            return {"type": "http.request"}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/foto.jpg",
+            "root_path": "",
+            "headers": [],
+            "query_string": b"",
+            "extensions": {extension: {}},
+        }
+        asyncio.run(static(scope, receive, send))
+
+        assert messages[0]["status"] == 200
+        assert messages[1]["type"] == expected
+        assert len(messages) == 2
+
+    def test_app_mount(self):
+        """Teste: A aplicação serve /uploads com UploadFiles"""
+        mount = next(route for route in app.routes if getattr(route, "path", None) == "/uploads")
+
+        assert isinstance(mount.app, UploadFiles)